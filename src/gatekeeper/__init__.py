@@ -2,6 +2,7 @@
 # See LICENSE file for licensing details.
 
 """Library for uploading docs to charmhub."""
+
 import logging
 from itertools import tee
 
@@ -14,10 +15,12 @@ from .clients import Clients
 from .constants import DOCUMENTATION_FOLDER_NAME, DOCUMENTATION_TAG  # DEFAULT_BRANCH,
 from .download import recreate_docs
 from .exceptions import InputError
+from .metrics import write_json
 from .repository import DEFAULT_BRANCH_NAME
 from .types_ import (
     ActionResult,
     MigrateOutputs,
+    NetworkMetrics,
     PullRequestAction,
     ReconcileOutputs,
     Url,
@@ -30,6 +33,56 @@ GETTING_STARTED = (
 )
 
 
+def _fetch_refs(clients: Clients, user_inputs: UserInputs) -> None:
+    """Fetch all the branches and tags used during the run at once.
+
+    Args:
+        clients: The clients to interact with things like discourse and the repository.
+        user_inputs: Configurable inputs for running upload-charm-docs.
+    """
+    clients.repository.fetch(
+        branches=(user_inputs.base_branch, DEFAULT_BRANCH_NAME), tags=(DOCUMENTATION_TAG,)
+    )
+
+
+def _finish_run(clients: Clients, user_inputs: UserInputs) -> NetworkMetrics:
+    """Release the resources held for the run and summarise the network calls made during it.
+
+    The summary is logged and written to the metrics file if one is configured.
+
+    Args:
+        clients: The clients to interact with things like discourse and the repository.
+        user_inputs: Configurable inputs for running upload-charm-docs.
+
+    Returns:
+        The metrics of the network calls made by the clients.
+    """
+    clients.repository.close()
+    connection_stats = clients.discourse.connection_stats
+    rate_limit_stats = clients.discourse.rate_limit_stats
+    local_read_stats = clients.local_contents.stats
+    metrics = clients.metrics.summary(
+        counters={
+            "discourse_requests": connection_stats.requests,
+            "discourse_connections": connection_stats.connections,
+            "discourse_connections_reused": connection_stats.reused,
+            "discourse_rate_limited": rate_limit_stats.throttled,
+            "discourse_rate_limit_wait_seconds": rate_limit_stats.wait_seconds,
+            "content_merges": clients.merge_cache.merges,
+            "local_files_read": local_read_stats.files,
+            "local_bytes_read": local_read_stats.bytes_read,
+            "local_content_hits": local_read_stats.hits,
+            "local_file_rereads": local_read_stats.rereads,
+        }
+    )
+    logging.info("network calls: %s, counters: %s", metrics.total_calls, metrics.counters)
+    for name, endpoint in metrics.endpoints.items():
+        logging.info("network calls to %s: %s", name, endpoint)
+    if user_inputs.metrics_path is not None:
+        write_json(metrics=metrics, path=user_inputs.metrics_path)
+    return metrics
+
+
 def run_reconcile(clients: Clients, user_inputs: UserInputs) -> ReconcileOutputs | None:
     """Upload the documentation to charmhub.
 
@@ -52,6 +105,8 @@ def run_reconcile(clients: Clients, user_inputs: UserInputs) -> ReconcileOutputs
 
         return None
 
+    _fetch_refs(clients=clients, user_inputs=user_inputs)
+
     if clients.repository.is_same_commit(DOCUMENTATION_TAG, user_inputs.commit_sha):
         logging.warning(
             "Cannot run any reconcile to Discourse as we are at the same commit of the tag %s",
@@ -65,11 +120,20 @@ def run_reconcile(clients: Clients, user_inputs: UserInputs) -> ReconcileOutputs
         server_client=clients.discourse,
     )
     docs_path = clients.repository.base_path / DOCUMENTATION_FOLDER_NAME
-    path_infos = docs_directory.read(docs_path=docs_path)
+    path_infos = tuple(
+        docs_directory.read(
+            docs_path=docs_path,
+            local_contents=clients.local_contents,
+            manifest=clients.scan_manifest,
+            blob_shas=clients.repository.get_docs_blob_shas(),
+        )
+    )
     server_content = (
         index.server.content if index.server is not None and index.server.content else ""
     )
-    index_contents = index_module.get_contents(index_file=index.local, docs_path=docs_path)
+    index_contents = index_module.get_contents(
+        index_file=index.local, docs_path=docs_path, path_infos=path_infos
+    )
     sorted_path_infos = sort_module.using_contents_index(
         path_infos=path_infos, index_contents=index_contents, docs_path=docs_path
     )
@@ -86,9 +150,14 @@ def run_reconcile(clients: Clients, user_inputs: UserInputs) -> ReconcileOutputs
     actions, check_actions = tee(actions, 2)
     problems = tuple(
         check.conflicts(
-            actions=check_actions, repository=clients.repository, user_inputs=user_inputs
+            actions=check_actions,
+            repository=clients.repository,
+            user_inputs=user_inputs,
+            merge_cache=clients.merge_cache,
         )
     )
+    # The check calculates all the actions, the digests of the local content read are known
+    clients.scan_manifest.save()
     if problems:
         raise InputError(
             "One or more of the required actions could not be executed, see the log for details"
@@ -100,6 +169,7 @@ def run_reconcile(clients: Clients, user_inputs: UserInputs) -> ReconcileOutputs
         discourse=clients.discourse,
         dry_run=user_inputs.dry_run,
         delete_pages=user_inputs.delete_pages,
+        merge_cache=clients.merge_cache,
     )
     urls_with_actions: dict[Url, ActionResult] = {
         str(report.location): report.result
@@ -118,6 +188,7 @@ def run_reconcile(clients: Clients, user_inputs: UserInputs) -> ReconcileOutputs
         index_url=index_url,
         topics=urls_with_actions,
         documentation_tag=clients.repository.tag_exists(DOCUMENTATION_TAG),
+        network_metrics=_finish_run(clients=clients, user_inputs=user_inputs),
     )
 
 
@@ -139,6 +210,8 @@ def run_migrate(clients: Clients, user_inputs: UserInputs) -> MigrateOutputs | N
         )
         return None
 
+    _fetch_refs(clients=clients, user_inputs=user_inputs)
+
     logging.info("Tag exists: %s", str(clients.repository.tag_exists(DOCUMENTATION_TAG)))
 
     if not clients.repository.tag_exists(DOCUMENTATION_TAG):
@@ -160,21 +233,30 @@ def run_migrate(clients: Clients, user_inputs: UserInputs) -> MigrateOutputs | N
         if pull_request is not None:
             pull_request.edit(state="closed")
             return MigrateOutputs(
-                action=PullRequestAction.CLOSED, pull_request_url=pull_request.html_url
+                action=PullRequestAction.CLOSED,
+                pull_request_url=pull_request.html_url,
+                network_metrics=_finish_run(clients=clients, user_inputs=user_inputs),
             )
+        _finish_run(clients=clients, user_inputs=user_inputs)
         return None
 
     if pull_request is None:
         logging.info("PR not existing: creating a new one...")
         pull_request = clients.repository.create_pull_request(user_inputs.base_branch)
         return MigrateOutputs(
-            action=PullRequestAction.OPENED, pull_request_url=pull_request.html_url
+            action=PullRequestAction.OPENED,
+            pull_request_url=pull_request.html_url,
+            network_metrics=_finish_run(clients=clients, user_inputs=user_inputs),
         )
 
     logging.info("upload-charm-documents pull request already open at %s", pull_request.html_url)
     clients.repository.update_pull_request(DEFAULT_BRANCH_NAME)
 
-    return MigrateOutputs(action=PullRequestAction.UPDATED, pull_request_url=pull_request.html_url)
+    return MigrateOutputs(
+        action=PullRequestAction.UPDATED,
+        pull_request_url=pull_request.html_url,
+        network_metrics=_finish_run(clients=clients, user_inputs=user_inputs),
+    )
 
 
 def pre_flight_checks(clients: Clients, user_inputs: UserInputs) -> bool:
@@ -187,6 +269,7 @@ def pre_flight_checks(clients: Clients, user_inputs: UserInputs) -> bool:
     Returns:
         Boolean representing whether the checks have all been passed.
     """
+    _fetch_refs(clients=clients, user_inputs=user_inputs)
     with clients.repository.with_branch(user_inputs.base_branch) as repo:
         if repo.tag_exists(DOCUMENTATION_TAG):
             return repo.is_commit_in_branch(
@@ -9,6 +9,7 @@ from enum import Enum
 
 from . import content, exceptions, reconcile, types_
 from .discourse import Discourse
+from .merge_cache import MergeCache
 
 DRY_RUN_NAVLINK_LINK = "<not created due to dry run>"
 DRY_RUN_REASON = "dry run"
@@ -149,20 +150,20 @@ def _get_update_case(action: types_.UpdateAction, dry_run: bool) -> UpdateCase:
         and action.navlink_change.new.link is not None
         and action.content_change is not None
         and action.content_change.base is not None
-        and action.content_change.local != action.content_change.server
+        and action.content_change.local_digest != action.content_change.server_digest
     ):
         return UpdateCase.CONTENT_CHANGE
     if (
         action.content_change is not None
         and action.content_change.base is None
-        and action.content_change.local != action.content_change.server
+        and action.content_change.local_digest != action.content_change.server_digest
     ):
         return UpdateCase.BASE_MISSING
     return UpdateCase.DEFAULT
 
 
 def _update(
-    action: types_.UpdateAction, discourse: Discourse, dry_run: bool
+    action: types_.UpdateAction, discourse: Discourse, dry_run: bool, merge_cache: MergeCache
 ) -> types_.ActionReport:
     """Execute an update action.
 
@@ -170,6 +171,7 @@ def _update(
         action: The update action details.
         discourse: A client to the documentation server.
         dry_run: If enabled, only log the action that would be taken.
+        merge_cache: The outcomes of merging the content of pages.
 
     Returns:
         A report on the outcome of executing the action.
@@ -197,11 +199,8 @@ def _update(
             reason = DRY_RUN_REASON
         case UpdateCase.CONTENT_CHANGE:
             try:
-                content_change = typing.cast(types_.ContentChange, action.content_change)
-                merged_content = content.merge(
-                    base=typing.cast(str, content_change.base),
-                    theirs=content_change.server,
-                    ours=content_change.local,
+                merged_content = merge_cache.merge(
+                    typing.cast(types_.ContentChange, action.content_change)
                 )
                 discourse.update_topic(
                     url=typing.cast(str, action.navlink_change.new.link), content=merged_content
@@ -276,12 +275,14 @@ def _delete(
         )
 
 
-def _run_one(
+def _run_one(  # pylint: disable=too-many-arguments
     action: types_.AnyAction,
     discourse: Discourse,
     name: str,
     dry_run: bool,
     delete_pages: bool,
+    *,
+    merge_cache: MergeCache,
 ) -> types_.ActionReport:
     """Take the actions against the server.
 
@@ -291,6 +292,7 @@ def _run_one(
         name: The charm name to prefix to the created pages title.
         dry_run: If enabled, only log the action that would be taken.
         delete_pages: Whether to delete pages that are no longer needed.
+        merge_cache: The outcomes of merging the content of pages.
 
     Returns:
         A report on the outcome of executing the action.
@@ -308,7 +310,9 @@ def _run_one(
             report = _noop(action=action, discourse=discourse)
         case types_.UpdateAction:
             assert isinstance(action, types_.UpdateAction)  # nosec
-            report = _update(action=action, discourse=discourse, dry_run=dry_run)
+            report = _update(
+                action=action, discourse=discourse, dry_run=dry_run, merge_cache=merge_cache
+            )
         case types_.DeleteAction:
             assert isinstance(action, types_.DeleteAction)  # nosec
             report = _delete(
@@ -413,12 +417,14 @@ def _run_index(
     return report
 
 
-def run_all(
+def run_all(  # pylint: disable=too-many-arguments
     actions: typing.Iterable[types_.AnyAction],
     index: types_.Index,
     discourse: Discourse,
     dry_run: bool,
     delete_pages: bool,
+    *,
+    merge_cache: MergeCache,
 ) -> tuple[str, list[types_.ActionReport]]:
     """Take the actions against the server.
 
@@ -428,6 +434,8 @@ def run_all(
         discourse: A client to the documentation server.
         dry_run: If enabled, only log the action that would be taken.
         delete_pages: Whether to delete pages that are no longer needed.
+        merge_cache: The outcomes of merging the content of pages, shared with the conflict
+            check.
 
     Returns:
         A 2-element tuple with the index url and the reports of all the requested action.
@@ -439,6 +447,7 @@ def run_all(
             name=index.name,
             dry_run=dry_run,
             delete_pages=delete_pages,
+            merge_cache=merge_cache,
         )
         for action in actions
     ]
@@ -0,0 +1,663 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Asyncio interface for Discourse interactions."""
+
+import asyncio
+import functools
+import itertools
+import json
+import time
+import typing
+from pathlib import Path
+from urllib import parse
+
+import aiohttp
+
+from .discourse_base import (
+    _DEFAULT_TOPIC_CACHE_SIZE,
+    CategoryTopic,
+    _DiscourseBase,
+    _DiscourseTopicInfo,
+    _FirstPostSnapshot,
+    _validate_inputs,
+    _ValidationResult,
+    _ValidationResultInvalid,
+)
+from .discourse_session import rate_limit_wait_seconds
+from .exceptions import DiscourseError
+from .metrics import DISCOURSE_SERVICE, MetricsCollector, body_size
+from .rate_limit import ERROR_CODE_HEADER, RETRY_AFTER_HEADER, RateLimiter
+
+_DEFAULT_MAX_CONCURRENCY = 50
+_JSON_CONTENT_TYPE = "application/json"
+_RATE_LIMIT_RETRY_COUNT = 4
+_REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10 * 60)
+
+
+class _Response(typing.NamedTuple):
+    """The parts of a response used by the client.
+
+    Attrs:
+        status: The HTTP status code.
+        url: The URL of the response after any redirects have been resolved.
+        headers: The headers of the response.
+        content_type: The content type of the body.
+        body: The body of the response.
+    """
+
+    status: int
+    url: str
+    headers: typing.Mapping[str, str]
+    content_type: str
+    body: bytes
+
+
+class AsyncDiscourse(_DiscourseBase):
+    """Interact with a discourse server without blocking the event loop.
+
+    The number of requests in flight at any time is bounded by a semaphore so that many topics can
+    be processed concurrently from a single thread.
+    """
+
+    # All the arguments are required to configure the client
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        base_path: str,
+        api_username: str,
+        api_key: str,
+        category_id: int,
+        *,
+        max_concurrency: int = _DEFAULT_MAX_CONCURRENCY,
+        topic_cache_size: int = _DEFAULT_TOPIC_CACHE_SIZE,
+        rate_limiter: RateLimiter | None = None,
+        cache_dir: Path | None = None,
+        metrics: MetricsCollector | None = None,
+    ) -> None:
+        """Construct.
+
+        Args:
+            base_path: The HTTP protocol and hostname for discourse (e.g., https://discourse).
+            api_username: The username to use for API requests.
+            api_key: The API key for requests.
+            category_id: The category identifier to put the topics into.
+            max_concurrency: The maximum number of requests in flight at the same time.
+            topic_cache_size: The maximum number of topic URLs to keep the resolution for and the
+                maximum number of topics to keep the first post snapshot and content for.
+            rate_limiter: The rate limiter for all requests to the server, can be shared with
+                other clients for the same server. Requests are only limited once the server rate
+                limits them unless the rate limiter is created with a rate.
+            cache_dir: The directory to persist topic downloads in between runs, unchanged topics
+                are not downloaded again.
+            metrics: The collector to record the requests to the server in.
+
+        """
+        super().__init__(
+            base_path,
+            api_username,
+            api_key,
+            category_id,
+            metrics=metrics,
+            cache_dir=cache_dir,
+            rate_limiter=rate_limiter,
+            topic_cache_size=topic_cache_size,
+        )
+        self._max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self) -> "AsyncDiscourse":
+        """Enter the context of the client.
+
+        Returns:
+            The client.
+        """
+        return self
+
+    async def __aexit__(self, *_: typing.Any) -> None:
+        """Close the client when exiting the context."""
+        await self.close()
+
+    async def close(self) -> None:
+        """Close all the connections to the server."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the session for interactions with the server, creating it if required.
+
+        The session has to be created within a running event loop.
+
+        Returns:
+            The session shared by all the requests of the client.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"Api-Key": self._api_key, "Api-Username": self._api_username},
+                connector=aiohttp.TCPConnector(limit=self._max_concurrency),
+                timeout=_REQUEST_TIMEOUT,
+            )
+        return self._session
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        allow_redirects: bool = False,
+        data: list[tuple[str, str]] | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> _Response:
+        """Send a request to the server once the rate limiter allows it.
+
+        Rate limited requests are retried once the rate limiter allows it, responses that ask to
+        retry later slow down the rate limiter.
+
+        Args:
+            method: The HTTP verb for the request.
+            url: The relative or absolute URL for the request.
+            allow_redirects: Whether to follow redirects.
+            data: The form data to include in the request.
+            headers: Additional headers for the request.
+
+        Returns:
+            The response from the server.
+
+        Raises:
+            DiscourseError: if the request could not be sent or the rate limit retries have been
+                exhausted.
+        """
+        for attempt in range(_RATE_LIMIT_RETRY_COUNT):
+            async with self._semaphore:
+                await self._rate_limiter.acquire_async()
+                response = await self._send(
+                    method=method,
+                    url=url,
+                    allow_redirects=allow_redirects,
+                    data=data,
+                    headers=headers,
+                    retried=attempt > 0,
+                )
+
+            if response.status == 429 or RETRY_AFTER_HEADER in response.headers:
+                self._rate_limiter.throttle(
+                    wait_seconds=rate_limit_wait_seconds(
+                        response.headers, functools.partial(json.loads, response.body)
+                    ),
+                    error_code=response.headers.get(ERROR_CODE_HEADER),
+                )
+            else:
+                self._rate_limiter.record_success()
+            if response.status != 429:
+                return response
+
+        raise DiscourseError(f"Number of rate limit retries exceeded, {method=}, {url=!r}")
+
+    # The arguments describe a single request
+    async def _send(  # pylint: disable=too-many-arguments
+        self,
+        method: str,
+        url: str,
+        *,
+        allow_redirects: bool,
+        data: list[tuple[str, str]] | None,
+        headers: dict[str, str] | None,
+        retried: bool,
+    ) -> _Response:
+        """Send a single request to the server and record it in the metrics.
+
+        Args:
+            method: The HTTP verb for the request.
+            url: The relative or absolute URL for the request.
+            allow_redirects: Whether to follow redirects.
+            data: The form data to include in the request.
+            headers: Additional headers for the request.
+            retried: Whether the request is a retry after a rate limited response.
+
+        Returns:
+            The response from the server.
+
+        Raises:
+            DiscourseError: if the request could not be sent.
+        """
+        start = time.monotonic()
+        status = None
+        body = b""
+        try:
+            async with self._get_session().request(
+                method,
+                self._full_url(url=url),
+                allow_redirects=allow_redirects,
+                data=data,
+                headers=headers,
+            ) as response:
+                body = await response.read()
+            status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            raise DiscourseError(f"Error sending request, {method=}, {url=!r}") from exc
+        finally:
+            if self._metrics is not None:
+                self._metrics.record(
+                    service=DISCOURSE_SERVICE,
+                    method=method,
+                    url=url,
+                    status=status,
+                    elapsed_seconds=time.monotonic() - start,
+                    bytes_sent=body_size(parse.urlencode(data or [])),
+                    bytes_received=len(body),
+                    retries=int(retried),
+                )
+
+        return _Response(
+            status=response.status,
+            url=str(response.url),
+            headers=response.headers,
+            content_type=response.content_type,
+            body=body,
+        )
+
+    async def _request_json(
+        self,
+        method: str,
+        url: str,
+        allow_redirects: bool = False,
+        data: list[tuple[str, str]] | None = None,
+    ) -> dict | None:
+        """Send a request to the discourse API and decode the response.
+
+        Args:
+            method: The HTTP verb for the request.
+            url: The relative or absolute URL for the request.
+            allow_redirects: Whether to follow redirects.
+            data: The form data to include in the request.
+
+        Returns:
+            The decoded response body or None if the response is empty.
+
+        Raises:
+            DiscourseError: if the server reports an error or returns unexpected data.
+        """
+        response = await self._request(
+            method=method, url=url, allow_redirects=allow_redirects, data=data
+        )
+        if response.status >= 300:
+            raise DiscourseError(
+                f"Unexpected response, {method=}, {url=!r}, status={response.status}, "
+                f"body={response.body[:1000]!r}"
+            )
+
+        if response.content_type != _JSON_CONTENT_TYPE:
+            # Some calls return empty html documents
+            if not response.body.strip():
+                return None
+            raise DiscourseError(
+                f"Invalid Response, expecting {_JSON_CONTENT_TYPE!r} got "
+                f"{response.content_type!r}, {method=}, {url=!r}"
+            )
+
+        try:
+            decoded = json.loads(response.body)
+        except ValueError as exc:
+            raise DiscourseError(f"failed to decode response, {method=}, {url=!r}") from exc
+
+        if isinstance(decoded, dict) and decoded.get("errors"):
+            raise DiscourseError(
+                f"{decoded.get('message') or ','.join(decoded['errors'])}, {method=}, {url=!r}"
+            )
+
+        return decoded
+
+    async def topic_url_valid(self, url: str) -> _ValidationResult:
+        """Check whether a url to a topic is valid. Assume the url is well formatted.
+
+        Applies the same validations as Discourse.topic_url_valid.
+
+        Args:
+            url: The URL to check.
+
+        Returns:
+            Whether the URL is a valid topic URL.
+        """
+        if (prefix_result := self._url_prefix_invalid(url=url)) is not None:
+            return prefix_result
+
+        try:
+            response = await self._request("HEAD", url, allow_redirects=True)
+        except DiscourseError as exc:
+            return _ValidationResultInvalid(
+                f"The topic URL could not be resolved on discourse, error: {exc}, {url=}"
+            )
+        if response.status >= 400:
+            return _ValidationResultInvalid(
+                "The topic URL could not be resolved on discourse, "
+                f"error: status {response.status}, {url=}"
+            )
+
+        return self._final_url_valid(url=response.url)
+
+    async def _url_to_topic_info(self, url: str) -> _DiscourseTopicInfo:
+        """Retrieve the topic information from the url to the topic.
+
+        The resolution is cached so that each URL is only resolved on the server once. URLs to
+        topics in the last listing of the category are resolved without a request.
+
+        Args:
+            url: The URL to the topic.
+
+        Returns:
+            The topic information.
+        """
+        if (topic_info := self._known_topic_info(url=url)) is not None:
+            return topic_info
+
+        return self._cache_topic_info(url=url, result=await self.topic_url_valid(url=url))
+
+    async def _retrieve_topic_first_post(self, url: str) -> _FirstPostSnapshot:
+        """Retrieve the first post from a topic based on the URL to the topic.
+
+        Args:
+            url: The link to the topic.
+
+        Returns:
+            The snapshot of the first post from the topic.
+
+        Raises:
+            DiscourseError: if the topic could not be retrieved or if the topic has been deleted.
+
+        """
+        topic_info = await self._url_to_topic_info(url=url)
+        if (snapshot := self._first_post_cache.get(topic_info.id_)) is None:
+            try:
+                topic = await self._request_json(
+                    "GET", f"/t/{topic_info.slug}/{topic_info.id_}.json", allow_redirects=True
+                )
+            except DiscourseError as exc:
+                raise DiscourseError(f"Error retrieving topic, {url=!r}, {exc=}") from exc
+            snapshot = self._first_post_snapshot(topic=topic or {})
+            self._first_post_cache.put(topic_info.id_, snapshot)
+
+        # Check for deleted topic
+        if snapshot.user_deleted:
+            raise DiscourseError(f"topic has been deleted, {url=}")
+
+        return snapshot
+
+    async def absolute_url(self, url: str) -> str:
+        """Get the URL including base path for a topic.
+
+        Args:
+            url: The relative or absolute URL.
+
+        Returns:
+            The url with the base path.
+        """
+        topic_info = await self._url_to_topic_info(url=url)
+        return self._topic_info_to_absolute_url(topic_info=topic_info)
+
+    async def check_topic_write_permission(self, url: str) -> bool:
+        """Check whether the credentials have write permission on a topic.
+
+        Args:
+            url: The URL to the topic. Assume it includes the slug and id of the topic as the last
+                2 elements of the url.
+
+        Returns:
+            Whether the credentials have write permissions to the topic.
+
+        """
+        return (await self._retrieve_topic_first_post(url=url)).can_edit
+
+    async def check_topic_read_permission(self, url: str) -> bool:
+        """Check whether the credentials have read permission on a topic.
+
+        Args:
+            url: The URL to the topic. Assume it includes the slug and id of the topic as the last
+                2 elements of the url.
+
+        Returns:
+            Whether the credentials have read permissions to the topic.
+
+        """
+        await self._retrieve_topic_first_post(url=url)
+        return True
+
+    async def list_category_topics(
+        self, category_id: int | None = None
+    ) -> dict[int, CategoryTopic]:
+        """Walk all the pages of the listing of a category and index its topics.
+
+        The index is used to resolve topic URLs and check that topics exist without a request per
+        topic. Write permissions are not part of the listing and still require the topic.
+
+        Args:
+            category_id: The category to list, defaults to the category the topics are put into.
+
+        Returns:
+            The topics in the category by their identifier.
+
+        Raises:
+            DiscourseError: if the listing could not be retrieved.
+        """
+        category_id = self._category_id if category_id is None else category_id
+        index: dict[int, CategoryTopic] = {}
+        for page in itertools.count():
+            try:
+                response = await self._request_json(
+                    "GET", f"/c/{category_id}.json?page={page}", allow_redirects=True
+                )
+            except DiscourseError as exc:
+                raise DiscourseError(
+                    f"Error listing the topics of the category, {category_id=}, {exc=}"
+                ) from exc
+            if not self._index_category_page(response=response, index=index):
+                break
+
+        self._category_index = index
+        return index
+
+    async def retrieve_topic(self, url: str) -> str:
+        """Retrieve the topic content.
+
+        Args:
+            url: The URL to the topic. Assume it includes the slug and id of the topic as the last
+                2 elements of the url.
+
+        Returns:
+            The content of the first post in the topic.
+
+        Raises:
+            DiscourseError: if authentication fails, if the server refuses to return the requested
+                topic or if the topic is not found.
+
+        """
+        # Check for any read issues
+        if not await self.check_topic_read_permission(url=url):
+            raise DiscourseError(f"Error retrieving the topic, could not read the topic, {url=!r}")
+
+        topic_info = await self._url_to_topic_info(url=url)
+        if (content := self._content_cache.get(topic_info.id_)) is not None:
+            return content
+
+        # The first post has already been retrieved for the read permission check
+        first_post = await self._retrieve_topic_first_post(url=url)
+        cached, headers = self._conditional_headers(topic_id=topic_info.id_)
+        if cached is not None and cached.is_version(first_post.version, first_post.updated_at):
+            return self._cache_raw_content(topic_id=topic_info.id_, download=cached)
+
+        response = await self._request("GET", f"/raw/{topic_info.id_}", headers=headers)
+        if response.status == 304:
+            if cached is not None:
+                return self._cache_revalidated(topic_info.id_, cached, first_post)
+            # There is no cached content the response could refer to
+            response = await self._request(
+                "GET", f"/raw/{topic_info.id_}", headers=self._auth_headers()
+            )
+        if response.status >= 300:
+            raise DiscourseError(f"Error retrieving the topic, {url=!r}, status={response.status}")
+
+        return self._cache_raw_content(
+            topic_id=topic_info.id_,
+            download=self._download_from_response(
+                headers=response.headers,
+                raw_content=response.body.decode("utf-8"),
+                first_post=first_post,
+            ),
+        )
+
+    async def _retrieve_topic_or_error(self, url: str) -> str | DiscourseError:
+        """Retrieve the topic content, returning rather than raising any error.
+
+        Args:
+            url: The URL to the topic.
+
+        Returns:
+            The content of the first post in the topic or the error that occurred.
+        """
+        try:
+            return await self.retrieve_topic(url=url)
+        except DiscourseError as exc:
+            return exc
+
+    async def prefetch(self, urls: typing.Iterable[str]) -> list[str | DiscourseError]:
+        """Retrieve the content and first post of many topics concurrently.
+
+        Args:
+            urls: The URLs to the topics.
+
+        Returns:
+            The content of the first post in each topic or the DiscourseError raised while
+            retrieving it, in the same order as the URLs.
+        """
+        return list(await asyncio.gather(*(self._retrieve_topic_or_error(url) for url in urls)))
+
+    async def create_topic(self, title: str, content: str) -> str:
+        """Create a new topic.
+
+        Args:
+            title: The title of the topic.
+            content: The content for the first post in the topic.
+
+        Returns:
+            The URL to the topic.
+
+        Raises:
+            DiscourseError: if anything goes wrong during topic creation.
+
+        """
+        data = [
+            ("title", title),
+            ("category", str(self._category_id)),
+            ("raw", content),
+            *(("tags[]", tag) for tag in self._tags),
+        ]
+        try:
+            post = await self._request_json("POST", "/posts", data=data)
+        except DiscourseError as exc:
+            raise DiscourseError(
+                f"Error creating the topic, {title=!r}, {content=!r}, {exc=}"
+            ) from exc
+
+        topic_slug = self._get_post_value(post=post or {}, key="topic_slug", expected_type=str)
+        topic_id = self._get_post_value(post=post or {}, key="topic_id", expected_type=int)
+        topic_info = _DiscourseTopicInfo(slug=topic_slug, id_=topic_id)
+        url = self._topic_info_to_absolute_url(topic_info)
+        self._topic_info_cache.put(url, topic_info)
+        return url
+
+    async def delete_topic(self, url: str) -> str:
+        """Delete a topic.
+
+        Args:
+            url: The URL to the topic.
+
+        Returns:
+            The link to the deleted topic.
+
+        Raises:
+            DiscourseError: if authentication fails if the server refuses to delete the topic, if
+                the topic is not found or if anything else has gone wrong.
+
+        """
+        topic_info = await self._url_to_topic_info(url=url)
+        try:
+            await self._request_json("DELETE", f"/t/{topic_info.id_}")
+        except DiscourseError as exc:
+            raise DiscourseError(f"Error deleting the topic, {url=!r}, {exc=}") from exc
+        finally:
+            self.invalidate_topic(url=url)
+        return self._topic_info_to_absolute_url(topic_info)
+
+    async def update_topic(
+        self, url: str, content: str, edit_reason: str = "Charm documentation updated"
+    ) -> str:
+        """Update the first post of a topic.
+
+        Args:
+            url: The URL to the topic.
+            content: The content for the first post in the topic.
+            edit_reason: The reason the edit was made.
+
+        Returns:
+            The link to the updated topic.
+
+        Raises:
+            DiscourseError: if authentication fails, if the server refuses to update the first post
+                in the topic or if the topic is not found.
+
+        """
+        first_post = await self._retrieve_topic_first_post(url=url)
+        topic_info = await self._url_to_topic_info(url=url)
+
+        data = [("post[raw]", content), ("post[edit_reason]", edit_reason)]
+        try:
+            await self._request_json("PUT", f"/posts/{first_post.id_}", data=data)
+        except DiscourseError as exc:
+            raise DiscourseError(
+                f"Error updating the topic, {url=!r}, {content=!r}, {exc=}"
+            ) from exc
+        finally:
+            # The version and content of the post have changed
+            self._forget_topic_content(topic_id=topic_info.id_)
+
+        return self._topic_info_to_absolute_url(topic_info)
+
+
+# All the arguments are required to configure the client
+def create_async_discourse(  # pylint: disable=too-many-arguments
+    hostname: str,
+    category_id: str,
+    api_username: str,
+    api_key: str,
+    *,
+    max_concurrency: int = _DEFAULT_MAX_CONCURRENCY,
+    cache_dir: Path | None = None,
+    metrics: MetricsCollector | None = None,
+) -> AsyncDiscourse:
+    """Create asyncio discourse client.
+
+    Args:
+        hostname: The Discourse server hostname.
+        category_id: The category to use for topics.
+        api_username: The discourse API username to use for interactions with the server.
+        api_key: The discourse API key to use for interactions with the server.
+        max_concurrency: The maximum number of requests in flight at the same time.
+        cache_dir: The directory to persist topic downloads in between runs.
+        metrics: The collector to record the requests to the server in.
+
+    Returns:
+        An asyncio discourse client for the server.
+
+    """
+    inputs = _validate_inputs(
+        hostname=hostname, category_id=category_id, api_username=api_username, api_key=api_key
+    )
+    return AsyncDiscourse(
+        base_path=inputs.base_path,
+        api_username=api_username,
+        api_key=api_key,
+        category_id=inputs.category_id,
+        max_concurrency=max_concurrency,
+        cache_dir=cache_dir,
+        metrics=metrics,
+    )
@@ -0,0 +1,182 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Read objects from the git object database through a long lived git process."""
+
+import subprocess  # nosec
+import threading
+import typing
+import weakref
+from pathlib import Path
+
+from .exceptions import RepositoryClientError
+
+_MISSING_OBJECT_MARKERS = frozenset((b"missing", b"ambiguous"))
+
+
+class GitObject(typing.NamedTuple):
+    """An object read from the git object database.
+
+    Attrs:
+        sha: The SHA of the object.
+        type_: The type of the object, e.g., blob or tree.
+        content: The raw content of the object.
+    """
+
+    sha: str
+    type_: str
+    content: bytes
+
+
+def _terminate(process: subprocess.Popen[bytes]) -> None:
+    """Stop a git cat-file process.
+
+    Args:
+        process: The process to stop.
+    """
+    if process.poll() is not None:
+        return
+    if process.stdin is not None:
+        process.stdin.close()
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    if process.stdout is not None:
+        process.stdout.close()
+
+
+def _write_requests(stdin: typing.IO[bytes], object_names: typing.Sequence[str]) -> None:
+    """Send the names of the objects to read to git cat-file.
+
+    Args:
+        stdin: The standard input of the process.
+        object_names: The names of the objects to read.
+    """
+    try:
+        stdin.write(b"".join(f"{name}\n".encode("utf-8") for name in object_names))
+        stdin.flush()
+    except (BrokenPipeError, ValueError):
+        # The process exited, the reader reports the failure
+        pass
+
+
+class BlobReader:
+    """Read many objects through a single git cat-file --batch process.
+
+    Starting a git process for every object that is read costs milliseconds, the process is
+    therefore started on first use and kept open until the reader is closed. All the objects
+    requested at once are sent to the process together and their content is read back while the
+    requests are still being written so that reading many objects takes a single exchange.
+    """
+
+    def __init__(self, working_dir: Path) -> None:
+        """Construct.
+
+        Args:
+            working_dir: A directory in the git repository to read objects from.
+        """
+        self._working_dir = working_dir
+        self._process: subprocess.Popen[bytes] | None = None
+        self._finalizer: weakref.finalize | None = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen[bytes]:
+        """Get the git cat-file process, starting it if it isn't running.
+
+        Returns:
+            The running process.
+        """
+        if self._process is not None and self._process.poll() is None:
+            return self._process
+
+        # The process is kept open between reads and stopped by close
+        self._process = subprocess.Popen(  # nosec # pylint: disable=consider-using-with
+            ["git", "cat-file", "--batch"],
+            cwd=self._working_dir,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        # Make sure the process is stopped even if the reader is never closed
+        self._finalizer = weakref.finalize(self, _terminate, self._process)
+        return self._process
+
+    @staticmethod
+    def _read_object(stdout: typing.IO[bytes]) -> GitObject | None:
+        """Read the next object from the output of git cat-file.
+
+        Args:
+            stdout: The standard output of the process.
+
+        Returns:
+            The object or None if it does not exist.
+
+        Raises:
+            RepositoryClientError: if git cat-file exited or returned unexpected output.
+        """
+        header = stdout.readline()
+        if not header.endswith(b"\n"):
+            raise RepositoryClientError("git cat-file exited before returning all objects")
+
+        fields = header.split()
+        if fields[-1] in _MISSING_OBJECT_MARKERS:
+            return None
+        if len(fields) != 3 or not fields[2].isdigit():
+            raise RepositoryClientError(f"unexpected output from git cat-file, {header=!r}")
+
+        size = int(fields[2])
+        content = stdout.read(size + 1)
+        if len(content) != size + 1:
+            raise RepositoryClientError("git cat-file exited before returning all objects")
+        return GitObject(sha=fields[0].decode(), type_=fields[1].decode(), content=content[:-1])
+
+    def read(self, object_names: typing.Sequence[str]) -> list[GitObject | None]:
+        """Read objects from the git object database.
+
+        Args:
+            object_names: The names of the objects to read in any form git understands, e.g.,
+                <commit>:<path>.
+
+        Returns:
+            The objects in the same order as the names, None for objects that do not exist.
+
+        Raises:
+            RepositoryClientError: if a name is invalid or git cat-file failed.
+        """
+        if any("\n" in name for name in object_names):
+            raise RepositoryClientError(f"object names can't contain new lines, {object_names=}")
+        if not object_names:
+            return []
+
+        with self._lock:
+            process = self._start()
+            if process.stdin is None or process.stdout is None:
+                raise RepositoryClientError("git cat-file was started without pipes")
+
+            # Writing in another thread avoids the process blocking on a full output pipe while
+            # the requests are still being written
+            writer = threading.Thread(
+                target=_write_requests, args=(process.stdin, object_names), daemon=True
+            )
+            writer.start()
+            try:
+                return [self._read_object(process.stdout) for _ in object_names]
+            except RepositoryClientError:
+                self._close()
+                raise
+            finally:
+                writer.join()
+
+    def _close(self) -> None:
+        """Stop the git cat-file process if it is running."""
+        if self._finalizer is not None:
+            self._finalizer()
+        self._process = None
+        self._finalizer = None
+
+    def close(self) -> None:
+        """Stop the git cat-file process, it is started again if more objects are read."""
+        with self._lock:
+            self._close()
@@ -0,0 +1,118 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Size bounded in memory caches shared by the clients during a run."""
+
+import os
+import tempfile
+import threading
+import typing
+from collections import OrderedDict
+from pathlib import Path
+
+KeyT = typing.TypeVar("KeyT")
+ValueT = typing.TypeVar("ValueT")
+
+
+class LRUCache(typing.Generic[KeyT, ValueT]):
+    """Thread safe mapping that evicts the least recently used entries beyond a maximum size.
+
+    Attrs:
+        maxsize: The maximum number of entries kept in the cache.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        """Construct.
+
+        Args:
+            maxsize: The maximum number of entries kept in the cache.
+        """
+        self.maxsize = maxsize
+        self._entries: OrderedDict[KeyT, ValueT] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: KeyT) -> ValueT | None:
+        """Get an entry and mark it as recently used.
+
+        Args:
+            key: The key of the entry.
+
+        Returns:
+            The value of the entry or None if there is no entry for the key.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: KeyT, value: ValueT) -> None:
+        """Add or replace an entry, evicting the least recently used entries if required.
+
+        Args:
+            key: The key of the entry.
+            value: The value of the entry.
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: KeyT) -> ValueT | None:
+        """Remove an entry.
+
+        Args:
+            key: The key of the entry.
+
+        Returns:
+            The value of the removed entry or None if there was no entry for the key.
+        """
+        with self._lock:
+            return self._entries.pop(key, None)
+
+    def discard_where(self, predicate: typing.Callable[[KeyT, ValueT], bool]) -> None:
+        """Remove all the entries matching a predicate.
+
+        Args:
+            predicate: Called with the key and value of each entry, entries for which it returns
+                True are removed.
+        """
+        with self._lock:
+            for key in [key for key, value in self._entries.items() if predicate(key, value)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Remove all the entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Get the number of entries.
+
+        Returns:
+            The number of entries in the cache.
+        """
+        with self._lock:
+            return len(self._entries)
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write a file so that a concurrent reader never sees a partially written file.
+
+    Args:
+        path: The path to the file.
+        data: The content of the file.
+
+    Raises:
+        OSError: if the file cannot be written, no temporary file is left behind.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    file = tempfile.NamedTemporaryFile(dir=path.parent, delete=False)
+    try:
+        with file:
+            file.write(data)
+        os.replace(file.name, path)
+    except OSError:
+        Path(file.name).unlink(missing_ok=True)
+        raise
@@ -10,6 +10,7 @@ from typing import NamedTuple, TypeGuard
 
 from . import constants, content
 from .constants import DOCUMENTATION_TAG
+from .merge_cache import MergeCache
 from .repository import Client
 from .types_ import AnyAction, UpdateAction, UserInputs
 
@@ -57,7 +58,7 @@ def get_path_with_diffs(actions: Iterable[UpdateAction]) -> PathsWithDiff:
         for action in actions
         if action.content_change is not None
         and action.content_change.base is not None
-        and action.content_change.local != action.content_change.server
+        and action.content_change.local_digest != action.content_change.server_digest
     )
     # The access to optional attributes is safe because of the filter above, mypy doesn't track
     # to this degree
@@ -67,12 +68,14 @@ def get_path_with_diffs(actions: Iterable[UpdateAction]) -> PathsWithDiff:
         base_local_diffs=tuple(
             format_path(action.path)
             for action in base_local_actions
-            if action.content_change.base != action.content_change.local  # type: ignore
+            if action.content_change.base_digest  # type: ignore
+            != action.content_change.local_digest  # type: ignore
         ),
         base_server_diffs=tuple(
             format_path(action.path)
             for action in base_server_actions
-            if action.content_change.base != action.content_change.server  # type: ignore
+            if action.content_change.base_digest  # type: ignore
+            != action.content_change.server_digest  # type: ignore
         ),
     )
 
@@ -89,11 +92,12 @@ def _is_update_action(action: AnyAction) -> TypeGuard[UpdateAction]:
     return isinstance(action, UpdateAction)
 
 
-def _update_action_problem(action: UpdateAction) -> Problem | None:
+def _update_action_problem(action: UpdateAction, merge_cache: MergeCache) -> Problem | None:
     """Get any problem with an update action.
 
     Args:
         action: The action to check.
+        merge_cache: The outcomes of merging the content of pages.
 
     Returns:
         None if there is no problem or the problem if there is an issue with the action.
@@ -103,7 +107,7 @@ def _update_action_problem(action: UpdateAction) -> Problem | None:
 
     if (
         action.content_change.base is None
-        and action.content_change.server == action.content_change.local
+        and action.content_change.server_digest == action.content_change.local_digest
     ):
         return None
 
@@ -119,11 +123,7 @@ def _update_action_problem(action: UpdateAction) -> Problem | None:
             ),
         )
     else:
-        action_conflicts = content.conflicts(
-            base=action.content_change.base,
-            theirs=action.content_change.server,
-            ours=action.content_change.local,
-        )
+        action_conflicts = merge_cache.result(action.content_change).conflicts
         if action_conflicts is None:
             return None
         problem = Problem(
@@ -149,7 +149,10 @@ def _update_action_problem(action: UpdateAction) -> Problem | None:
 
 
 def conflicts(
-    actions: Iterable[AnyAction], repository: Client, user_inputs: UserInputs
+    actions: Iterable[AnyAction],
+    repository: Client,
+    user_inputs: UserInputs,
+    merge_cache: MergeCache,
 ) -> Iterator[Problem]:
     """Check whether actions have any content conflicts.
 
@@ -168,6 +171,7 @@ def conflicts(
         actions: The actions to check.
         repository: Client for repository interactions.
         user_inputs: Configuration from the user.
+        merge_cache: The outcomes of merging the content of pages, shared with the actions.
 
     Yields:
         A problem for each action with a conflict
@@ -177,7 +181,11 @@ def conflicts(
 
     any_page_conflicts = False
     for problem in filter(
-        None, (_update_action_problem(action) for action in actions_page_conflicts)
+        None,
+        (
+            _update_action_problem(action=action, merge_cache=merge_cache)
+            for action in actions_page_conflicts
+        ),
     ):
         any_page_conflicts = True
         yield problem
@@ -6,9 +6,14 @@
 import typing
 from pathlib import Path
 
+from .constants import DOCUMENTATION_FOLDER_NAME
+from .content_store import ContentStore, LocalContentStore
 from .discourse import Discourse, create_discourse
+from .merge_cache import MergeCache
+from .metrics import MetricsCollector
 from .repository import Client as RepositoryClient
 from .repository import create_repository_client
+from .scan_manifest import ScanManifest
 from .types_ import UserInputs
 
 
@@ -18,10 +23,20 @@ class Clients(typing.NamedTuple):
     Attrs:
         discourse: Discourse client.
         repository: Client for the repository.
+        metrics: Collector of the network calls made by the clients.
+        content_store: The contents of the pages seen during the run.
+        local_contents: The bytes read from the local documentation files during the run.
+        merge_cache: The outcomes of merging the content of pages.
+        scan_manifest: The documentation files scanned by previous runs.
     """
 
     discourse: Discourse
     repository: RepositoryClient
+    metrics: MetricsCollector
+    content_store: ContentStore
+    local_contents: LocalContentStore
+    merge_cache: MergeCache
+    scan_manifest: ScanManifest
 
 
 def get_clients(user_inputs: UserInputs, base_path: Path) -> Clients:
@@ -34,14 +49,30 @@ def get_clients(user_inputs: UserInputs, base_path: Path) -> Clients:
     Returns:
         Clients object embedding both Discourse API and Repository clients
     """
+    metrics = MetricsCollector()
+    local_contents = LocalContentStore()
     return Clients(
         discourse=create_discourse(
             hostname=user_inputs.discourse.hostname,
             category_id=user_inputs.discourse.category_id,
             api_username=user_inputs.discourse.api_username,
             api_key=user_inputs.discourse.api_key,
+            cache_dir=user_inputs.discourse.cache_dir,
+            metrics=metrics,
         ),
         repository=create_repository_client(
-            access_token=user_inputs.github_access_token, base_path=base_path
+            access_token=user_inputs.github_access_token,
+            base_path=base_path,
+            metrics=metrics,
+            cache_dir=user_inputs.github_cache_dir,
+            local_contents=local_contents,
+        ),
+        metrics=metrics,
+        content_store=ContentStore(),
+        local_contents=local_contents,
+        merge_cache=MergeCache(cache_dir=user_inputs.merge_cache_dir),
+        scan_manifest=ScanManifest(
+            path=user_inputs.scan_manifest_path,
+            docs_path=base_path / DOCUMENTATION_FOLDER_NAME,
         ),
     )
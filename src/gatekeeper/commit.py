@@ -9,6 +9,8 @@ from itertools import takewhile
 from pathlib import Path
 from typing import NamedTuple
 
+from .content_store import LocalContentStore
+
 
 class FileAddedOrModified(NamedTuple):
     """File that was added, mofied or copied copied in a commit.
@@ -41,12 +43,15 @@ _RENAMED_PATTERN = re.compile(r"R\d+\s*(\S*)\s*(\S*)")
 _COPIED_PATTERN = re.compile(r"C\d+\s*(\S*)\s*(\S*)")
 
 
-def parse_git_show(output: str, repository_path: Path) -> Iterator[FileAction]:
+def parse_git_show(
+    output: str, repository_path: Path, local_contents: LocalContentStore
+) -> Iterator[FileAction]:
     """Parse the output of a git show with --name-status into manageable data.
 
     Args:
         output: The output of the git show command.
         repository_path: The path to the git repository.
+        local_contents: The store to read the content of the files through.
 
     Yields:
         Information about each of the files that changed in the commit.
@@ -70,12 +75,12 @@ def parse_git_show(output: str, repository_path: Path) -> Iterator[FileAction]:
     for line in lines:
         if (modified_match := _MODIFIED_PATTERN.match(line)) is not None:
             path = Path(modified_match.group(1))
-            yield FileAddedOrModified(path, (repository_path / path).read_text(encoding="utf-8"))
+            yield FileAddedOrModified(path, local_contents.read_text(repository_path / path))
             continue
 
         if (added_match := _ADDED_PATTERN.match(line)) is not None:
             path = Path(added_match.group(1))
-            yield FileAddedOrModified(path, (repository_path / path).read_text(encoding="utf-8"))
+            yield FileAddedOrModified(path, local_contents.read_text(repository_path / path))
             continue
 
         if (delete_match := _DELETED_PATTERN.match(line)) is not None:
@@ -87,10 +92,10 @@ def parse_git_show(output: str, repository_path: Path) -> Iterator[FileAction]:
             old_path = Path(renamed_match.group(1))
             path = Path(renamed_match.group(2))
             yield FileDeleted(old_path)
-            yield FileAddedOrModified(path, (repository_path / path).read_text(encoding="utf-8"))
+            yield FileAddedOrModified(path, local_contents.read_text(repository_path / path))
             continue
 
         if (copied_match := _COPIED_PATTERN.match(line)) is not None:
             path = Path(copied_match.group(2))
-            yield FileAddedOrModified(path, (repository_path / path).read_text(encoding="utf-8"))
+            yield FileAddedOrModified(path, local_contents.read_text(repository_path / path))
             continue
@@ -4,26 +4,47 @@
 """Module for checking conflicts using 3-way merge and create content based on a 3 way merge."""
 
 import difflib
-import tempfile
-from pathlib import Path
-
-from git.exc import GitCommandError
-from git.repo import Repo
+import typing
+from enum import Enum
 
+from . import diff3, line_diff
 from .exceptions import ContentError
 
-_BASE_BRANCH = "base"
-_THEIR_BRANCH = "theirs"
-_OUR_BRANCH = "ours"
+
+class DiffEngine(str, Enum):
+    """The engines to show the difference between two contents with.
+
+    Attrs:
+        NDIFF: Compare every line with difflib, including the differences within lines, which is
+            slow for long contents.
+        MYERS: A unified diff based on Myers' algorithm, like git diff.
+        HISTOGRAM: A unified diff based on the histogram algorithm, like git merge.
+    """
+
+    NDIFF = "ndiff"
+    MYERS = "myers"
+    HISTOGRAM = "histogram"
 
 
-def conflicts(base: str, theirs: str, ours: str) -> str | None:
+# The reports show unified diffs of the changed lines, use DiffEngine.NDIFF for the previous
+# output of every line
+DEFAULT_DIFF_ENGINE = DiffEngine.MYERS
+DEFAULT_DIFF_CONTEXT = 3
+# The diffs are logged and reported, longer diffs are cut off
+DEFAULT_MAX_DIFF_SIZE = 64 * 1024
+_TRUNCATED_MESSAGE = "[diff truncated, it is longer than {max_size} characters]\n"
+
+
+def conflicts(
+    base: str, theirs: str, ours: str, engine: DiffEngine = DEFAULT_DIFF_ENGINE
+) -> str | None:
     """Check for merge conflicts based on the git merge algorithm.
 
     Args:
         base: The starting point for both changes.
         theirs: The other change.
         ours: The local change.
+        engine: The engine to show the difference between the changes with.
 
     Returns:
         The description of the merge conflicts or None if there are no conflicts.
@@ -32,12 +53,14 @@ def conflicts(base: str, theirs: str, ours: str) -> str | None:
     if theirs in (base, ours) or ours == base:
         return None
 
-    return f"diff: {diff(theirs, ours)}"
+    return f"diff: {diff(theirs, ours, engine=engine)}"
 
 
 def merge(base: str, theirs: str, ours: str) -> str:
     """Create the merged content based on the git merge algorithm.
 
+    The merge is done in memory and produces the same content and conflict markers as git merge.
+
     Args:
         base: The starting point for both changes.
         theirs: The other change.
@@ -57,56 +80,74 @@ def merge(base: str, theirs: str, ours: str) -> str:
     if theirs == ours:
         return theirs
 
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        # Initialise repository
-        tmp_path = Path(tmp_dir)
-        repo = Repo.init(tmp_path)
-        writer = repo.config_writer()
-        writer.set_value("user", "name", "temp_user")
-        writer.set_value("user", "email", "temp_email")
-        writer.set_value("commit", "gpgsign", "false")
-        writer.release()
-
-        # Create base
-        repo.git.checkout("-b", _BASE_BRANCH)
-        (content_path := tmp_path / "content.txt").write_text(base, encoding="utf-8")
-        repo.git.add(".")
-        repo.git.commit("-m", "initial commit")
-
-        # Create their branch
-        repo.git.checkout("-b", _THEIR_BRANCH)
-        content_path.write_text(theirs, encoding="utf-8")
-        repo.git.add(".")
-        repo.git.commit("-m", "their change")
-
-        # Create our branch
-        repo.git.checkout(_BASE_BRANCH)
-        repo.git.checkout("-b", _OUR_BRANCH)
-        content_path.write_text(ours, encoding="utf-8")
-        repo.git.add(".")
-        repo.git.commit("-m", "our change")
-
-        try:
-            repo.git.merge(_THEIR_BRANCH)
-        except GitCommandError as exc:
-            content_conflicts = content_path.read_text(encoding="utf-8")
-            raise ContentError(
-                f"could not automatically merge, conflicts:\n{content_conflicts}"
-            ) from exc
-
-        return content_path.read_text(encoding="utf-8")
-
-
-def diff(first: str, second: str) -> str:
+    merged_lines, conflict_count = diff3.merge_lines(
+        base=line_diff.split_lines(base),
+        ours=line_diff.split_lines(ours),
+        theirs=line_diff.split_lines(theirs),
+    )
+    merged = "".join(merged_lines)
+    if conflict_count:
+        raise ContentError(f"could not automatically merge, conflicts:\n{merged}")
+
+    return merged
+
+
+def _truncate(lines: typing.Iterable[str], max_size: int | None) -> str:
+    """Join lines up to a maximum size.
+
+    Args:
+        lines: The lines, only the lines that fit are consumed.
+        max_size: The maximum number of characters to keep, no limit if None.
+
+    Returns:
+        The lines that fit and a note if lines were left out.
+    """
+    if max_size is None:
+        return "".join(lines)
+
+    kept: list[str] = []
+    size = 0
+    for line in lines:
+        if size + len(line) > max_size:
+            kept.append(_TRUNCATED_MESSAGE.format(max_size=max_size))
+            break
+        kept.append(line)
+        size += len(line)
+    return "".join(kept)
+
+
+def diff(
+    first: str,
+    second: str,
+    engine: DiffEngine = DEFAULT_DIFF_ENGINE,
+    context: int = DEFAULT_DIFF_CONTEXT,
+    max_size: int | None = DEFAULT_MAX_DIFF_SIZE,
+) -> str:
     """Show the difference between two strings.
 
+    By default, this is a unified diff of up to 64 KiB rather than the ndiff of every line that
+    was shown before.
+
     Args:
         first: One of the strings to compare.
         second: One of the strings to compare.
+        engine: The engine to show the difference with.
+        context: The number of unchanged lines to show around the differences, not used by the
+            ndiff engine which shows all the lines.
+        max_size: The maximum number of characters of the diff, no limit if None.
 
     Returns:
         The diff between the two strings.
     """
-    return "".join(
-        difflib.Differ().compare(first.splitlines(keepends=True), second.splitlines(keepends=True))
-    )
+    if engine == DiffEngine.NDIFF:
+        lines: typing.Iterable[str] = difflib.Differ().compare(
+            first.splitlines(keepends=True), second.splitlines(keepends=True)
+        )
+    else:
+        lines = line_diff.unified_diff(
+            line_diff.split_lines(first),
+            line_diff.split_lines(second),
+            context=context,
+            algorithm=line_diff.DiffAlgorithm(engine.value),
+        )
+    return _truncate(lines, max_size=max_size)
@@ -0,0 +1,310 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Keep the content of pages and local files so that they are only read and kept once."""
+
+import hashlib
+import os
+import typing
+from collections import OrderedDict
+from pathlib import Path
+
+from . import types_
+from .exceptions import ContentError
+
+_DIGEST_SIZE = 32
+_DEFAULT_MAX_RETAINED_BYTES = 32 * 1024 * 1024
+
+
+class StoredContent(typing.NamedTuple):
+    """Content kept in the store.
+
+    Attrs:
+        digest: The digest of the normalised content.
+        content: The normalised content.
+    """
+
+    digest: str
+    content: str
+
+
+def normalise(content: str) -> str:
+    """Normalise content so that it only differs if the page differs.
+
+    Line endings are converted the same way as when reading a local file and the leading and
+    trailing whitespace is removed.
+
+    Args:
+        content: The content to normalise.
+
+    Returns:
+        The normalised content.
+    """
+    return content.replace("\r\n", "\n").replace("\r", "\n").strip()
+
+
+def digest(content: str) -> str:
+    """Calculate the digest of content.
+
+    Args:
+        content: The normalised content.
+
+    Returns:
+        The BLAKE2 digest of the content.
+    """
+    return hashlib.blake2b(
+        content.encode("utf-8"), digest_size=_DIGEST_SIZE, usedforsecurity=False
+    ).hexdigest()
+
+
+class ContentStore:
+    """Keep a single copy of each distinct content, addressed by its digest.
+
+    Comparing digests takes the same time for any content and contents that are the same, e.g.,
+    the local and server content of a page that hasn't changed, share one copy.
+    """
+
+    def __init__(self) -> None:
+        """Construct."""
+        self._contents: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        """Get the number of distinct contents in the store.
+
+        Returns:
+            The number of contents.
+        """
+        return len(self._contents)
+
+    def __contains__(self, digest_: object) -> bool:
+        """Check whether content with a digest is in the store.
+
+        Args:
+            digest_: The digest of the content.
+
+        Returns:
+            Whether the content is in the store.
+        """
+        return digest_ in self._contents
+
+    def add(self, content: str) -> StoredContent:
+        """Normalise content and keep it unless the same content is already kept.
+
+        Args:
+            content: The content to add.
+
+        Returns:
+            The digest and the kept copy of the normalised content.
+        """
+        normalised = normalise(content)
+        content_digest = digest(normalised)
+        return StoredContent(
+            digest=content_digest,
+            content=self._contents.setdefault(content_digest, normalised),
+        )
+
+    def get(self, digest_: str) -> str:
+        """Get content by its digest.
+
+        Args:
+            digest_: The digest of the content.
+
+        Returns:
+            The normalised content.
+
+        Raises:
+            ContentError: if there is no content with the digest in the store.
+        """
+        try:
+            return self._contents[digest_]
+        except KeyError as exc:
+            raise ContentError(f"no content with digest {digest_} in the store") from exc
+
+    def content_change(
+        self, base: str | None, server: StoredContent, local: StoredContent
+    ) -> types_.ContentChange:
+        """Create a change of content with the contents kept in the store.
+
+        Args:
+            base: The content which is the base for comparison, added to the store.
+            server: The content on the server already in the store.
+            local: The content on the local disk already in the store.
+
+        Returns:
+            The change with the normalised contents and their digests.
+        """
+        stored_base = self.add(base) if base is not None else None
+        return types_.ContentChange(
+            base=stored_base.content if stored_base is not None else None,
+            server=server.content,
+            local=local.content,
+            base_digest=stored_base.digest if stored_base is not None else None,
+            server_digest=server.digest,
+            local_digest=local.digest,
+        )
+
+
+class _FileHead(typing.NamedTuple):
+    """The bytes read from the start of a local file.
+
+    Attrs:
+        data: The bytes that have been read.
+        size: The size of the file when it was read.
+        mtime_ns: The modification time of the file when it was read.
+        complete: Whether all the bytes of the file have been read.
+    """
+
+    data: bytes
+    size: int
+    mtime_ns: int
+
+    @property
+    def complete(self) -> bool:
+        """Whether all the bytes of the file have been read."""
+        return len(self.data) >= self.size
+
+
+class LocalReadStats(typing.NamedTuple):
+    """Statistics about reading local files.
+
+    Attrs:
+        files: The number of distinct files read.
+        bytes_read: The number of bytes read from the files.
+        hits: The number of times the content of a file was retrieved without reading the file.
+        rereads: The number of times a file was read from the start again, 0 if every file was
+            read only once.
+    """
+
+    files: int
+    bytes_read: int
+    hits: int
+    rereads: int
+
+
+class LocalContentStore:
+    """Keep the bytes read from local files so that no part of a file is read twice.
+
+    Reading the start of a file, e.g., to find its title, records the bytes that were read and
+    reading the content of the file later only reads the remaining bytes. The least recently used
+    files are no longer kept once the kept bytes exceed a maximum and files that changed since
+    they were read are read again.
+
+    Attrs:
+        stats: Statistics about reading the files.
+    """
+
+    def __init__(self, max_size: int = _DEFAULT_MAX_RETAINED_BYTES) -> None:
+        """Construct.
+
+        Args:
+            max_size: The maximum number of bytes to keep.
+        """
+        self._heads: OrderedDict[Path, _FileHead] = OrderedDict()
+        self._max_size = max_size
+        self._size = 0
+        self._paths_read: set[Path] = set()
+        self._bytes_read = 0
+        self._hits = 0
+        self._rereads = 0
+
+    @property
+    def stats(self) -> LocalReadStats:
+        """Statistics about reading the files."""
+        return LocalReadStats(
+            files=len(self._paths_read),
+            bytes_read=self._bytes_read,
+            hits=self._hits,
+            rereads=self._rereads,
+        )
+
+    def _record_read(self, path: Path, offset: int, count: int) -> None:
+        """Count bytes read from a file.
+
+        Args:
+            path: The path to the file.
+            offset: The position in the file the bytes were read from.
+            count: The number of bytes read.
+        """
+        if not offset:
+            if path in self._paths_read:
+                self._rereads += 1
+            self._paths_read.add(path)
+        self._bytes_read += count
+
+    def _pop(self, path: Path) -> _FileHead | None:
+        """Stop keeping the bytes read from a file.
+
+        Args:
+            path: The path to the file.
+
+        Returns:
+            The bytes read from the file or None if none were kept.
+        """
+        if (head := self._heads.pop(path, None)) is not None:
+            self._size -= len(head.data)
+        return head
+
+    def _keep(self, path: Path, head: _FileHead) -> None:
+        """Keep the bytes read from a file, evicting the least recently used files if required.
+
+        Args:
+            path: The path to the file.
+            head: The bytes read from the file.
+        """
+        self._pop(path)
+        if len(head.data) > self._max_size:
+            return
+        self._heads[path] = head
+        self._size += len(head.data)
+        while self._size > self._max_size:
+            self._pop(next(iter(self._heads)))
+
+    def add(self, path: Path, data: bytes, stat: os.stat_result) -> None:
+        """Record the bytes read from the start of a file.
+
+        Args:
+            path: The path to the file.
+            data: The bytes read from the start of the file.
+            stat: The status of the file when it was read.
+        """
+        self._record_read(path=path, offset=0, count=len(data))
+        self._keep(path, _FileHead(data=data, size=stat.st_size, mtime_ns=stat.st_mtime_ns))
+
+    def read_bytes(self, path: Path) -> bytes:
+        """Get the content of a file, only reading the bytes that haven't been read before.
+
+        Args:
+            path: The path to the file.
+
+        Returns:
+            The content of the file.
+        """
+        stat = path.stat()
+        head = self._pop(path)
+        # The file changed since it was read
+        if head is not None and (head.size, head.mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            head = None
+
+        if head is not None and head.complete:
+            self._hits += 1
+        else:
+            data = head.data if head is not None else b""
+            with path.open("rb") as file:
+                file.seek(len(data))
+                remaining = file.read()
+            self._record_read(path=path, offset=len(data), count=len(remaining))
+            head = _FileHead(data=data + remaining, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+        self._keep(path, head)
+        return head.data
+
+    def read_text(self, path: Path) -> str:
+        """Get the content of a file as text like Path.read_text does.
+
+        Args:
+            path: The path to the file.
+
+        Returns:
+            The content of the file with the line endings converted to new lines.
+        """
+        return self.read_bytes(path).decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
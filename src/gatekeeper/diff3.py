@@ -0,0 +1,370 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Three way merge of lines that produces the same result as git merge.
+
+The merge follows the xdiff library that git uses so that the merged content and the conflict
+markers are the same as those git merge writes.
+"""
+
+import typing
+from enum import Enum, auto
+
+from .line_diff import DiffAlgorithm, Hunk, diff_lines
+
+CONFLICT_MARKER_SIZE = 7
+OUR_LABEL = "HEAD"
+THEIR_LABEL = "theirs"
+# Conflicts separated by at most this many lines are combined into one conflict
+_CONFLICT_GAP = 3
+
+
+class _RegionKind(Enum):
+    """The kinds of regions of a three way merge.
+
+    Attrs:
+        CONFLICT: Both sides changed the region differently.
+        OURS: Only our side changed the region.
+        THEIRS: Only their side changed the region.
+        IDENTICAL: Both sides made the same change to the region.
+    """
+
+    CONFLICT = auto()
+    OURS = auto()
+    THEIRS = auto()
+    IDENTICAL = auto()
+
+
+class _Region(typing.NamedTuple):
+    """A region of a three way merge where at least one side changed the base.
+
+    Attrs:
+        kind: How the sides changed the region.
+        ours_start: The index of the first line of the region in our side.
+        ours_count: The number of lines of the region in our side.
+        theirs_start: The index of the first line of the region in their side.
+        theirs_count: The number of lines of the region in their side.
+        ours_end: The index after the last line of the region in our side.
+        theirs_end: The index after the last line of the region in their side.
+    """
+
+    kind: _RegionKind
+    ours_start: int
+    ours_count: int
+    theirs_start: int
+    theirs_count: int
+
+    @property
+    def ours_end(self) -> int:
+        """The index after the last line of the region in our side."""
+        return self.ours_start + self.ours_count
+
+    @property
+    def theirs_end(self) -> int:
+        """The index after the last line of the region in their side."""
+        return self.theirs_start + self.theirs_count
+
+
+def _append_region(regions: list[_Region], region: _Region) -> None:
+    """Add a region, combining it with the previous region if they overlap or touch.
+
+    Args:
+        regions: The regions so far, updated in place.
+        region: The region to add.
+    """
+    if regions and (
+        region.ours_start <= (previous := regions[-1]).ours_end
+        or region.theirs_start <= previous.theirs_end
+    ):
+        regions[-1] = _Region(
+            kind=previous.kind if previous.kind == region.kind else _RegionKind.CONFLICT,
+            ours_start=previous.ours_start,
+            ours_count=region.ours_end - previous.ours_start,
+            theirs_start=previous.theirs_start,
+            theirs_count=region.theirs_end - previous.theirs_start,
+        )
+        return
+    regions.append(region)
+
+
+def _conflict_region(our_hunk: Hunk, their_hunk: Hunk) -> _Region:
+    """Create the conflict for overlapping changes of both sides.
+
+    Both sides are extended to cover the lines of the base changed by either side.
+
+    Args:
+        our_hunk: The change of our side relative to the base.
+        their_hunk: The change of their side relative to the base.
+
+    Returns:
+        The conflict.
+    """
+    start_offset = our_hunk.start_a - their_hunk.start_a
+    end_offset = start_offset + our_hunk.count_a - their_hunk.count_a
+    ours_start = our_hunk.start_b - max(start_offset, 0)
+    theirs_start = their_hunk.start_b + min(start_offset, 0)
+    return _Region(
+        kind=_RegionKind.CONFLICT,
+        ours_start=ours_start,
+        ours_count=our_hunk.start_b + our_hunk.count_b - ours_start - min(end_offset, 0),
+        theirs_start=theirs_start,
+        theirs_count=their_hunk.start_b + their_hunk.count_b - theirs_start + max(end_offset, 0),
+    )
+
+
+def _merge_regions(base: list[str], ours: list[str], theirs: list[str]) -> list[_Region]:
+    """Find the regions that were changed by either side relative to the base.
+
+    Args:
+        base: The lines of the starting point for both changes.
+        ours: The lines of the local change.
+        theirs: The lines of the other change.
+
+    Returns:
+        The changed regions in order.
+    """
+    our_hunks = diff_lines(base, ours, algorithm=DiffAlgorithm.HISTOGRAM)
+    their_hunks = diff_lines(base, theirs, algorithm=DiffAlgorithm.HISTOGRAM)
+    regions: list[_Region] = []
+    our_index, their_index = 0, 0
+    while our_index < len(our_hunks) and their_index < len(their_hunks):
+        our_hunk, their_hunk = our_hunks[our_index], their_hunks[their_index]
+        our_base_end = our_hunk.start_a + our_hunk.count_a
+        their_base_end = their_hunk.start_a + their_hunk.count_a
+        if our_base_end < their_hunk.start_a:
+            _append_region(
+                regions,
+                _Region(
+                    kind=_RegionKind.OURS,
+                    ours_start=our_hunk.start_b,
+                    ours_count=our_hunk.count_b,
+                    theirs_start=their_hunk.start_b - their_hunk.start_a + our_hunk.start_a,
+                    theirs_count=our_hunk.count_a,
+                ),
+            )
+            our_index += 1
+            continue
+        if their_base_end < our_hunk.start_a:
+            _append_region(
+                regions,
+                _Region(
+                    kind=_RegionKind.THEIRS,
+                    ours_start=our_hunk.start_b - our_hunk.start_a + their_hunk.start_a,
+                    ours_count=their_hunk.count_a,
+                    theirs_start=their_hunk.start_b,
+                    theirs_count=their_hunk.count_b,
+                ),
+            )
+            their_index += 1
+            continue
+
+        if (
+            our_hunk.start_a != their_hunk.start_a
+            or our_hunk.count_a != their_hunk.count_a
+            or ours[our_hunk.start_b : our_hunk.start_b + our_hunk.count_b]
+            != theirs[their_hunk.start_b : their_hunk.start_b + their_hunk.count_b]
+        ):
+            _append_region(regions, _conflict_region(our_hunk=our_hunk, their_hunk=their_hunk))
+
+        if our_base_end >= their_base_end:
+            their_index += 1
+        if their_base_end >= our_base_end:
+            our_index += 1
+
+    for our_hunk in our_hunks[our_index:]:
+        _append_region(
+            regions,
+            _Region(
+                kind=_RegionKind.OURS,
+                ours_start=our_hunk.start_b,
+                ours_count=our_hunk.count_b,
+                theirs_start=our_hunk.start_a + len(theirs) - len(base),
+                theirs_count=our_hunk.count_a,
+            ),
+        )
+    for their_hunk in their_hunks[their_index:]:
+        _append_region(
+            regions,
+            _Region(
+                kind=_RegionKind.THEIRS,
+                ours_start=their_hunk.start_a + len(ours) - len(base),
+                ours_count=their_hunk.count_a,
+                theirs_start=their_hunk.start_b,
+                theirs_count=their_hunk.count_b,
+            ),
+        )
+
+    return regions
+
+
+def _refine_conflicts(regions: list[_Region], ours: list[str], theirs: list[str]) -> list[_Region]:
+    """Reduce conflicts to the lines that differ between the sides.
+
+    Args:
+        regions: The changed regions.
+        ours: The lines of the local change.
+        theirs: The lines of the other change.
+
+    Returns:
+        The regions with the lines both sides agree on removed from the conflicts.
+    """
+    refined = []
+    for region in regions:
+        if region.kind != _RegionKind.CONFLICT or not region.ours_count or not region.theirs_count:
+            refined.append(region)
+            continue
+
+        hunks = diff_lines(
+            ours[region.ours_start : region.ours_end],
+            theirs[region.theirs_start : region.theirs_end],
+            algorithm=DiffAlgorithm.HISTOGRAM,
+        )
+        if not hunks:
+            refined.append(region._replace(kind=_RegionKind.IDENTICAL))
+            continue
+        refined.extend(
+            _Region(
+                kind=_RegionKind.CONFLICT,
+                ours_start=region.ours_start + hunk.start_a,
+                ours_count=hunk.count_a,
+                theirs_start=region.theirs_start + hunk.start_b,
+                theirs_count=hunk.count_b,
+            )
+            for hunk in hunks
+        )
+    return refined
+
+
+def _combine_close_conflicts(regions: list[_Region]) -> list[_Region]:
+    """Combine conflicts that are only separated by a few lines.
+
+    Args:
+        regions: The changed regions.
+
+    Returns:
+        The regions with close conflicts combined.
+    """
+    combined: list[_Region] = []
+    for region in regions:
+        if (
+            combined
+            and (previous := combined[-1]).kind == _RegionKind.CONFLICT
+            and region.kind == _RegionKind.CONFLICT
+            and region.ours_start - previous.ours_end <= _CONFLICT_GAP
+        ):
+            combined[-1] = previous._replace(
+                ours_count=region.ours_end - previous.ours_start,
+                theirs_count=region.theirs_end - previous.theirs_start,
+            )
+            continue
+        combined.append(region)
+    return combined
+
+
+def _ends_with_crlf(lines: list[str], index: int) -> bool | None:
+    """Check whether a line ends with a carriage return and a new line.
+
+    Args:
+        lines: The lines.
+        index: The index of the line.
+
+    Returns:
+        Whether the line ends with a carriage return and a new line or None if it can't be
+        determined because the line has no line ending.
+    """
+    if index < len(lines) - 1:
+        return lines[index].endswith("\r\n")
+    if not lines:
+        return None
+    if lines[index].endswith("\n"):
+        return lines[index].endswith("\r\n")
+    if not index:
+        return None
+    return lines[index - 1].endswith("\r\n")
+
+
+def _line_ending(base: list[str], ours: list[str], theirs: list[str], region: _Region) -> str:
+    """Get the line ending for the lines added around a conflict.
+
+    Args:
+        base: The lines of the starting point for both changes.
+        ours: The lines of the local change.
+        theirs: The lines of the other change.
+        region: The conflict.
+
+    Returns:
+        The line ending of the lines before the conflict.
+    """
+    is_crlf = None
+    for lines, index in (
+        (ours, max(region.ours_start - 1, 0)),
+        (theirs, max(region.theirs_start - 1, 0)),
+        (base, 0),
+    ):
+        if (is_crlf := _ends_with_crlf(lines, index)) is False:
+            return "\n"
+    return "\r\n" if is_crlf else "\n"
+
+
+def _with_line_ending(lines: list[str], line_ending: str) -> list[str]:
+    """Make sure the last line ends with a new line.
+
+    Args:
+        lines: The lines.
+        line_ending: The line ending to add if it is missing.
+
+    Returns:
+        The lines with a line ending added to the last line if it is missing.
+    """
+    if lines and not lines[-1].endswith("\n"):
+        return [*lines[:-1], f"{lines[-1]}{line_ending}"]
+    return lines
+
+
+def merge_lines(base: list[str], ours: list[str], theirs: list[str]) -> tuple[list[str], int]:
+    """Merge the changes of both sides into the base like git merge does.
+
+    Conflicts are marked with the same markers as git uses by default.
+
+    Args:
+        base: The lines of the starting point for both changes.
+        ours: The lines of the local change.
+        theirs: The lines of the other change.
+
+    Returns:
+        The merged lines, including the conflict markers, and the number of conflicts.
+    """
+    if ours == base:
+        return theirs, 0
+    if theirs == base:
+        return ours, 0
+
+    regions = _merge_regions(base=base, ours=ours, theirs=theirs)
+    regions = _combine_close_conflicts(_refine_conflicts(regions, ours=ours, theirs=theirs))
+
+    merged: list[str] = []
+    conflict_count = 0
+    ours_index = 0
+    for region in regions:
+        if region.kind == _RegionKind.IDENTICAL:
+            continue
+        merged.extend(ours[ours_index : region.ours_start])
+        if region.kind == _RegionKind.OURS:
+            merged.extend(ours[region.ours_start : region.ours_end])
+        elif region.kind == _RegionKind.THEIRS:
+            merged.extend(theirs[region.theirs_start : region.theirs_end])
+        else:
+            conflict_count += 1
+            line_ending = _line_ending(base=base, ours=ours, theirs=theirs, region=region)
+            merged.append(f"{'<' * CONFLICT_MARKER_SIZE} {OUR_LABEL}{line_ending}")
+            merged.extend(
+                _with_line_ending(ours[region.ours_start : region.ours_end], line_ending)
+            )
+            merged.append(f"{'=' * CONFLICT_MARKER_SIZE}{line_ending}")
+            merged.extend(
+                _with_line_ending(theirs[region.theirs_start : region.theirs_end], line_ending)
+            )
+            merged.append(f"{'>' * CONFLICT_MARKER_SIZE} {THEIR_LABEL}{line_ending}")
+        ours_index = region.ours_end
+    merged.extend(ours[ours_index:])
+    return merged, conflict_count
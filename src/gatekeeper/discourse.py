@@ -3,74 +3,55 @@
 
 """Interface for Discourse interactions."""
 
+import itertools
 import typing
-from urllib import parse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
-import pydiscourse
 import pydiscourse.exceptions
 import requests
 from requests.adapters import HTTPAdapter
-from urllib3 import Retry
 
-from .exceptions import DiscourseError, InputError
+from .discourse_base import (
+    _DEFAULT_TOPIC_CACHE_SIZE,
+    CategoryTopic,
+    _DiscourseBase,
+    _DiscourseTopicInfo,
+    _FirstPostSnapshot,
+    _validate_inputs,
+    _ValidationResult,
+    _ValidationResultInvalid,
+)
+from .discourse_session import ConnectionStats, SessionDiscourseClient, create_requests_session
+from .exceptions import DiscourseError
+from .metrics import MetricsCollector
+from .rate_limit import RateLimiter
 
-_URL_PATH_PREFIX = "/t/"
-_POST_SPLIT_LINE = "\n\n-------------------------\n\n"
+_DEFAULT_POOL_MAXSIZE = 10
 
 
-class _DiscourseTopicInfo(typing.NamedTuple):
-    """Information about a discourse topic.
+class Discourse(_DiscourseBase):
+    """Interact with a discourse server.
 
     Attrs:
-        slug: The URL slug generated by Discourse based on the title of the topic.
-        id_: The identifier generated by Discourse of the topic.
-
-    """
-
-    slug: str
-    id_: int
-
-
-class _ValidationResultValid(typing.NamedTuple):
-    """The validation result is valid.
-
-    Attrs:
-        value: The validation result, always True.
-        message: The validation message, always None.
-        final_url: The topic link after any redirects have been resolved.
-
-    """
-
-    final_url: str
-    value: typing.Literal[True] = True
-    message: None = None
-
-
-class _ValidationResultInvalid(typing.NamedTuple):
-    """The validation result is invalid.
-
-    Attrs:
-        value: The validation result, always False.
-        message: The validation message as the reason the validation failed.
-        final_url: Always set to None since the url is not valid.
-
+        connection_stats: Statistics about the reuse of connections to the server.
     """
 
-    message: str
-    value: typing.Literal[False] = False
-    final_url: None = None
-
-
-_ValidationResult = _ValidationResultValid | _ValidationResultInvalid
-KeyT = typing.TypeVar("KeyT")
-
-
-class Discourse:
-    """Interact with a discourse server."""
-
-    _tags = ("docs",)
-
-    def __init__(self, base_path: str, api_username: str, api_key: str, category_id: int) -> None:
+    # All the arguments are required to configure the client
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        base_path: str,
+        api_username: str,
+        api_key: str,
+        category_id: int,
+        *,
+        pool_maxsize: int = _DEFAULT_POOL_MAXSIZE,
+        keep_alive: bool = True,
+        topic_cache_size: int = _DEFAULT_TOPIC_CACHE_SIZE,
+        rate_limiter: RateLimiter | None = None,
+        cache_dir: Path | None = None,
+        metrics: MetricsCollector | None = None,
+    ) -> None:
         """Construct.
 
         Args:
@@ -78,53 +59,43 @@ class Discourse:
             api_username: The username to use for API requests.
             api_key: The API key for requests.
             category_id: The category identifier to put the topics into.
+            pool_maxsize: The maximum number of connections to keep open to the server, also
+                limits the number of concurrent requests when prefetching topics.
+            keep_alive: Whether connections to the server should be reused between requests.
+            topic_cache_size: The maximum number of topic URLs to keep the resolution for and the
+                maximum number of topics to keep the first post snapshot and content for.
+            rate_limiter: The rate limiter for all requests to the server, can be shared with
+                other clients for the same server. Requests are only limited once the server rate
+                limits them unless the rate limiter is created with a rate.
+            cache_dir: The directory to persist topic downloads in between runs, unchanged topics
+                are not downloaded again.
+            metrics: The collector to record the requests to the server in.
 
         """
-        self._client = pydiscourse.DiscourseClient(
-            host=base_path, api_username=api_username, api_key=api_key, timeout=10 * 60
+        super().__init__(
+            base_path=base_path,
+            api_username=api_username,
+            api_key=api_key,
+            category_id=category_id,
+            topic_cache_size=topic_cache_size,
+            rate_limiter=rate_limiter,
+            cache_dir=cache_dir,
+            metrics=metrics,
         )
-        self._category_id = category_id
-        self._base_path = base_path
-        self._api_username = api_username
-        self._api_key = api_key
-
-    @staticmethod
-    def _topic_url_path_components_valid(
-        path_components: typing.Sequence[str], url: str
-    ) -> str | None:
-        """Check whether the path components of a topic URL are valid.
-
-        Args:
-            path_components: The elements of the URL path after splitting on /.
-            url: The original URL, used for messages describing what is wrong.
-
-        Returns:
-            Whether the message for what is wrong with the path components or None if no issues
-            were found.
-        """
-        if not len(path_components) == 3:
-            return (
-                "Unexpected number of path components, "
-                f"expected: 3, got: {len(path_components)}, {url=}"
-            )
-
-        if not path_components[0] == "t":
-            return (
-                "Unexpected first path component, "
-                f"expected: {'t'!r}, got: {path_components[0]!r}, {url=}"
-            )
-
-        if not path_components[1]:
-            return f"Empty second path component topic slug, got: {path_components[1]!r}, {url=}"
-
-        if not path_components[2].isnumeric():
-            return (
-                "unexpected third path component topic id, "
-                "expected: a string that can be converted to an integer, "
-                f"got: {path_components[2]!r}, {url=}"
-            )
-
-        return None
+        self._session = create_requests_session(
+            pool_maxsize=pool_maxsize,
+            keep_alive=keep_alive,
+            rate_limiter=self._rate_limiter,
+            metrics=metrics,
+        )
+        self._client = SessionDiscourseClient(
+            session=self._session,
+            host=base_path,
+            api_username=api_username,
+            api_key=api_key,
+            timeout=10 * 60,
+        )
+        self._pool_maxsize = pool_maxsize
 
     def topic_url_valid(self, url: str) -> _ValidationResult:
         """Check whether a url to a topic is valid. Assume the url is well formatted.
@@ -144,17 +115,11 @@ class Discourse:
         Returns:
             Whether the URL is a valid topic URL.
         """
-        if not url.startswith((self._base_path, _URL_PATH_PREFIX)):
-            return _ValidationResultInvalid(
-                "The base path is different to the expected base path, "
-                f"expected: {self._base_path}, {url=}"
-            )
+        if (prefix_result := self._url_prefix_invalid(url=url)) is not None:
+            return prefix_result
 
         try:
-            response = self._get_requests_session().head(
-                url if url.startswith(self._base_path) else f"{self._base_path}{url}",
-                allow_redirects=True,
-            )
+            response = self._session.head(self._full_url(url=url), allow_redirects=True)
             response.raise_for_status()
             url = response.url
         except (
@@ -167,67 +132,68 @@ class Discourse:
                 f"The topic URL could not be resolved on discourse, error: {exc}, {url=}"
             )
 
-        parsed_url = parse.urlparse(url=url)
-        # Remove trailing / and ignore first element which is always empty
-        path_components = parsed_url.path.rstrip("/").split("/")[1:]
-
-        if (
-            components_message := self._topic_url_path_components_valid(
-                path_components=path_components, url=url
-            )
-        ) is not None:
-            return _ValidationResultInvalid(components_message)
-
-        return _ValidationResultValid(final_url=url)
+        return self._final_url_valid(url=url)
 
     def _url_to_topic_info(self, url: str) -> _DiscourseTopicInfo:
         """Retrieve the topic information from the url to the topic.
 
+        The resolution is cached so that each URL is only resolved on the server once. URLs to
+        topics in the last listing of the category are resolved without a request.
+
         Args:
             url: The URL to the topic.
 
         Returns:
             The topic information.
-
-        Raises:
-            DiscourseError: if the url is not valid.
         """
-        result = self.topic_url_valid(url=url)
-        if not result.value:
-            raise DiscourseError(result.message)
+        if (topic_info := self._known_topic_info(url=url)) is not None:
+            return topic_info
 
-        # If the result is valid, the final_url is guaranteed to be a string
-        url = typing.cast(str, result.final_url)
+        return self._cache_topic_info(url=url, result=self.topic_url_valid(url=url))
 
-        path_components = parse.urlparse(url=url).path.split("/")
-        return _DiscourseTopicInfo(slug=path_components[-2], id_=int(path_components[-1]))
+    def _retrieve_topic_first_post(self, url: str) -> _FirstPostSnapshot:
+        """Retrieve the first post from a topic based on the URL to the topic.
 
-    def _topic_info_to_absolute_url(self, topic_info: _DiscourseTopicInfo) -> str:
-        """Retrieve the url from the topic information.
+        The first post is only downloaded once per topic, later calls are served from a snapshot
+        of the attributes of the post.
 
         Args:
-            topic_info: Key attributes of the topic used to build the URL.
+            url: The link to the topic.
 
         Returns:
-            The link to the topic.
+            The snapshot of the first post from the topic.
+
+        Raises:
+            DiscourseError: if pydiscourse raises an error or if the topic has been deleted.
 
         """
-        return f"{self._base_path}{_URL_PATH_PREFIX}{topic_info.slug}/{topic_info.id_}"
+        topic_info = self._url_to_topic_info(url=url)
+        if (snapshot := self._first_post_cache.get(topic_info.id_)) is None:
+            snapshot = self._download_topic_first_post(url=url, topic_info=topic_info)
+            self._first_post_cache.put(topic_info.id_, snapshot)
 
-    def _retrieve_topic_first_post(self, url: str) -> dict:
-        """Retrieve the first post from a topic based on the URL to the topic.
+        # Check for deleted topic
+        if snapshot.user_deleted:
+            raise DiscourseError(f"topic has been deleted, {url=}")
+
+        return snapshot
+
+    def _download_topic_first_post(
+        self, url: str, topic_info: _DiscourseTopicInfo
+    ) -> _FirstPostSnapshot:
+        """Download the first post from a topic and take a snapshot of the relevant attributes.
 
         Args:
             url: The link to the topic.
+            topic_info: The resolved information about the topic.
 
         Returns:
-            The first post from the topic.
+            The snapshot of the first post from the topic.
 
         Raises:
-            DiscourseError: if pydiscourse raises an error or if the topic has been deleted.
+            DiscourseError: if pydiscourse raises an error or the server returns unexpected data.
 
         """
-        topic_info = self._url_to_topic_info(url=url)
         try:
             topic = self._client.topic(
                 slug=topic_info.slug,
@@ -239,49 +205,41 @@ class Discourse:
                 f"Error retrieving topic, {url=!r}, {discourse_error=}"
             ) from discourse_error
 
-        try:
-            first_post = next(
-                filter(lambda post: post["post_number"] == 1, topic["post_stream"]["posts"])
-            )
-        except (TypeError, KeyError, StopIteration) as exc:
-            raise DiscourseError(
-                f"The documentation server returned unexpected data, {topic=!r}"
-            ) from exc
-
-        # Check for deleted topic
-        user_deleted = self._get_post_value(
-            post=first_post, key="user_deleted", expected_type=bool
-        )
-        if user_deleted:
-            raise DiscourseError(f"topic has been deleted, {url=}")
+        return self._first_post_snapshot(topic=topic)
 
-        return first_post
+    def list_category_topics(
+        self, category_id: int | None = None, max_pages: int | None = None
+    ) -> dict[int, CategoryTopic]:
+        """Walk the pages of the listing of a category and index its topics.
 
-    @staticmethod
-    def _get_post_value(post: dict, key: str, expected_type: type[KeyT]) -> KeyT:
-        """Get a value by key from the first post checking the value is the correct type.
+        The index is used to resolve topic URLs and check that topics exist without a request per
+        topic. Write permissions are not part of the listing and still require the topic. Topics
+        that are not in the index are resolved with a request as before.
 
         Args:
-            post: The first post to retrieve the value from.
-            key: The key to the value.
-            expected_type: The expected type of the value.
+            category_id: The category to list, defaults to the category the topics are put into.
+            max_pages: The maximum number of pages to list, all the pages are listed if None.
 
         Returns:
-            The value pointed to by the key.
+            The topics in the category by their identifier.
 
         Raises:
-            DiscourseError: if the key is missing or is not of the correct type.
-
+            DiscourseError: if the listing could not be retrieved.
         """
-        try:
-            value = post[key]
-            # It is ok for optimised code to ignore this
-            assert isinstance(value, expected_type)  # nosec
-            return value
-        except (TypeError, KeyError, AssertionError) as exc:
-            raise DiscourseError(
-                f"The documentation server returned unexpected data, {post=!r}"
-            ) from exc
+        category_id = self._category_id if category_id is None else category_id
+        index: dict[int, CategoryTopic] = {}
+        for page in itertools.count() if max_pages is None else range(max_pages):
+            try:
+                response = self._client.category_topics(category_id=category_id, page=page)
+            except pydiscourse.exceptions.DiscourseError as discourse_error:
+                raise DiscourseError(
+                    f"Error listing the topics of the category, {category_id=}, {discourse_error=}"
+                ) from discourse_error
+            if not self._index_category_page(response=response, index=index):
+                break
+
+        self._category_index = index
+        return index
 
     def absolute_url(self, url: str) -> str:
         """Get the URL including base path for a topic.
@@ -306,8 +264,7 @@ class Discourse:
             Whether the credentials have write permissions to the topic.
 
         """
-        first_post = self._retrieve_topic_first_post(url=url)
-        return self._get_post_value(post=first_post, key="can_edit", expected_type=bool)
+        return self._retrieve_topic_first_post(url=url).can_edit
 
     def check_topic_read_permission(self, url: str) -> bool:
         """Check whether the credentials have read permission on a topic.
@@ -326,44 +283,26 @@ class Discourse:
         self._retrieve_topic_first_post(url=url)
         return True
 
-    # Tested in integration tests
-    @staticmethod
-    def _get_requests_session() -> requests.Session:  # pragma: no cover
-        """Get a requests session.
-
-        Returns:
-            A session with retries enabled.
-        """
-        session = requests.Session()
-        adapter = HTTPAdapter(
-            max_retries=Retry(
-                total=5,
-                backoff_factor=1,
-                status_forcelist=[429, 500, 502, 503, 504],
-            )
-        )
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        return session
-
-    @staticmethod
-    def _parse_raw_content(content: str) -> str:
-        """Parse raw topic content returned from discourse /raw/{topic_id} API endpoint.
-
-        Args:
-            content: Raw content returned by discourse API.
-
-        Returns:
-            Original topic content.
-        """
-        # Discourse version 2.6.0, the content of a topc is returned as raw string.
-        if not content.endswith(_POST_SPLIT_LINE):
-            return content
-
-        # Discourse version 2.8.14, the posts are split by _POST_SPLIT_LINE.
-        posts = content.split(_POST_SPLIT_LINE)
-        post_metadata_removed = posts[0].splitlines(keepends=True)[2:]
-        return "".join(post_metadata_removed)
+    @property
+    def connection_stats(self) -> ConnectionStats:
+        """Statistics about the reuse of connections to the server."""
+        requests_count = 0
+        connections_count = 0
+        # The same adapter is mounted for several prefixes
+        for adapter in set(self._session.adapters.values()):
+            # Only HTTPAdapter keeps a pool of connections
+            if not isinstance(adapter, HTTPAdapter):  # pragma: no cover
+                continue
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                requests_count += pool.num_requests
+                connections_count += pool.num_connections
+        return ConnectionStats(requests=requests_count, connections=connections_count)
+
+    def close(self) -> None:
+        """Close all the connections to the server."""
+        self._session.close()
 
     def retrieve_topic(self, url: str) -> str:
         """Retrieve the topic content.
@@ -385,10 +324,23 @@ class Discourse:
             raise DiscourseError(f"Error retrieving the topic, could not read the topic, {url=!r}")
 
         topic_info = self._url_to_topic_info(url=url)
-        headers = {"Api-Key": self._api_key, "Api-Username": self._api_username}
-        response = self._get_requests_session().get(
-            f"{self._base_path}/raw/{topic_info.id_}", headers=headers, timeout=60
-        )
+        if (content := self._content_cache.get(topic_info.id_)) is not None:
+            return content
+
+        # The first post has already been retrieved for the read permission check
+        first_post = self._retrieve_topic_first_post(url=url)
+        cached, headers = self._conditional_headers(topic_id=topic_info.id_)
+        if cached is not None and cached.is_version(first_post.version, first_post.updated_at):
+            return self._cache_raw_content(topic_id=topic_info.id_, download=cached)
+
+        raw_url = f"{self._base_path}/raw/{topic_info.id_}"
+        response = self._session.get(raw_url, headers=headers, timeout=60)
+        if response.status_code == 304:
+            if cached is not None:
+                return self._cache_revalidated(topic_info.id_, cached, first_post)
+            # There is no cached content the response could refer to
+            response = self._session.get(raw_url, headers=self._auth_headers(), timeout=60)
+
         try:
             response.raise_for_status()
         except (
@@ -398,9 +350,55 @@ class Discourse:
             requests.exceptions.RequestException,
         ) as exc:
             raise DiscourseError(f"Error retrieving the topic, {url=!r}") from exc
+        if response.status_code == 304:
+            raise DiscourseError(
+                f"Error retrieving the topic, not modified without a cached download, {url=!r}"
+            )
 
-        content = response.content.decode("utf-8")
-        return self._parse_raw_content(content)
+        return self._cache_raw_content(
+            topic_id=topic_info.id_,
+            download=self._download_from_response(
+                headers=response.headers,
+                raw_content=response.content.decode("utf-8"),
+                first_post=first_post,
+            ),
+        )
+
+    def _retrieve_topic_or_error(self, url: str) -> str | DiscourseError:
+        """Retrieve the topic content, returning rather than raising any error.
+
+        Args:
+            url: The URL to the topic.
+
+        Returns:
+            The content of the first post in the topic or the error that occurred.
+        """
+        try:
+            return self.retrieve_topic(url=url)
+        except DiscourseError as exc:
+            return exc
+
+    def prefetch(self, urls: typing.Iterable[str]) -> list[str | DiscourseError]:
+        """Retrieve the content and first post of many topics concurrently.
+
+        The results are cached so that later calls for the same topics, such as retrieve_topic
+        and check_topic_write_permission, do not interact with the server again.
+
+        Args:
+            urls: The URLs to the topics.
+
+        Returns:
+            The content of the first post in each topic or the DiscourseError raised while
+            retrieving it, in the same order as the URLs.
+        """
+        urls = list(urls)
+        if not urls:
+            return []
+
+        with ThreadPoolExecutor(
+            max_workers=min(self._pool_maxsize, len(urls)), thread_name_prefix="discourse"
+        ) as executor:
+            return list(executor.map(self._retrieve_topic_or_error, urls))
 
     def create_topic(self, title: str, content: str) -> str:
         """Create a new topic.
@@ -430,7 +428,10 @@ class Discourse:
 
         topic_slug = self._get_post_value(post=post, key="topic_slug", expected_type=str)
         topic_id = self._get_post_value(post=post, key="topic_id", expected_type=int)
-        return self._topic_info_to_absolute_url(_DiscourseTopicInfo(slug=topic_slug, id_=topic_id))
+        topic_info = _DiscourseTopicInfo(slug=topic_slug, id_=topic_id)
+        url = self._topic_info_to_absolute_url(topic_info)
+        self._topic_info_cache.put(url, topic_info)
+        return url
 
     def delete_topic(self, url: str) -> str:
         """Delete a topic.
@@ -453,6 +454,8 @@ class Discourse:
             raise DiscourseError(
                 f"Error deleting the topic, {url=!r}, {discourse_error=}"
             ) from discourse_error
+        finally:
+            self.invalidate_topic(url=url)
         return self._topic_info_to_absolute_url(topic_info)
 
     def update_topic(
@@ -475,19 +478,30 @@ class Discourse:
         """
         first_post = self._retrieve_topic_first_post(url=url)
 
-        post_id = self._get_post_value(post=first_post, key="id", expected_type=int)
         try:
-            self._client.update_post(post_id=post_id, content=content, edit_reason=edit_reason)
+            self._client.update_post(
+                post_id=first_post.id_, content=content, edit_reason=edit_reason
+            )
         except pydiscourse.exceptions.DiscourseError as discourse_error:
             raise DiscourseError(
                 f"Error updating the topic, {url=!r}, {content=!r}, {discourse_error=}"
             ) from discourse_error
+        finally:
+            # The version and content of the post have changed
+            self._forget_topic_content(topic_id=self._url_to_topic_info(url=url).id_)
 
         return self.absolute_url(url=url)
 
 
-def create_discourse(
-    hostname: str, category_id: str, api_username: str, api_key: str
+# All the arguments are required to configure the client
+def create_discourse(  # pylint: disable=too-many-arguments
+    hostname: str,
+    category_id: str,
+    api_username: str,
+    api_key: str,
+    *,
+    cache_dir: Path | None = None,
+    metrics: MetricsCollector | None = None,
 ) -> Discourse:
     """Create discourse client.
 
@@ -496,51 +510,21 @@ def create_discourse(
         category_id: The category to use for topics.
         api_username: The discourse API username to use for interactions with the server.
         api_key: The discourse API key to use for interactions with the server.
+        cache_dir: The directory to persist topic downloads in between runs.
+        metrics: The collector to record the requests to the server in.
 
     Returns:
         A discourse client that is connected to the server.
 
-    Raises:
-    InputError: if the api_username and api_key arguments are not strings or empty, if the
-        protocol has been included in the hostname, the hostname is not a string or the category_id
-        is not an integer or a string that can be converted to an integer.
-
     """
-    if not hostname:
-        raise InputError(
-            f"Invalid 'discourse_host' input, it must be non-empty, got {hostname=!r}"
-        )
-    hostname = hostname.lower()
-    if hostname.startswith(("http://", "https://")):
-        raise InputError(
-            "Invalid 'discourse_host' input, it should not include the protocol, "
-            f"got {hostname=!r}"
-        )
-
-    if not category_id:
-        raise InputError(
-            f"Invalid 'discourse_category_id' input, it must be non-empty, got {category_id=!r}"
-        )
-    if not category_id.isdigit():
-        raise InputError(
-            "Invalid 'discourse_category_id' input, it must be an integer or a string that can be "
-            f"converted to an integer, got {category_id=!r}"
-        )
-    category_id_int = int(category_id)
-
-    if not api_username:
-        raise InputError(
-            f"Invalid 'discourse_api_username' input, it must be non-empty, got {api_username=!r}"
-        )
-
-    if not api_key:
-        raise InputError(
-            f"Invalid 'discourse_api_key' input, it must be non-empty, got {api_key=!r}"
-        )
-
+    inputs = _validate_inputs(
+        hostname=hostname, category_id=category_id, api_username=api_username, api_key=api_key
+    )
     return Discourse(
-        base_path=f"https://{hostname}",
+        base_path=inputs.base_path,
         api_username=api_username,
         api_key=api_key,
-        category_id=category_id_int,
+        category_id=inputs.category_id,
+        cache_dir=cache_dir,
+        metrics=metrics,
     )
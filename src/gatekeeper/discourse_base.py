@@ -0,0 +1,594 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""State and logic of the discourse client that does not interact with the server."""
+
+import typing
+from pathlib import Path
+from urllib import parse
+
+from .cache import LRUCache
+from .discourse_cache import ETAG_HEADER, LAST_MODIFIED_HEADER, CachedDownload, TopicDownloadCache
+from .exceptions import DiscourseError, InputError
+from .metrics import MetricsCollector
+from .rate_limit import RateLimiter, RateLimiterStats
+
+_URL_PATH_PREFIX = "/t/"
+_POST_SPLIT_LINE = "\n\n-------------------------\n\n"
+_DEFAULT_TOPIC_CACHE_SIZE = 1024
+
+
+class _DiscourseTopicInfo(typing.NamedTuple):
+    """Information about a discourse topic.
+
+    Attrs:
+        slug: The URL slug generated by Discourse based on the title of the topic.
+        id_: The identifier generated by Discourse of the topic.
+
+    """
+
+    slug: str
+    id_: int
+
+
+class CategoryTopic(typing.NamedTuple):
+    """A topic in the listing of a category.
+
+    Attrs:
+        id_: The identifier generated by Discourse of the topic.
+        slug: The URL slug generated by Discourse based on the title of the topic.
+        closed: Whether the topic has been closed.
+        archived: Whether the topic has been archived.
+        deleted: Whether the topic has been deleted.
+        bumped_at: When the topic was last changed.
+    """
+
+    id_: int
+    slug: str
+    closed: bool
+    archived: bool
+    deleted: bool
+    bumped_at: str | None
+
+
+class _FirstPostSnapshot(typing.NamedTuple):
+    """The attributes of the first post of a topic used by the client.
+
+    Attrs:
+        id_: The identifier generated by Discourse of the post.
+        can_edit: Whether the credentials have write permission on the post.
+        user_deleted: Whether the post has been deleted.
+        version: The number of revisions of the post.
+        updated_at: When the post was last updated.
+    """
+
+    id_: int
+    can_edit: bool
+    user_deleted: bool
+    version: int
+    updated_at: str
+
+
+class _ValidationResultValid(typing.NamedTuple):
+    """The validation result is valid.
+
+    Attrs:
+        value: The validation result, always True.
+        message: The validation message, always None.
+        final_url: The topic link after any redirects have been resolved.
+
+    """
+
+    final_url: str
+    value: typing.Literal[True] = True
+    message: None = None
+
+
+class _ValidationResultInvalid(typing.NamedTuple):
+    """The validation result is invalid.
+
+    Attrs:
+        value: The validation result, always False.
+        message: The validation message as the reason the validation failed.
+        final_url: Always set to None since the url is not valid.
+
+    """
+
+    message: str
+    value: typing.Literal[False] = False
+    final_url: None = None
+
+
+_ValidationResult = _ValidationResultValid | _ValidationResultInvalid
+KeyT = typing.TypeVar("KeyT")
+
+
+class _DiscourseBase:  # pylint: disable=R0902
+    """State and logic of the discourse client that does not interact with the server.
+
+    Attrs:
+        rate_limit_stats: Statistics about the time spent waiting on the rate limiter.
+    """
+
+    _tags = ("docs",)
+
+    # All the arguments are required to configure the client
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        base_path: str,
+        api_username: str,
+        api_key: str,
+        category_id: int,
+        *,
+        topic_cache_size: int,
+        rate_limiter: RateLimiter | None,
+        cache_dir: Path | None,
+        metrics: MetricsCollector | None,
+    ) -> None:
+        """Construct.
+
+        Args:
+            base_path: The HTTP protocol and hostname for discourse (e.g., https://discourse).
+            api_username: The username to use for API requests.
+            api_key: The API key for requests.
+            category_id: The category identifier to put the topics into.
+            topic_cache_size: The maximum number of topic URLs to keep the resolution for and the
+                maximum number of topics to keep the first post snapshot and content for.
+            rate_limiter: The rate limiter for all requests to the server, a new one that only
+                limits requests once the server rate limits them is created if not provided.
+            cache_dir: The directory to persist topic downloads in between runs.
+            metrics: The collector to record the requests to the server in.
+
+        """
+        self._category_id = category_id
+        self._base_path = base_path
+        self._api_username = api_username
+        self._api_key = api_key
+        self._topic_info_cache: LRUCache[str, _DiscourseTopicInfo] = LRUCache(
+            maxsize=topic_cache_size
+        )
+        self._first_post_cache: LRUCache[int, _FirstPostSnapshot] = LRUCache(
+            maxsize=topic_cache_size
+        )
+        self._content_cache: LRUCache[int, str] = LRUCache(maxsize=topic_cache_size)
+        self._rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self._download_cache = TopicDownloadCache(maxsize=topic_cache_size, cache_dir=cache_dir)
+        self._category_index: dict[int, CategoryTopic] = {}
+        self._metrics = metrics
+
+    @property
+    def rate_limit_stats(self) -> RateLimiterStats:
+        """Statistics about the time spent waiting on the rate limiter."""
+        return self._rate_limiter.stats
+
+    @staticmethod
+    def _topic_url_path_components_valid(
+        path_components: typing.Sequence[str], url: str
+    ) -> str | None:
+        """Check whether the path components of a topic URL are valid.
+
+        Args:
+            path_components: The elements of the URL path after splitting on /.
+            url: The original URL, used for messages describing what is wrong.
+
+        Returns:
+            Whether the message for what is wrong with the path components or None if no issues
+            were found.
+        """
+        if not len(path_components) == 3:
+            return (
+                "Unexpected number of path components, "
+                f"expected: 3, got: {len(path_components)}, {url=}"
+            )
+
+        if not path_components[0] == "t":
+            return (
+                "Unexpected first path component, "
+                f"expected: {'t'!r}, got: {path_components[0]!r}, {url=}"
+            )
+
+        if not path_components[1]:
+            return f"Empty second path component topic slug, got: {path_components[1]!r}, {url=}"
+
+        if not path_components[2].isnumeric():
+            return (
+                "unexpected third path component topic id, "
+                "expected: a string that can be converted to an integer, "
+                f"got: {path_components[2]!r}, {url=}"
+            )
+
+        return None
+
+    def _url_prefix_invalid(self, url: str) -> _ValidationResultInvalid | None:
+        """Check whether a url starts with the base path or is relative to it.
+
+        Args:
+            url: The URL to check.
+
+        Returns:
+            The invalid result if the URL does not point to the server, otherwise None.
+        """
+        if not url.startswith((self._base_path, _URL_PATH_PREFIX)):
+            return _ValidationResultInvalid(
+                "The base path is different to the expected base path, "
+                f"expected: {self._base_path}, {url=}"
+            )
+        return None
+
+    def _full_url(self, url: str) -> str:
+        """Add the base path to a URL relative to the server.
+
+        Args:
+            url: The relative or absolute URL.
+
+        Returns:
+            The URL including the base path.
+        """
+        return url if url.startswith(self._base_path) else f"{self._base_path}{url}"
+
+    def _final_url_valid(self, url: str) -> _ValidationResult:
+        """Check whether a topic url after any redirects have been resolved is valid.
+
+        Args:
+            url: The URL after any redirects have been resolved.
+
+        Returns:
+            Whether the URL is a valid topic URL.
+        """
+        parsed_url = parse.urlparse(url=url)
+        # Remove trailing / and ignore first element which is always empty
+        path_components = parsed_url.path.rstrip("/").split("/")[1:]
+
+        if (
+            components_message := self._topic_url_path_components_valid(
+                path_components=path_components, url=url
+            )
+        ) is not None:
+            return _ValidationResultInvalid(components_message)
+
+        return _ValidationResultValid(final_url=url)
+
+    def _cache_topic_info(self, url: str, result: _ValidationResult) -> _DiscourseTopicInfo:
+        """Convert the validation result of a url to the topic information and cache it.
+
+        Args:
+            url: The URL to the topic that was validated.
+            result: The outcome of validating the URL.
+
+        Returns:
+            The topic information.
+
+        Raises:
+            DiscourseError: if the url is not valid.
+        """
+        if not result.value:
+            raise DiscourseError(result.message)
+
+        # If the result is valid, the final_url is guaranteed to be a string
+        final_url = typing.cast(str, result.final_url)
+
+        path_components = parse.urlparse(url=final_url).path.split("/")
+        topic_info = _DiscourseTopicInfo(slug=path_components[-2], id_=int(path_components[-1]))
+        self._topic_info_cache.put(url, topic_info)
+        self._topic_info_cache.put(final_url, topic_info)
+        return topic_info
+
+    def _known_topic_info(self, url: str) -> _DiscourseTopicInfo | None:
+        """Get the topic information of a URL without interacting with the server.
+
+        The topic information is known if the URL has already been resolved or if it points to a
+        topic in the last listing of the category.
+
+        Args:
+            url: The URL to the topic.
+
+        Returns:
+            The topic information or None if it is not known.
+        """
+        if (topic_info := self._topic_info_cache.get(url)) is not None:
+            return topic_info
+        if not self._category_index or self._url_prefix_invalid(url=url) is not None:
+            return None
+
+        path_components = parse.urlparse(url=self._full_url(url=url)).path.split("/")[1:]
+        if self._topic_url_path_components_valid(path_components=path_components, url=url):
+            return None
+        topic = self._category_index.get(int(path_components[2]))
+        if topic is None or topic.deleted:
+            return None
+
+        topic_info = _DiscourseTopicInfo(slug=topic.slug, id_=topic.id_)
+        self._topic_info_cache.put(url, topic_info)
+        return topic_info
+
+    def _index_category_page(self, response: dict | None, index: dict[int, CategoryTopic]) -> bool:
+        """Add the topics on a page of the category listing to an index.
+
+        Args:
+            response: The page of the listing returned by the server.
+            index: The index of the topics by their identifier.
+
+        Returns:
+            Whether there are more pages in the listing.
+
+        Raises:
+            DiscourseError: if the server returned unexpected data.
+        """
+        try:
+            topic_list = (response or {})["topic_list"]
+            topics = topic_list["topics"]
+            assert isinstance(topics, list)  # nosec
+        except (TypeError, KeyError, AssertionError) as exc:
+            raise DiscourseError(
+                f"The documentation server returned unexpected data, {response=!r}"
+            ) from exc
+
+        for topic in topics:
+            topic_id = self._get_post_value(post=topic, key="id", expected_type=int)
+            index[topic_id] = CategoryTopic(
+                id_=topic_id,
+                slug=self._get_post_value(post=topic, key="slug", expected_type=str),
+                closed=bool(topic.get("closed")),
+                archived=bool(topic.get("archived")),
+                deleted=topic.get("deleted_at") is not None,
+                bumped_at=topic.get("bumped_at"),
+            )
+        return bool(topics) and topic_list.get("more_topics_url") is not None
+
+    def invalidate_topic(self, url: str) -> None:
+        """Remove any cached information about a topic.
+
+        Args:
+            url: The URL to the topic.
+        """
+        topic_info = self._topic_info_cache.pop(url)
+        if topic_info is None:
+            return
+        self._topic_info_cache.discard_where(lambda _, value: value.id_ == topic_info.id_)
+        self._category_index.pop(topic_info.id_, None)
+        self._forget_topic_content(topic_id=topic_info.id_)
+
+    def _forget_topic_content(self, topic_id: int) -> None:
+        """Remove the cached first post and content of a topic after it has been changed.
+
+        Args:
+            topic_id: The identifier of the topic.
+        """
+        self._first_post_cache.pop(topic_id)
+        self._content_cache.pop(topic_id)
+        self._download_cache.discard(topic_id=topic_id)
+
+    def _auth_headers(self) -> dict[str, str]:
+        """Get the headers to authenticate a request.
+
+        Returns:
+            The headers with the credentials.
+        """
+        return {"Api-Key": self._api_key, "Api-Username": self._api_username}
+
+    def _conditional_headers(self, topic_id: int) -> tuple[CachedDownload | None, dict[str, str]]:
+        """Get the headers to download the raw content of a topic only if it has changed.
+
+        Args:
+            topic_id: The identifier of the topic.
+
+        Returns:
+            The last download of the topic and the headers for the request.
+        """
+        headers = self._auth_headers()
+        if (cached := self._download_cache.get(topic_id)) is not None:
+            headers.update(cached.conditional_headers)
+        return cached, headers
+
+    @staticmethod
+    def _download_from_response(
+        headers: typing.Mapping[str, str], raw_content: str, first_post: _FirstPostSnapshot
+    ) -> CachedDownload:
+        """Create the record of a download of the raw content of a topic.
+
+        Args:
+            headers: The headers of the response.
+            raw_content: The raw content of the topic.
+            first_post: The snapshot of the first post the content belongs to.
+
+        Returns:
+            The record of the download.
+        """
+        return CachedDownload(
+            etag=headers.get(ETAG_HEADER),
+            last_modified=headers.get(LAST_MODIFIED_HEADER),
+            content=raw_content,
+            version=first_post.version,
+            updated_at=first_post.updated_at,
+        )
+
+    def _cache_raw_content(self, topic_id: int, download: CachedDownload) -> str:
+        """Record the raw content of a topic.
+
+        Args:
+            topic_id: The identifier of the topic.
+            download: The download of the raw content.
+
+        Returns:
+            The content of the first post in the topic.
+        """
+        self._download_cache.put(topic_id, download)
+        content = self._parse_raw_content(download.content)
+        self._content_cache.put(topic_id, content)
+        return content
+
+    def _cache_revalidated(
+        self, topic_id: int, download: CachedDownload, first_post: _FirstPostSnapshot
+    ) -> str:
+        """Record that the last download of a topic is still the content of its first post.
+
+        Args:
+            topic_id: The identifier of the topic.
+            download: The last download of the raw content.
+            first_post: The snapshot of the first post the content belongs to.
+
+        Returns:
+            The content of the first post in the topic.
+        """
+        return self._cache_raw_content(
+            topic_id=topic_id,
+            download=download._replace(
+                version=first_post.version, updated_at=first_post.updated_at
+            ),
+        )
+
+    def _topic_info_to_absolute_url(self, topic_info: _DiscourseTopicInfo) -> str:
+        """Retrieve the url from the topic information.
+
+        Args:
+            topic_info: Key attributes of the topic used to build the URL.
+
+        Returns:
+            The link to the topic.
+
+        """
+        return f"{self._base_path}{_URL_PATH_PREFIX}{topic_info.slug}/{topic_info.id_}"
+
+    def _first_post_snapshot(self, topic: dict) -> _FirstPostSnapshot:
+        """Take a snapshot of the relevant attributes of the first post of a topic.
+
+        Args:
+            topic: The topic returned by the server.
+
+        Returns:
+            The snapshot of the first post from the topic.
+
+        Raises:
+            DiscourseError: if the server returned unexpected data.
+
+        """
+        try:
+            first_post = next(
+                filter(lambda post: post["post_number"] == 1, topic["post_stream"]["posts"])
+            )
+        except (TypeError, KeyError, StopIteration) as exc:
+            raise DiscourseError(
+                f"The documentation server returned unexpected data, {topic=!r}"
+            ) from exc
+
+        return _FirstPostSnapshot(
+            id_=self._get_post_value(post=first_post, key="id", expected_type=int),
+            can_edit=self._get_post_value(post=first_post, key="can_edit", expected_type=bool),
+            user_deleted=self._get_post_value(
+                post=first_post, key="user_deleted", expected_type=bool
+            ),
+            version=self._get_post_value(post=first_post, key="version", expected_type=int),
+            updated_at=self._get_post_value(post=first_post, key="updated_at", expected_type=str),
+        )
+
+    @staticmethod
+    def _get_post_value(post: dict, key: str, expected_type: type[KeyT]) -> KeyT:
+        """Get a value by key from the first post checking the value is the correct type.
+
+        Args:
+            post: The first post to retrieve the value from.
+            key: The key to the value.
+            expected_type: The expected type of the value.
+
+        Returns:
+            The value pointed to by the key.
+
+        Raises:
+            DiscourseError: if the key is missing or is not of the correct type.
+
+        """
+        try:
+            value = post[key]
+            # It is ok for optimised code to ignore this
+            assert isinstance(value, expected_type)  # nosec
+            return value
+        except (TypeError, KeyError, AssertionError) as exc:
+            raise DiscourseError(
+                f"The documentation server returned unexpected data, {post=!r}"
+            ) from exc
+
+    @staticmethod
+    def _parse_raw_content(content: str) -> str:
+        """Parse raw topic content returned from discourse /raw/{topic_id} API endpoint.
+
+        Args:
+            content: Raw content returned by discourse API.
+
+        Returns:
+            Original topic content.
+        """
+        # Discourse version 2.6.0, the content of a topc is returned as raw string.
+        if not content.endswith(_POST_SPLIT_LINE):
+            return content
+
+        # Discourse version 2.8.14, the posts are split by _POST_SPLIT_LINE.
+        posts = content.split(_POST_SPLIT_LINE)
+        post_metadata_removed = posts[0].splitlines(keepends=True)[2:]
+        return "".join(post_metadata_removed)
+
+
+class _DiscourseInputs(typing.NamedTuple):
+    """The validated inputs to create a discourse client.
+
+    Attrs:
+        base_path: The HTTP protocol and hostname for discourse.
+        category_id: The category identifier to put the topics into.
+    """
+
+    base_path: str
+    category_id: int
+
+
+def _validate_inputs(
+    hostname: str, category_id: str, api_username: str, api_key: str
+) -> _DiscourseInputs:
+    """Validate the inputs to create a discourse client.
+
+    Args:
+        hostname: The Discourse server hostname.
+        category_id: The category to use for topics.
+        api_username: The discourse API username to use for interactions with the server.
+        api_key: The discourse API key to use for interactions with the server.
+
+    Returns:
+        The base path and category identifier for the client.
+
+    Raises:
+    InputError: if the api_username and api_key arguments are not strings or empty, if the
+        protocol has been included in the hostname, the hostname is not a string or the category_id
+        is not an integer or a string that can be converted to an integer.
+
+    """
+    if not hostname:
+        raise InputError(
+            f"Invalid 'discourse_host' input, it must be non-empty, got {hostname=!r}"
+        )
+    hostname = hostname.lower()
+    if hostname.startswith(("http://", "https://")):
+        raise InputError(
+            "Invalid 'discourse_host' input, it should not include the protocol, "
+            f"got {hostname=!r}"
+        )
+
+    if not category_id:
+        raise InputError(
+            f"Invalid 'discourse_category_id' input, it must be non-empty, got {category_id=!r}"
+        )
+    if not category_id.isdigit():
+        raise InputError(
+            "Invalid 'discourse_category_id' input, it must be an integer or a string that can be "
+            f"converted to an integer, got {category_id=!r}"
+        )
+    category_id_int = int(category_id)
+
+    if not api_username:
+        raise InputError(
+            f"Invalid 'discourse_api_username' input, it must be non-empty, got {api_username=!r}"
+        )
+
+    if not api_key:
+        raise InputError(
+            f"Invalid 'discourse_api_key' input, it must be non-empty, got {api_key=!r}"
+        )
+
+    return _DiscourseInputs(base_path=f"https://{hostname}", category_id=category_id_int)
@@ -0,0 +1,317 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Cache of topic downloads with the validators for conditional requests."""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import typing
+from pathlib import Path
+
+from .cache import LRUCache, write_atomic
+
+_TOPICS_DIR = "topics"
+_OBJECTS_DIR = "objects"
+_OBJECT_SUFFIX = ".gz"
+_DEFAULT_MAX_SIZE_BYTES = 100 * 1024 * 1024
+_IF_NONE_MATCH_HEADER = "If-None-Match"
+_IF_MODIFIED_SINCE_HEADER = "If-Modified-Since"
+ETAG_HEADER = "ETag"
+LAST_MODIFIED_HEADER = "Last-Modified"
+
+
+class CachedDownload(typing.NamedTuple):
+    """A downloaded topic with the validators the server returned for it.
+
+    Attrs:
+        etag: The value of the ETag header of the download.
+        last_modified: The value of the Last-Modified header of the download.
+        content: The downloaded content.
+        version: The version of the first post the content belongs to.
+        updated_at: When the first post the content belongs to was last updated.
+        conditional_headers: The headers to only download the topic again if it has changed.
+    """
+
+    etag: str | None
+    last_modified: str | None
+    content: str
+    version: int | None = None
+    updated_at: str | None = None
+
+    @property
+    def conditional_headers(self) -> dict[str, str]:
+        """The headers to only download the topic again if it has changed."""
+        headers = {}
+        if self.etag is not None:
+            headers[_IF_NONE_MATCH_HEADER] = self.etag
+        if self.last_modified is not None:
+            headers[_IF_MODIFIED_SINCE_HEADER] = self.last_modified
+        return headers
+
+    def is_version(self, version: int, updated_at: str) -> bool:
+        """Check whether the content belongs to a version of the first post.
+
+        Args:
+            version: The version of the first post.
+            updated_at: When the first post was last updated.
+
+        Returns:
+            Whether the content is the content of that version of the first post.
+        """
+        return self.version == version and self.updated_at == updated_at
+
+
+class _ObjectStore:
+    """Compressed content addressed storage with a cap on the total size.
+
+    The least recently used objects are removed when the total size exceeds the cap.
+    """
+
+    def __init__(self, directory: Path, max_size_bytes: int) -> None:
+        """Construct.
+
+        Args:
+            directory: The directory to store the objects in.
+            max_size_bytes: The maximum total size of the stored objects.
+        """
+        self._directory = directory
+        self._max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        self._size_bytes: int | None = None
+
+    def _path(self, digest: str) -> Path:
+        """Get the path of the file an object is stored in.
+
+        Args:
+            digest: The digest of the content of the object.
+
+        Returns:
+            The path to the file.
+        """
+        return self._directory / digest[:2] / f"{digest}{_OBJECT_SUFFIX}"
+
+    def _object_files(self) -> list[os.DirEntry[str]]:
+        """Get all the files objects are stored in.
+
+        Returns:
+            The files of all the stored objects.
+        """
+        if not self._directory.is_dir():
+            return []
+        files: list[os.DirEntry[str]] = []
+        for prefix in os.scandir(self._directory):
+            if not prefix.is_dir():
+                continue
+            files.extend(
+                entry
+                for entry in os.scandir(prefix.path)
+                if entry.is_file() and entry.name.endswith(_OBJECT_SUFFIX)
+            )
+        return files
+
+    def get(self, digest: str) -> str | None:
+        """Get the content of an object and mark it as recently used.
+
+        Args:
+            digest: The digest of the content of the object.
+
+        Returns:
+            The content or None if the object is not stored.
+        """
+        path = self._path(digest)
+        try:
+            content = gzip.decompress(path.read_bytes()).decode("utf-8")
+            os.utime(path)
+        except (OSError, EOFError, UnicodeDecodeError):
+            return None
+        if hashlib.sha256(content.encode("utf-8")).hexdigest() != digest:
+            logging.warning("ignoring corrupted cached object %s", path)
+            return None
+        return content
+
+    def _object_stats(self) -> list[tuple[str, os.stat_result]]:
+        """Get the status of all the files objects are stored in.
+
+        Returns:
+            The path and status of the files of all the stored objects.
+        """
+        stats = []
+        for entry in self._object_files():
+            try:
+                stats.append((entry.path, entry.stat()))
+            except FileNotFoundError:
+                # Removed by another process since the directory was listed
+                continue
+        return stats
+
+    def put(self, content: str) -> str:
+        """Store content, removing the least recently used objects beyond the size cap.
+
+        Args:
+            content: The content to store.
+
+        Returns:
+            The digest of the content, OSError is propagated if the content cannot be written.
+        """
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        with self._lock:
+            try:
+                os.utime(path)
+                return digest
+            except FileNotFoundError:
+                pass
+
+            compressed = gzip.compress(data, mtime=0)
+            write_atomic(path=path, data=compressed)
+            if self._size_bytes is not None:
+                self._size_bytes += len(compressed)
+            if self._size_bytes is None or self._size_bytes > self._max_size_bytes:
+                self._evict()
+        return digest
+
+    def _evict(self) -> None:
+        """Remove the least recently used objects until the total size is within the cap.
+
+        The total size is counted again by the next store if the objects cannot be removed.
+        """
+        try:
+            stats = sorted(self._object_stats(), key=lambda path_stat: path_stat[1].st_mtime_ns)
+            self._size_bytes = sum(stat.st_size for _, stat in stats)
+            for path, stat in stats:
+                if self._size_bytes <= self._max_size_bytes:
+                    break
+                Path(path).unlink(missing_ok=True)
+                self._size_bytes -= stat.st_size
+        except OSError as exc:
+            logging.warning("could not evict cached objects from %s, %s", self._directory, exc)
+            self._size_bytes = None
+
+
+class TopicDownloadCache:
+    """Keep the last download of each topic with its validators and first post version.
+
+    The downloads are kept in memory and, if a cache directory is configured, persisted so that
+    they can be reused by later runs. The persisted content is compressed and stored by digest so
+    that topics with the same content share storage.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        cache_dir: Path | None = None,
+        max_size_bytes: int = _DEFAULT_MAX_SIZE_BYTES,
+    ) -> None:
+        """Construct.
+
+        Args:
+            maxsize: The maximum number of downloads to keep in memory.
+            cache_dir: The directory to persist the downloads in.
+            max_size_bytes: The maximum total size of the persisted content.
+        """
+        self._entries: LRUCache[int, CachedDownload] = LRUCache(maxsize=maxsize)
+        self._topics_dir = cache_dir / _TOPICS_DIR if cache_dir is not None else None
+        self._objects = (
+            _ObjectStore(directory=cache_dir / _OBJECTS_DIR, max_size_bytes=max_size_bytes)
+            if cache_dir is not None
+            else None
+        )
+
+    def _path(self, topic_id: int) -> Path | None:
+        """Get the path of the file the record of a download is persisted in.
+
+        Args:
+            topic_id: The identifier of the topic.
+
+        Returns:
+            The path to the file or None if downloads are not persisted.
+        """
+        if self._topics_dir is None:
+            return None
+        return self._topics_dir / f"{topic_id}.json"
+
+    def _load(self, topic_id: int) -> CachedDownload | None:
+        """Load a persisted download.
+
+        Args:
+            topic_id: The identifier of the topic.
+
+        Returns:
+            The download or None if the topic has no persisted download.
+        """
+        if self._objects is None or (path := self._path(topic_id)) is None or not path.is_file():
+            return None
+
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+            digest = record.pop("digest")
+            content = self._objects.get(digest=digest)
+            if content is None:
+                return None
+            return CachedDownload(content=content, **record)
+        except (OSError, ValueError, TypeError, KeyError):
+            logging.warning("ignoring invalid cached download of topic %s, %s", topic_id, path)
+            return None
+
+    def get(self, topic_id: int) -> CachedDownload | None:
+        """Get the last download of a topic.
+
+        Args:
+            topic_id: The identifier of the topic.
+
+        Returns:
+            The last download or None if the topic has not been downloaded.
+        """
+        if (download := self._entries.get(topic_id)) is not None:
+            return download
+        if (download := self._load(topic_id=topic_id)) is not None:
+            self._entries.put(topic_id, download)
+        return download
+
+    def put(self, topic_id: int, download: CachedDownload) -> None:
+        """Record the last download of a topic.
+
+        Downloads without validators or version are not kept since they can't be used to avoid
+        downloading the topic again. The download is only kept in memory if it cannot be
+        persisted.
+
+        Args:
+            topic_id: The identifier of the topic.
+            download: The download to record.
+        """
+        if download.etag is None and download.last_modified is None and download.version is None:
+            self.discard(topic_id=topic_id)
+            return
+        if self._entries.get(topic_id) == download:
+            return
+
+        self._entries.put(topic_id, download)
+        if self._objects is None or (path := self._path(topic_id)) is None:
+            return
+
+        record = download._asdict()
+        try:
+            record["digest"] = self._objects.put(content=record.pop("content"))
+            write_atomic(path=path, data=json.dumps(record).encode("utf-8"))
+        except OSError as exc:
+            logging.warning("could not persist download of topic %s, %s", topic_id, exc)
+
+    def discard(self, topic_id: int) -> None:
+        """Remove the last download of a topic.
+
+        Args:
+            topic_id: The identifier of the topic.
+        """
+        self._entries.pop(topic_id)
+        if (path := self._path(topic_id)) is None:
+            return
+
+        try:
+            path.unlink(missing_ok=True)
+        except OSError as exc:
+            logging.warning("could not remove cached download of topic %s, %s", topic_id, exc)
@@ -0,0 +1,349 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Requests session handling for interactions with the discourse server."""
+
+import time
+import typing
+
+import pydiscourse
+import pydiscourse.exceptions
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
+
+from .metrics import DISCOURSE_SERVICE, MetricsCollector, body_size, urllib3_retries
+from .rate_limit import ERROR_CODE_HEADER, RETRY_AFTER_HEADER, RateLimiter, retry_after_seconds
+
+_JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+_RATE_LIMIT_RETRY_COUNT = 4
+_RATE_LIMIT_DEFAULT_WAIT = 10
+
+
+class ConnectionStats(typing.NamedTuple):
+    """Statistics about the connections used to interact with the discourse server.
+
+    Attrs:
+        requests: The number of requests sent to the server.
+        connections: The number of connections opened to the server.
+        reused: The number of requests that were sent over an already open connection.
+    """
+
+    requests: int
+    connections: int
+
+    @property
+    def reused(self) -> int:
+        """The number of requests that were sent over an already open connection."""
+        return max(self.requests - self.connections, 0)
+
+
+def rate_limit_wait_seconds(
+    headers: typing.Mapping[str, str], body: typing.Callable[[], typing.Any]
+) -> float:
+    """Get the number of seconds the server requested to wait for after a rate limit.
+
+    Args:
+        headers: The headers of the rate limited response.
+        body: Decodes the JSON body of the rate limited response.
+
+    Returns:
+        The number of seconds to wait before retrying.
+    """
+    if (wait_seconds := retry_after_seconds(headers)) is not None:
+        return wait_seconds
+    try:
+        return float(body()["extras"]["wait_seconds"])
+    except (ValueError, TypeError, KeyError):
+        return _RATE_LIMIT_DEFAULT_WAIT
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """Adapter that sends every request through a shared rate limiter.
+
+    Rate limited responses are retried once the rate limiter allows it. Responses that ask to retry
+    later, such as rate limited responses, slow down the rate limiter. Every request sent is
+    recorded in the metrics if a collector is provided.
+    """
+
+    def __init__(
+        self, rate_limiter: RateLimiter, metrics: MetricsCollector | None, **kwargs: typing.Any
+    ) -> None:
+        """Construct.
+
+        Args:
+            rate_limiter: The rate limiter shared by all requests to the server.
+            metrics: The collector to record the requests in.
+            kwargs: Keyword arguments for HTTPAdapter.
+        """
+        super().__init__(**kwargs)
+        self._rate_limiter = rate_limiter
+        self._metrics = metrics
+
+    # The arguments match the signature of the requests method being overridden
+    def send(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: typing.Any = None,
+        verify: bool | str = True,
+        cert: typing.Any = None,
+        proxies: typing.Mapping[str, str] | None = None,
+    ) -> requests.Response:
+        """Send a request once the rate limiter allows it.
+
+        Args:
+            request: The request to send.
+            stream: Whether to stream the request content.
+            timeout: How long to wait for the server to send data.
+            verify: Whether to verify the TLS certificate of the server or the CA bundle to use.
+            cert: The client certificate to use.
+            proxies: The proxies to use for the request.
+
+        Returns:
+            The response from the server, which is still rate limited if the retries have been
+            exhausted.
+        """
+        send_kwargs = {
+            "stream": stream,
+            "timeout": timeout,
+            "verify": verify,
+            "cert": cert,
+            "proxies": proxies,
+        }
+        for retries_left in reversed(range(_RATE_LIMIT_RETRY_COUNT)):
+            self._rate_limiter.acquire()
+            response = self._send_recorded(
+                request=request,
+                retried=retries_left < _RATE_LIMIT_RETRY_COUNT - 1,
+                send_kwargs=send_kwargs,
+            )
+            if response.status_code == 429 or RETRY_AFTER_HEADER in response.headers:
+                self._rate_limiter.throttle(
+                    wait_seconds=rate_limit_wait_seconds(response.headers, response.json),
+                    error_code=response.headers.get(ERROR_CODE_HEADER),
+                )
+            else:
+                self._rate_limiter.record_success()
+            if response.status_code != 429:
+                return response
+            if retries_left:
+                response.close()
+
+        return response
+
+    def _send_recorded(
+        self, request: requests.PreparedRequest, retried: bool, send_kwargs: dict[str, typing.Any]
+    ) -> requests.Response:
+        """Send a request and record it in the metrics.
+
+        Args:
+            request: The request to send.
+            retried: Whether the request is a retry after a rate limited response.
+            send_kwargs: Keyword arguments for HTTPAdapter.send.
+
+        Returns:
+            The response from the server.
+        """
+        if self._metrics is None:
+            return super().send(request, **send_kwargs)
+
+        start = time.monotonic()
+        status = None
+        bytes_received = 0
+        retries = int(retried)
+        try:
+            response = super().send(request, **send_kwargs)
+            status = response.status_code
+            bytes_received = 0 if send_kwargs["stream"] else len(response.content)
+            retries += urllib3_retries(response)
+            return response
+        finally:
+            self._metrics.record(
+                service=DISCOURSE_SERVICE,
+                method=request.method or "",
+                url=request.url or "",
+                status=status,
+                elapsed_seconds=time.monotonic() - start,
+                bytes_sent=body_size(request.body),
+                bytes_received=bytes_received,
+                retries=retries,
+            )
+
+
+def create_requests_session(
+    pool_maxsize: int,
+    keep_alive: bool,
+    rate_limiter: RateLimiter,
+    metrics: MetricsCollector | None = None,
+) -> requests.Session:
+    """Create the requests session shared by all interactions with the discourse server.
+
+    Args:
+        pool_maxsize: The maximum number of connections to keep open to the server.
+        keep_alive: Whether connections should be kept open between requests.
+        rate_limiter: The rate limiter shared by all requests to the server.
+        metrics: The collector to record the requests in.
+
+    Returns:
+        A pooled and rate limited session with retries enabled.
+    """
+    session = requests.Session()
+    # Rate limited responses are retried by the adapter so that the rate limiter is aware of them
+    adapter = RateLimitedAdapter(
+        rate_limiter=rate_limiter,
+        metrics=metrics,
+        pool_connections=1,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(
+            total=5,
+            backoff_factor=1,
+            status_forcelist=[500, 502, 503, 504],
+            respect_retry_after_header=False,
+            # The last response is returned so that server errors are raised as DiscourseError
+            raise_on_status=False,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+class SessionDiscourseClient(pydiscourse.DiscourseClient):
+    """A pydiscourse client that sends all requests through a shared requests session.
+
+    pydiscourse uses module level requests functions which open a new connection for every
+    request, this sends the requests using the session of the Discourse client instead.
+    """
+
+    def __init__(
+        self, session: requests.Session, host: str, api_username: str, api_key: str, timeout: int
+    ) -> None:
+        """Construct.
+
+        Args:
+            session: The session to send requests with.
+            host: The HTTP protocol and hostname for discourse (e.g., https://discourse).
+            api_username: The username to use for API requests.
+            api_key: The API key for requests.
+            timeout: The timeout for requests in seconds.
+        """
+        super().__init__(host=host, api_username=api_username, api_key=api_key, timeout=timeout)
+        self._session = session
+
+    # The arguments match the signature of the pydiscourse method being overridden
+    def _request(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        verb: str,
+        path: str,
+        params: dict | None = None,
+        files: dict | None = None,
+        data: dict | None = None,
+        json: dict | None = None,
+        override_request_kwargs: dict | None = None,
+    ) -> dict | None:
+        """Execute a request against the discourse API and handle the response.
+
+        Mirrors the behaviour of the pydiscourse implementation.
+
+        Args:
+            verb: The HTTP verb for the request.
+            path: The path on the discourse API.
+            params: The query parameters for the request.
+            files: The files to include in the request.
+            data: The form data to include in the request.
+            json: The JSON body to include in the request.
+            override_request_kwargs: Keyword arguments that override the request defaults.
+
+        Returns:
+            The decoded response body or None if the response is empty.
+        """
+        request_kwargs = {
+            "allow_redirects": False,
+            "params": params,
+            "files": files,
+            "data": data,
+            "json": json,
+            "headers": {
+                "Accept": _JSON_CONTENT_TYPE,
+                "Api-Key": self.api_key,
+                "Api-Username": self.api_username,
+            },
+            "timeout": self.timeout,
+        }
+        request_kwargs.update(override_request_kwargs or {})
+
+        response = self._session.request(verb, self.host + path, **request_kwargs)
+        return self._decode(response=response)
+
+    def _decode(self, response: requests.Response) -> dict | None:
+        """Check the response for errors and decode the body.
+
+        Args:
+            response: The response from the server.
+
+        Returns:
+            The decoded response body or None if the response is empty.
+
+        Raises:
+            DiscourseRateLimitedError: if the rate limit retries have been exhausted.
+            DiscourseClientError: if the server reports a problem with the request.
+            DiscourseServerError: if the server failed to process the request.
+            DiscourseError: if the response could not be processed.
+        """
+        if response.status_code == 429:
+            raise pydiscourse.exceptions.DiscourseRateLimitedError(
+                "Number of rate limit retries exceeded", response=response
+            )
+
+        if not response.ok:
+            message = self._error_message(response)
+            if 400 <= response.status_code < 500:
+                raise pydiscourse.exceptions.DiscourseClientError(message, response=response)
+            raise pydiscourse.exceptions.DiscourseServerError(message, response=response)
+
+        if response.status_code == 302:
+            raise pydiscourse.exceptions.DiscourseError(
+                "Unexpected Redirect, invalid api key or host?", response=response
+            )
+
+        if response.headers.get("content-type") != _JSON_CONTENT_TYPE:
+            # Some calls return empty html documents
+            if not response.content.strip():
+                return None
+            raise pydiscourse.exceptions.DiscourseError(
+                f"Invalid Response, expecting {_JSON_CONTENT_TYPE!r} got "
+                f"{response.headers.get('content-type')!r}",
+                response=response,
+            )
+
+        try:
+            decoded = response.json()
+        except ValueError as exc:
+            raise pydiscourse.exceptions.DiscourseError(
+                "failed to decode response", response=response
+            ) from exc
+
+        if decoded.get("errors"):
+            raise pydiscourse.exceptions.DiscourseError(
+                decoded.get("message") or ",".join(decoded["errors"]), response=response
+            )
+
+        return decoded
+
+    @staticmethod
+    def _error_message(response: requests.Response) -> str:
+        """Get the message describing why a request failed.
+
+        Args:
+            response: The failed response.
+
+        Returns:
+            The errors reported by the server or the reason for the failure.
+        """
+        try:
+            return ",".join(response.json()["errors"])
+        except (ValueError, TypeError, KeyError):
+            return response.reason or f"{response.status_code}: {response.text}"
@@ -2,7 +2,10 @@
 # See LICENSE file for licensing details.
 
 """Class for reading the docs directory."""
+
+import codecs
 import itertools
+import os
 import typing
 from functools import partial
 from itertools import count
@@ -10,23 +13,113 @@ from pathlib import Path
 
 from . import types_
 from .constants import DOC_FILE_EXTENSION, DOCUMENTATION_FOLDER_NAME
+from .content_store import LocalContentStore
+from .scan_manifest import ManifestEntry, ScanManifest
+
+_HEADING_START = "# "
+# The title is usually on one of the first lines, files are only read until it is found
+_TITLE_CHUNK_SIZE = 4 * 1024
+
+
+class _DirectoryEntry(typing.NamedTuple):
+    """A directory or documentation file in the docs directory.
+
+    Attrs:
+        path: The path to the directory or file.
+        is_dir: Whether the path is a directory.
+        size: The size of the file in bytes, 0 for directories.
+        mtime_ns: The modification time of the file, 0 for directories.
+        inode: The inode number of the file, 0 for directories.
+        blob_sha: The SHA of the git blob of the file or None if it is not known.
+    """
+
+    path: Path
+    is_dir: bool
+    size: int
+    mtime_ns: int = 0
+    inode: int = 0
+    blob_sha: str | None = None
+
+
+def _is_doc_file(path: Path) -> bool:
+    """Check whether a path is a documentation file.
+
+    Args:
+        path: The path to check.
+
+    Returns:
+        Whether the path has the documentation file extension and is not the index file.
+    """
+    return path.suffix.lower() == DOC_FILE_EXTENSION and path.stem.lower() != "index"
+
 
+def _file_entry(
+    path: Path, stat: os.stat_result | None, blob_sha: str | None = None
+) -> _DirectoryEntry:
+    """Create the entry for a documentation file.
+
+    Args:
+        path: The path to the file.
+        stat: The status of the file or None if it is not a regular file.
+        blob_sha: The SHA of the git blob of the file.
+
+    Returns:
+        The entry for the file.
+    """
+    return _DirectoryEntry(
+        path=path,
+        is_dir=False,
+        size=stat.st_size if stat is not None else 0,
+        mtime_ns=stat.st_mtime_ns if stat is not None else 0,
+        inode=stat.st_ino if stat is not None else 0,
+        blob_sha=blob_sha,
+    )
+
+
+def _walk(
+    directory: Path, blob_shas: typing.Mapping[Path, str | None]
+) -> typing.Iterator[_DirectoryEntry]:
+    """Get the directories and documentation files in a directory and its sub-directories.
+
+    The type and status of each entry is retrieved while listing the directory. Like rglob,
+    symbolic links to directories are included but not descended into.
+
+    Args:
+        directory: The directory to walk.
+        blob_shas: The SHA of the git blob of the files that match the git index.
 
-def _get_directories_files(docs_path: Path) -> list[Path]:
+    Yields:
+        The directories and documentation files, not in any particular order.
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            path = Path(entry.path)
+            if entry.is_dir():
+                yield _DirectoryEntry(path=path, is_dir=True, size=0)
+                if not entry.is_symlink():
+                    yield from _walk(path, blob_shas=blob_shas)
+            elif _is_doc_file(path):
+                yield _file_entry(
+                    path=path,
+                    stat=entry.stat() if entry.is_file() else None,
+                    blob_sha=blob_shas.get(path),
+                )
+
+
+def _get_directories_files(
+    docs_path: Path, blob_shas: typing.Mapping[Path, str | None] | None
+) -> list[_DirectoryEntry]:
     """Get all the directories and documentation files recursively in the docs directory.
 
     Args:
         docs_path: The path to the docs directory containing all the documentation.
+        blob_shas: The SHA of the git blob of the files that match the git index.
 
     Returns:
-        List with all the directories and documentation files in the docs directory.
+        List with all the directories and documentation files in the docs directory sorted by
+        their path.
     """
-    return sorted(
-        path
-        for path in docs_path.rglob("*")
-        if path.is_dir()
-        or (path.suffix.lower() == DOC_FILE_EXTENSION and not path.stem.lower() == "index")
-    )
+    return sorted(_walk(docs_path, blob_shas=blob_shas or {}), key=lambda entry: entry.path)
 
 
 def _calculate_level(path_relative_to_docs: Path) -> types_.Level:
@@ -76,11 +169,94 @@ def calculate_table_path(path_relative_to_docs: Path) -> types_.TablePath:
     )
 
 
-def _calculate_navlink_title(path: Path) -> types_.NavlinkTitle:
+def _iter_lines(file: typing.BinaryIO, head: bytearray) -> typing.Iterator[str]:
+    """Get the lines of a file, reading it in small chunks as the lines are consumed.
+
+    Args:
+        file: The file opened in binary mode.
+        head: Extended with the bytes read from the file.
+
+    Yields:
+        The lines of the file without the line endings, split the same way as str.splitlines.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    while chunk := file.read(_TITLE_CHUNK_SIZE):
+        head.extend(chunk)
+        # The last line might continue in the next chunk
+        *lines, pending = (pending + decoder.decode(chunk)).splitlines(keepends=True) or [""]
+        yield from (line.splitlines()[0] for line in lines)
+    yield from (pending + decoder.decode(b"", final=True)).splitlines()
+
+
+def _read_title(entry: _DirectoryEntry, local_contents: LocalContentStore | None) -> str:
+    """Read the file until the first heading.
+
+    Args:
+        entry: The file to read the title of, must not be empty.
+        local_contents: Records the bytes read from the file.
+
+    Returns:
+        The first heading or the first line if there is no heading.
+    """
+    head = bytearray()
+    first_line: str | None = None
+    title: str | None = None
+    with entry.path.open("rb") as file:
+        for line in _iter_lines(file=file, head=head):
+            first_line = line if first_line is None else first_line
+            if line.startswith(_HEADING_START):
+                title = line.removeprefix(_HEADING_START)
+                break
+        if local_contents is not None:
+            local_contents.add(path=entry.path, data=bytes(head), stat=os.fstat(file.fileno()))
+
+    return typing.cast(str, title if title is not None else first_line)
+
+
+def _scan_file(
+    entry: _DirectoryEntry,
+    local_contents: LocalContentStore | None,
+    manifest: ScanManifest | None,
+) -> ManifestEntry:
+    """Get what is known about a file, only reading it if it changed since the last scan.
+
+    Args:
+        entry: The file to scan, must not be empty.
+        local_contents: Records the bytes read from the files.
+        manifest: The files recorded by previous scans.
+
+    Returns:
+        What is known about the file.
+    """
+    recorded = (
+        manifest.get(entry.path, mtime_ns=entry.mtime_ns, size=entry.size, inode=entry.inode)
+        if manifest is not None
+        else None
+    )
+    if recorded is not None:
+        return recorded
+
+    scanned = ManifestEntry(
+        mtime_ns=entry.mtime_ns,
+        size=entry.size,
+        inode=entry.inode,
+        title=_read_title(entry=entry, local_contents=local_contents),
+        content_digest=None,
+    )
+    if manifest is not None:
+        manifest.put(entry.path, scanned)
+    return scanned
+
+
+def _calculate_navlink_title(
+    entry: _DirectoryEntry, scanned: ManifestEntry | None
+) -> types_.NavlinkTitle:
     """Calculate the navlink title of a path.
 
     Args:
-        path: The path to calculate the navlink title for.
+        entry: The directory or file to calculate the navlink title for.
+        scanned: What is known about the file if it is a file with content.
 
     Returns:
         The first heading, first line if there is no heading or the file/ directory name excluding
@@ -88,48 +264,62 @@ def _calculate_navlink_title(path: Path) -> types_.NavlinkTitle:
         directory.
     """
     # Check for file with content
-    if path.is_file() and path.stat().st_size:
-        content_lines = path.read_text(encoding="utf-8").splitlines()
-        heading_start = "# "
-        try:
-            return next(
-                line.removeprefix(heading_start)
-                for line in content_lines
-                if line.startswith(heading_start)
-            )
-        except StopIteration:
-            return content_lines[0]
-
-    return path.stem.replace("-", " ").replace("_", " ").title()
-
-
-def _get_path_info(path: Path, alphabetical_rank: int, docs_path: Path) -> types_.PathInfo:
+    if scanned is not None:
+        return scanned.title
+
+    return entry.path.stem.replace("-", " ").replace("_", " ").title()
+
+
+def _get_path_info(
+    entry: _DirectoryEntry,
+    alphabetical_rank: int,
+    docs_path: Path,
+    local_contents: LocalContentStore | None,
+    manifest: ScanManifest | None,
+) -> types_.PathInfo:
     """Get the information for a path.
 
     Args:
-        path: The path to calculate the information for.
+        entry: The directory or file to calculate the information for.
         alphabetical_rank: The rank to assign to the path info.
         docs_path: The path to the docs directory.
+        local_contents: Records the bytes read from the files.
+        manifest: The files recorded by previous scans.
 
     Returns:
         The information for the path.
     """
-    path_relative_to_docs = path.relative_to(docs_path)
+    path_relative_to_docs = entry.path.relative_to(docs_path)
+    scanned = (
+        _scan_file(entry=entry, local_contents=local_contents, manifest=manifest)
+        if not entry.is_dir and entry.size
+        else None
+    )
     return types_.PathInfo(
-        local_path=path,
+        local_path=entry.path,
         level=_calculate_level(path_relative_to_docs=path_relative_to_docs),
         table_path=calculate_table_path(path_relative_to_docs=path_relative_to_docs),
-        navlink_title=_calculate_navlink_title(path=path),
+        navlink_title=_calculate_navlink_title(entry=entry, scanned=scanned),
         alphabetical_rank=alphabetical_rank,
         navlink_hidden=False,
+        is_dir=entry.is_dir,
+        size=entry.size,
+        content_digest=scanned.content_digest if scanned is not None else None,
+        blob_sha=entry.blob_sha,
     )
 
 
-def read(docs_path: Path) -> typing.Iterator[types_.PathInfo]:
+def read(
+    docs_path: Path,
+    local_contents: LocalContentStore | None = None,
+    manifest: ScanManifest | None = None,
+    blob_shas: typing.Mapping[Path, str | None] | None = None,
+) -> typing.Iterator[types_.PathInfo]:
     """Read the docs directory and return information about each directory and documentation file.
 
     Algorithm:
-        1.  Get a list of all sub directories and .md files in the docs folder.
+        1.  Get a list of all sub directories and .md files in the docs folder, including whether
+            each is a directory and the size of the files, in a single pass.
         2.  For each directory/ file:
             2.1. Calculate the level based on the number of sub-directories to the docs directory
                 including the docs directory.
@@ -137,17 +327,27 @@ def read(docs_path: Path) -> typing.Iterator[types_.PathInfo]:
                 / with -, removing the extension and converting to lower case.
             2.3. Calculate the navlink title based on the first heading, first line if there is no
                 heading or the file/ directory name excluding the extension with - replaced by
-                space and titlelized if the file is empty or it is a directory.
+                space and titlelized if the file is empty or it is a directory. Files are only
+                read up to the first heading and not at all if the manifest has the title of the
+                unchanged file.
 
     Args:
         docs_path: The path to the docs directory containing all the documentation.
+        local_contents: Records the bytes read from the files so that they are not read again
+            when the content of the files is needed.
+        manifest: The files recorded by previous scans, updated with the files scanned.
+        blob_shas: The SHA of the git blob of the files in the docs directory that match the git
+            index. The files are still listed by walking the docs directory so that files git
+            ignores and empty directories are included, files without a SHA are read as before.
 
     Returns:
         Information about each directory and documentation file in the docs folder.
     """
     return map(
-        partial(_get_path_info, docs_path=docs_path),
-        _get_directories_files(docs_path=docs_path),
+        partial(
+            _get_path_info, docs_path=docs_path, local_contents=local_contents, manifest=manifest
+        ),
+        _get_directories_files(docs_path=docs_path, blob_shas=blob_shas),
         count(),
     )
 
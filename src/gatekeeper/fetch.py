@@ -0,0 +1,106 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Fetch only the refs that are needed and have changed on the remote."""
+
+import logging
+import typing
+
+from git.repo import Repo
+
+_HEADS_PREFIX = "refs/heads/"
+_TAGS_PREFIX = "refs/tags/"
+_REMOTES_PREFIX = "refs/remotes/"
+
+
+class FetchCoordinator:
+    """Coordinate the fetches from a remote so that each ref is only fetched when it is stale.
+
+    The refs on the remote are listed once and compared with the local refs, only the refs that
+    are missing or different locally are fetched, all of them with a single fetch. The listing is
+    kept until the remote is changed by this process, e.g., by a push, so that later checks are
+    served from the refs that have already been fetched.
+    """
+
+    def __init__(self, repository: Repo, remote: str) -> None:
+        """Construct.
+
+        Args:
+            repository: The local git repository.
+            remote: The name of the remote to fetch from.
+        """
+        self._repository = repository
+        self._remote = remote
+        self._remote_refs: dict[str, str] | None = None
+
+    def _list_remote_refs(self) -> dict[str, str]:
+        """Get the branches and tags on the remote, listing them if they aren't known.
+
+        Returns:
+            The SHA of the branches and tags on the remote by ref name.
+        """
+        if self._remote_refs is not None:
+            return self._remote_refs
+
+        if self._remote not in (remote.name for remote in self._repository.remotes):
+            self._remote_refs = {}
+            return self._remote_refs
+
+        output = typing.cast(
+            str, self._repository.git.ls_remote("--heads", "--tags", self._remote)
+        )
+        self._remote_refs = {}
+        for line in output.splitlines():
+            sha, _, ref = line.partition("\t")
+            # Peeled annotated tags are compared using the tag object instead
+            if ref and not ref.endswith("^{}"):
+                self._remote_refs[ref] = sha
+        return self._remote_refs
+
+    def _list_local_refs(self) -> dict[str, str]:
+        """Get the refs in the local repository.
+
+        Returns:
+            The SHA of the local refs by ref name.
+        """
+        output = self._repository.git.for_each_ref("--format=%(objectname) %(refname)")
+        return dict(
+            (ref, sha) for sha, _, ref in (line.partition(" ") for line in output.splitlines())
+        )
+
+    def fetch(self, branches: typing.Iterable[str] = (), tags: typing.Iterable[str] = ()) -> None:
+        """Fetch the branches and tags that are missing or stale locally.
+
+        Branches are fetched into the remote tracking branches and tags replace any local tag with
+        the same name. Names that don't exist on the remote are ignored.
+
+        Args:
+            branches: The names of the branches to fetch.
+            tags: The names of the tags to fetch.
+        """
+        candidates = [
+            (f"{_HEADS_PREFIX}{branch}", f"{_REMOTES_PREFIX}{self._remote}/{branch}")
+            for branch in branches
+        ] + [(f"{_TAGS_PREFIX}{tag}", f"{_TAGS_PREFIX}{tag}") for tag in tags]
+        if not candidates:
+            return
+
+        remote_refs = self._list_remote_refs()
+        local_refs = self._list_local_refs()
+        refspecs = sorted(
+            {
+                f"+{remote_ref}:{local_ref}"
+                for remote_ref, local_ref in candidates
+                if remote_ref in remote_refs
+                and local_refs.get(local_ref) != remote_refs[remote_ref]
+            }
+        )
+        if not refspecs:
+            return
+
+        logging.info("fetching %s from %s", refspecs, self._remote)
+        self._repository.git.fetch(self._remote, *refspecs)
+
+    def invalidate(self) -> None:
+        """Forget the refs on the remote after it has been changed."""
+        self._remote_refs = None
@@ -0,0 +1,101 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""List the files of the repository and their blob SHAs using the git index and trees."""
+
+import logging
+
+from git import GitCommandError
+from git.repo import Repo
+
+_SEPARATOR = "\0"
+_MERGED_STAGE = "0"
+_BLOB_TYPE = "blob"
+_DELETED_STATUS = "D"
+# Both of these statuses are followed by the original path
+_MOVED_STATUSES = frozenset("RC")
+# The statuses of paths with merge conflicts, the file is in the working tree even if one side of
+# the merge deleted it
+_UNMERGED_STATUSES = frozenset(("DD", "AU", "UD", "UA", "DU", "AA", "UU"))
+
+
+def _records(output: str) -> list[str]:
+    """Split the output of a git command that uses NUL separated records.
+
+    Args:
+        output: The output of the command.
+
+    Returns:
+        The records.
+    """
+    return [record for record in output.split(_SEPARATOR) if record]
+
+
+def worktree_blob_shas(repository: Repo, directory: str) -> dict[str, str | None] | None:
+    """Get the files in a directory of the working tree with the SHA of their blob.
+
+    The files and their SHAs are taken from the index, files that differ from the index or are
+    untracked are listed by git status and have no SHA since it would require reading them.
+
+    Args:
+        repository: The local git repository.
+        directory: The directory relative to the root of the repository.
+
+    Returns:
+        The SHAs by path relative to the root of the repository, None for files whose content
+        doesn't match a blob in the index. None if git could not list the files.
+    """
+    try:
+        listed_files = repository.git.ls_files("-s", "-z", "--", directory)
+        status = repository.git.status(
+            "--porcelain", "-z", "--untracked-files=all", "--", directory
+        )
+    except GitCommandError as exc:
+        logging.warning("listing the files with git failed, %s", exc)
+        return None
+
+    blob_shas: dict[str, str | None] = {}
+    for record in _records(listed_files):
+        info, path = record.split("\t", 1)
+        _, blob_sha, stage = info.split()
+        # Files with merge conflicts have an entry per side of the merge
+        blob_shas[path] = blob_sha if stage == _MERGED_STAGE else None
+
+    records = iter(_records(status))
+    for record in records:
+        codes, path = record[:2], record[3:]
+        if any(code in _MOVED_STATUSES for code in codes):
+            next(records, None)
+        if codes not in _UNMERGED_STATUSES and _DELETED_STATUS in codes:
+            blob_shas.pop(path, None)
+        else:
+            blob_shas[path] = None
+    return blob_shas
+
+
+def tree_blob_shas(repository: Repo, commit_sha: str, directory: str) -> dict[str, str] | None:
+    """Get the files in a directory of a commit with the SHA of their blob.
+
+    Only the trees of the commit are read, which are available even in a blobless partial clone.
+
+    Args:
+        repository: The local git repository.
+        commit_sha: The SHA of the commit.
+        directory: The directory relative to the root of the repository.
+
+    Returns:
+        The SHAs by path relative to the root of the repository or None if the commit is not in
+        the local repository.
+    """
+    try:
+        tree = repository.git.ls_tree("-r", "-z", commit_sha, "--", directory)
+    except GitCommandError:
+        return None
+
+    blob_shas: dict[str, str] = {}
+    for record in _records(tree):
+        info, path = record.split("\t", 1)
+        _, object_type, blob_sha = info.split()
+        if object_type == _BLOB_TYPE:
+            blob_shas[path] = blob_sha
+    return blob_shas
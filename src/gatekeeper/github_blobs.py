@@ -0,0 +1,114 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Create the blobs of a commit on GitHub using the GitHub API."""
+
+import hashlib
+import logging
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from github.GitTree import GitTree
+from github.Repository import Repository
+
+from . import commit as commit_module
+
+_MAX_WORKERS = 8
+_BLOB_TYPE = "blob"
+_TREE_TYPE = "tree"
+_TRUNCATED_KEY = "truncated"
+
+
+def git_blob_sha(content: str) -> str:
+    """Calculate the SHA git identifies the content of a file by, as git hash-object does.
+
+    Args:
+        content: The content of the file.
+
+    Returns:
+        The SHA of the blob.
+    """
+    data = content.encode("utf-8")
+    return hashlib.sha1(  # nosec
+        f"blob {len(data)}\0".encode("utf-8") + data, usedforsecurity=False
+    ).hexdigest()
+
+
+def existing_blob_shas(
+    github_repository: Repository, root_tree: GitTree, paths: Iterable[Path]
+) -> set[str]:
+    """Get the SHA of the blobs on GitHub in the top level directories that contain paths.
+
+    Only the directories with the paths are listed instead of the whole repository. GitHub
+    truncates the listing of very large directories, the blobs that are not listed are created
+    again which GitHub accepts.
+
+    Args:
+        github_repository: The repository on GitHub.
+        root_tree: The root tree of the commit to compare with, listed without recursion.
+        paths: The paths to the files relative to the repository.
+
+    Returns:
+        The SHA of the blobs known to be on GitHub.
+    """
+    directories = {path.parts[0] for path in paths if len(path.parts) > 1}
+    shas = {element.sha for element in root_tree.tree if element.type == _BLOB_TYPE}
+    for element in root_tree.tree:
+        if element.type != _TREE_TYPE or element.path not in directories:
+            continue
+        subtree = github_repository.get_git_tree(sha=element.sha, recursive=True)
+        if subtree.raw_data.get(_TRUNCATED_KEY):
+            logging.info("the listing of %s on GitHub is truncated", element.path)
+        shas.update(
+            subtree_element.sha
+            for subtree_element in subtree.tree
+            if subtree_element.type == _BLOB_TYPE
+        )
+    return shas
+
+
+def create_blobs(
+    github_repository: Repository,
+    commit_files: Iterable[commit_module.FileAction],
+    existing_shas: set[str],
+) -> dict[Path, str]:
+    """Create the blobs for the added and modified files on GitHub.
+
+    Blobs GitHub already has are reused, the others are created concurrently with a bounded
+    number of requests in flight.
+
+    Args:
+        github_repository: The repository on GitHub.
+        commit_files: The files that were added, modified or deleted in a commit.
+        existing_shas: The SHA of the blobs known to be on GitHub.
+
+    Returns:
+        The SHA of the blob on GitHub by path for the added and modified files.
+    """
+    contents = {
+        commit_file.path: commit_file.content
+        for commit_file in commit_files
+        if isinstance(commit_file, commit_module.FileAddedOrModified)
+    }
+    shas = {path: git_blob_sha(content) for path, content in contents.items()}
+    missing = {sha: contents[path] for path, sha in shas.items() if sha not in existing_shas}
+    if not missing:
+        return shas
+
+    logging.info("creating %s blobs on GitHub, reusing %s", len(missing), len(shas) - len(missing))
+    with ThreadPoolExecutor(
+        max_workers=min(_MAX_WORKERS, len(missing)), thread_name_prefix="github"
+    ) as executor:
+        created_shas = dict(
+            zip(
+                missing,
+                executor.map(
+                    lambda content: github_repository.create_git_blob(
+                        content=content, encoding="utf-8"
+                    ).sha,
+                    missing.values(),
+                ),
+            )
+        )
+    return {path: created_shas.get(sha, sha) for path, sha in shas.items()}
@@ -0,0 +1,144 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Cache of GitHub API responses with the validators for conditional requests."""
+
+import hashlib
+import json
+import logging
+import typing
+from pathlib import Path
+
+from .cache import LRUCache, write_atomic
+
+_DEFAULT_MAXSIZE = 1024
+_RESPONSES_DIR = "github"
+_IF_NONE_MATCH_HEADER = "If-None-Match"
+_KEY_HEADERS = ("Accept", "Authorization")
+# Describe the transfer of the original response rather than the cached body
+_UNCACHED_HEADERS = frozenset(
+    ("content-encoding", "content-length", "transfer-encoding", "connection", "date")
+)
+ETAG_HEADER = "ETag"
+
+
+class CachedResponse(typing.NamedTuple):
+    """A response from the GitHub API with the ETag it was returned with.
+
+    Attrs:
+        etag: The value of the ETag header of the response.
+        headers: The headers of the response that describe the body.
+        body: The body of the response.
+        conditional_headers: The headers to only retrieve the response again if it has changed.
+    """
+
+    etag: str
+    headers: dict[str, str]
+    body: str
+
+    @property
+    def conditional_headers(self) -> dict[str, str]:
+        """The headers to only retrieve the response again if it has changed."""
+        return {_IF_NONE_MATCH_HEADER: self.etag}
+
+
+def cached_headers(headers: typing.Mapping[str, str]) -> dict[str, str]:
+    """Get the headers of a response that should be kept with its body.
+
+    Args:
+        headers: The headers of the response.
+
+    Returns:
+        The headers without those describing how the response was transferred.
+    """
+    return {
+        name: value for name, value in headers.items() if name.lower() not in _UNCACHED_HEADERS
+    }
+
+
+class GithubResponseCache:
+    """Keep the responses to GET requests to the GitHub API that have an ETag.
+
+    The responses are kept in memory and, if a cache directory is configured, persisted so that
+    later runs can send conditional requests which GitHub does not count against the rate limit
+    when the response hasn't changed.
+    """
+
+    def __init__(self, cache_dir: Path | None = None, maxsize: int = _DEFAULT_MAXSIZE) -> None:
+        """Construct.
+
+        Args:
+            cache_dir: The directory to persist the responses in.
+            maxsize: The maximum number of responses to keep in memory.
+        """
+        self._entries: LRUCache[str, CachedResponse] = LRUCache(maxsize=maxsize)
+        self._responses_dir = cache_dir / _RESPONSES_DIR if cache_dir is not None else None
+
+    @staticmethod
+    def key(url: str, headers: typing.Mapping[str, str]) -> str:
+        """Get the key a response is cached under.
+
+        The credentials are part of the key since the response depends on who makes the request,
+        they are hashed so that they are not persisted.
+
+        Args:
+            url: The URL of the request.
+            headers: The headers of the request.
+
+        Returns:
+            The key for the response.
+        """
+        headers = {name.lower(): value for name, value in headers.items()}
+        identity = [url, *(headers.get(name.lower(), "") for name in _KEY_HEADERS)]
+        return hashlib.sha256("\n".join(identity).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path | None:
+        """Get the path of the file a response is persisted in.
+
+        Args:
+            key: The key of the response.
+
+        Returns:
+            The path to the file or None if responses are not persisted.
+        """
+        if self._responses_dir is None:
+            return None
+        return self._responses_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> CachedResponse | None:
+        """Get a cached response.
+
+        Args:
+            key: The key of the response.
+
+        Returns:
+            The response or None if there is no cached response for the key.
+        """
+        if (response := self._entries.get(key)) is not None:
+            return response
+        if (path := self._path(key)) is None or not path.is_file():
+            return None
+
+        try:
+            response = CachedResponse(**json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            logging.warning("ignoring invalid cached GitHub response %s", path)
+            return None
+        self._entries.put(key, response)
+        return response
+
+    def put(self, key: str, response: CachedResponse) -> None:
+        """Cache a response, it is only kept in memory if it cannot be persisted.
+
+        Args:
+            key: The key of the response.
+            response: The response to cache.
+        """
+        self._entries.put(key, response)
+        if (path := self._path(key)) is None:
+            return
+
+        try:
+            write_atomic(path=path, data=json.dumps(response._asdict()).encode("utf-8"))
+        except OSError as exc:
+            logging.warning("could not persist GitHub response %s, %s", path, exc)
@@ -0,0 +1,276 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Connection handling for interactions with the GitHub API."""
+
+import functools
+import threading
+import time
+import typing
+
+import requests
+from github import Github
+from github.Requester import Requester, RequestsResponse
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .github_cache import ETAG_HEADER, CachedResponse, GithubResponseCache, cached_headers
+from .metrics import GITHUB_SERVICE, MetricsCollector, body_size, urllib3_retries
+
+_RATE_LIMIT_HEADER_PREFIX = "x-ratelimit-"
+_RATE_LIMIT_REMAINING_HEADER = "X-RateLimit-Remaining"
+RATE_LIMIT_CONSUMED_COUNTER = "github_rate_limit_consumed"
+RATE_LIMIT_REMAINING_COUNTER = "github_rate_limit_remaining"
+NOT_MODIFIED_COUNTER = "github_not_modified"
+_CONNECTION_CLASSES_LOCK = threading.Lock()
+
+
+def _from_cache(response: requests.Response, cached: CachedResponse) -> requests.Response:
+    """Turn a not modified response into the cached response it confirmed.
+
+    The rate limit headers of the not modified response are kept since they are current.
+
+    Args:
+        response: The not modified response.
+        cached: The cached response.
+
+    Returns:
+        The response with the status, headers and body of the cached response.
+    """
+    headers: CaseInsensitiveDict[str] = CaseInsensitiveDict(cached.headers)
+    headers.update(
+        (name, value)
+        for name, value in response.headers.items()
+        if name.lower().startswith(_RATE_LIMIT_HEADER_PREFIX)
+    )
+    response.status_code = 200
+    response.headers = headers
+    response.encoding = "utf-8"
+    # pylint: disable=protected-access
+    response._content = cached.body.encode("utf-8")  # type: ignore[attr-defined]
+    return response
+
+
+class _PreparedRequest(typing.NamedTuple):
+    """A request prepared by PyGithub that has not been sent yet.
+
+    Attrs:
+        verb: The HTTP verb for the request.
+        url: The path of the request.
+        body: The body of the request.
+        headers: The headers of the request.
+    """
+
+    verb: str
+    url: str
+    body: typing.Any
+    headers: dict[str, str]
+
+
+class GithubConnection:  # pylint: disable=R0902
+    """Mimic the http.client connection used by PyGithub to record the requests it sends.
+
+    The requests are sent through the session of the client the connection belongs to so that
+    the underlying connections are reused. PyGithub keeps a single connection per client which
+    is used by several threads, the prepared request is therefore kept per thread.
+    """
+
+    # The arguments match the signature of the PyGithub connection classes, which are only passed
+    # the host and port positionally
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        host: str,
+        port: int | None = None,
+        *,
+        session: requests.Session,
+        strict: bool = False,
+        timeout: int | None = None,
+        retry: typing.Any = None,
+        pool_size: int | None = None,
+        protocol: str = "https",
+        metrics: MetricsCollector | None = None,
+        cache: GithubResponseCache | None = None,
+        **kwargs: typing.Any,
+    ) -> None:
+        """Construct.
+
+        Args:
+            host: The hostname of the GitHub API.
+            port: The port of the GitHub API.
+            session: The session to send the requests with.
+            strict: Unused, kept for compatibility with http.client.
+            timeout: The timeout for requests in seconds.
+            retry: Unused, the retries are configured on the session.
+            pool_size: Unused, the connection pool is configured on the session.
+            protocol: The protocol to use for requests.
+            metrics: The collector to record the requests in.
+            cache: The cache for conditional GET requests.
+            kwargs: Additional configuration, only verify is used.
+        """
+        del strict, retry, pool_size
+        self.host = host
+        self.protocol = protocol
+        self.port = port if port else (443 if protocol == "https" else 80)
+        self.timeout = timeout
+        self.verify = kwargs.get("verify", True)
+        self._metrics = metrics
+        self._cache = cache
+        self._session = session
+        self._prepared = threading.local()
+
+    def request(self, verb: str, url: str, body: typing.Any, headers: dict[str, str]) -> None:
+        """Prepare a request.
+
+        Args:
+            verb: The HTTP verb for the request.
+            url: The path of the request.
+            body: The body of the request.
+            headers: The headers of the request.
+        """
+        self._prepared.request = _PreparedRequest(verb=verb, url=url, body=body, headers=headers)
+
+    def _record_rate_limit(self, response: requests.Response) -> None:
+        """Record how much of the rate limit budget a response consumed.
+
+        GitHub does not count conditional requests answered with not modified.
+
+        Args:
+            response: The response from the server.
+        """
+        if self._metrics is None:
+            return
+        if response.status_code == 304:
+            self._metrics.increment(NOT_MODIFIED_COUNTER)
+        if (remaining := response.headers.get(_RATE_LIMIT_REMAINING_HEADER)) is None:
+            return
+        self._metrics.increment(RATE_LIMIT_CONSUMED_COUNTER, int(response.status_code != 304))
+        if remaining.isdigit():
+            self._metrics.set(RATE_LIMIT_REMAINING_COUNTER, int(remaining))
+
+    def _send(self, prepared: _PreparedRequest) -> tuple[requests.Response, bool]:
+        """Send a prepared request, answering it from the cache if it has not changed.
+
+        Args:
+            prepared: The request to send.
+
+        Returns:
+            The response and whether it was answered from the cache.
+        """
+        url = f"{self.protocol}://{self.host}:{self.port}{prepared.url}"
+        headers = prepared.headers
+        cache_key = None
+        cached = None
+        if self._cache is not None and prepared.verb == "GET":
+            cache_key = self._cache.key(url=url, headers=headers)
+            if (cached := self._cache.get(cache_key)) is not None:
+                headers = {**headers, **cached.conditional_headers}
+
+        response = self._session.request(
+            prepared.verb,
+            url,
+            headers=headers,
+            data=prepared.body,
+            timeout=self.timeout,
+            verify=self.verify,
+            allow_redirects=False,
+        )
+        self._record_rate_limit(response)
+        if cached is not None and response.status_code == 304:
+            return _from_cache(response=response, cached=cached), True
+        if (
+            self._cache is not None
+            and cache_key is not None
+            and response.status_code == 200
+            and (etag := response.headers.get(ETAG_HEADER)) is not None
+        ):
+            self._cache.put(
+                cache_key,
+                CachedResponse(
+                    etag=etag, headers=cached_headers(response.headers), body=response.text
+                ),
+            )
+        return response, False
+
+    def getresponse(self) -> RequestsResponse:
+        """Send the prepared request.
+
+        Returns:
+            The response from the server.
+        """
+        prepared: _PreparedRequest = self._prepared.request
+        start = time.monotonic()
+        status = None
+        bytes_received = 0
+        retries = 0
+        try:
+            response, from_cache = self._send(prepared)
+            status = 304 if from_cache else response.status_code
+            bytes_received = 0 if from_cache else len(response.content)
+            retries = urllib3_retries(response)
+            return RequestsResponse(response)
+        finally:
+            if self._metrics is not None:
+                self._metrics.record(
+                    service=GITHUB_SERVICE,
+                    method=prepared.verb,
+                    url=prepared.url,
+                    status=status,
+                    elapsed_seconds=time.monotonic() - start,
+                    bytes_sent=body_size(prepared.body),
+                    bytes_received=bytes_received,
+                    retries=retries,
+                )
+
+    def close(self) -> None:
+        """Keep the connection open for reuse by the next request."""
+
+
+def create_session(pool_size: int = requests.adapters.DEFAULT_POOLSIZE) -> requests.Session:
+    """Create the session for the requests of a GitHub client.
+
+    Args:
+        pool_size: The maximum number of connections to keep open.
+
+    Returns:
+        A pooled session.
+    """
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def create_github(
+    login_or_token: str,
+    session: requests.Session,
+    metrics: MetricsCollector | None,
+    cache: GithubResponseCache | None = None,
+) -> Github:
+    """Create a GitHub client that sends its requests through GithubConnection.
+
+    PyGithub only supports replacing the connection classes of every client in the process. The
+    client keeps the connection classes it is created with, they are therefore only replaced
+    while the client is created so that other clients in the process are not affected.
+
+    Args:
+        login_or_token: The token to authenticate with.
+        session: The session to send the requests with, owned by the caller.
+        metrics: The collector to record the requests in.
+        cache: The cache for conditional GET requests.
+
+    Returns:
+        The GitHub client.
+    """
+    connection_class = functools.partial(
+        GithubConnection, session=session, metrics=metrics, cache=cache
+    )
+    with _CONNECTION_CLASSES_LOCK:
+        Requester.injectConnectionClasses(
+            functools.partial(connection_class, protocol="http"),
+            functools.partial(connection_class, protocol="https"),
+        )
+        try:
+            return Github(login_or_token=login_or_token)
+        finally:
+            Requester.resetConnectionClasses()
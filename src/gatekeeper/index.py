@@ -6,7 +6,7 @@
 import itertools
 import re
 import typing
-from collections.abc import Iterable
+from collections.abc import Iterable, Mapping
 from enum import Enum, auto
 from pathlib import Path
 
@@ -18,7 +18,7 @@ from .constants import (
 )
 from .discourse import Discourse
 from .exceptions import DiscourseError, InputError, ServerError
-from .types_ import Index, IndexContentsListItem, IndexFile, Metadata, Page
+from .types_ import Index, IndexContentsListItem, IndexFile, Metadata, Page, PathInfo
 
 CONTENTS_HEADER = "# contents"
 CONTENTS_END_LINE_PREFIX = "#"
@@ -243,8 +243,32 @@ def _get_contents_parsed_items(index_file: IndexFile) -> typing.Iterator[_Parsed
     )
 
 
+def _is_dir(path: Path, path_is_dir: Mapping[Path, bool]) -> bool | None:
+    """Check whether a path is a directory or a file.
+
+    Args:
+        path: The path to check.
+        path_is_dir: Whether each path recorded when reading the docs directory is a directory,
+            other paths are checked on the file system.
+
+    Returns:
+        True if the path is a directory, False if it is a file and None if it is neither.
+    """
+    if (is_dir := path_is_dir.get(path)) is not None:
+        return is_dir
+    if path.is_dir():
+        return True
+    if path.is_file():
+        return False
+    return None
+
+
 def _check_contents_item(
-    item: _ParsedListItem, max_whitespace: int, aggregate_dir: Path, docs_path: Path
+    item: _ParsedListItem,
+    max_whitespace: int,
+    aggregate_dir: Path,
+    docs_path: Path,
+    path_is_dir: Mapping[Path, bool],
 ) -> None:
     """Check item is valid. All the items should be exactly within a directory.
 
@@ -253,6 +277,7 @@ def _check_contents_item(
         max_whitespace: The expected number of whitespace characters for items.
         aggregate_dir: The relative directory that all items must be within.
         docs_path: The base directory of all items.
+        path_is_dir: Whether each path recorded when reading the docs directory is a directory.
 
     Raises:
         InputError:
@@ -270,7 +295,8 @@ def _check_contents_item(
 
     # Check whether item is hidden and a directory
     item_path = docs_path / Path(item.reference_value)
-    if item.hidden and item_path.is_dir():
+    item_is_dir = _is_dir(item_path, path_is_dir=path_is_dir)
+    if item.hidden and item_is_dir:
         raise InputError(f"A hidden item is a directory. {item=!r}")
 
     # Check that the next item is within the directory
@@ -291,7 +317,7 @@ def _check_contents_item(
         )
 
     # Check that if the item is a file, it has the correct extension
-    if item_path.is_file():
+    if item_is_dir is False:
         if item_path.suffix.lower() != DOC_FILE_EXTENSION:
             raise InputError(
                 "An item in the contents list is not of the expected file type. "
@@ -302,6 +328,7 @@ def _check_contents_item(
 def _calculate_contents_hierarchy(
     parsed_items: Iterable[_ParsedListItem],
     docs_path: Path,
+    path_is_dir: Mapping[Path, bool],
     aggregate_dir: Path = Path(),
     hierarchy: int = 0,
 ) -> typing.Iterator[IndexContentsListItem]:
@@ -310,6 +337,7 @@ def _calculate_contents_hierarchy(
     Args:
         parsed_items: The parsed items from the contents list in the index file.
         docs_path: The base directory of all items.
+        path_is_dir: Whether each path recorded when reading the docs directory is a directory.
         aggregate_dir: The relative directory that all items must be within.
         hierarchy: The hierarchy of the current directory.
 
@@ -338,13 +366,14 @@ def _calculate_contents_hierarchy(
             max_whitespace=whitespace_expectation_per_level[hierarchy],
             aggregate_dir=aggregate_dir,
             docs_path=docs_path,
+            path_is_dir=path_is_dir,
         )
 
         # Advance the iterator
         item_path = Path(item.reference_value)
         next_item = next(parsed_items, None)
 
-        if (docs_path / item_path).is_file() or (docs_path / item_path).is_dir():
+        if (item_is_dir := _is_dir(docs_path / item_path, path_is_dir=path_is_dir)) is not None:
             yield IndexContentsListItem(
                 hierarchy=hierarchy + 1,
                 reference_title=item.reference_title,
@@ -354,7 +383,7 @@ def _calculate_contents_hierarchy(
             )
             # Process directory contents
             if (
-                (docs_path / item_path).is_dir()
+                item_is_dir
                 and next_item is not None
                 and next_item.whitespace_count > whitespace_expectation_per_level[hierarchy]
             ):
@@ -368,15 +397,23 @@ def _calculate_contents_hierarchy(
         item = next_item
 
 
-def get_contents(index_file: IndexFile, docs_path: Path) -> typing.Iterator[IndexContentsListItem]:
+def get_contents(
+    index_file: IndexFile, docs_path: Path, path_infos: Iterable[PathInfo] = ()
+) -> typing.Iterator[IndexContentsListItem]:
     """Get the contents list items from the index file.
 
     Args:
         index_file: The index file to read the contents from.
         docs_path: The base directory of all items.
+        path_infos: Information about the local documentation files, used to avoid checking the
+            type of the items on the file system again.
 
     Returns:
         Iterator with all items from the contents list.
     """
     parsed_items = _get_contents_parsed_items(index_file=index_file)
-    return _calculate_contents_hierarchy(parsed_items=parsed_items, docs_path=docs_path)
+    return _calculate_contents_hierarchy(
+        parsed_items=parsed_items,
+        docs_path=docs_path,
+        path_is_dir={path_info.local_path: path_info.is_dir for path_info in path_infos},
+    )
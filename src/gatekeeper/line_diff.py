@@ -0,0 +1,931 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Line based diff that produces the same differences as git.
+
+The algorithms follow the xdiff library that git uses, including its heuristics, so that the
+differences are the same as those git reports.
+"""
+
+import sys
+import typing
+from collections import Counter
+from enum import Enum
+
+# Lines that occur at least this often in the other sequence may be ignored by the diff
+_MAX_EQUAL_LIMIT = 1024
+# How far to look around a line that occurs often for lines that do not occur at all
+_SIMILAR_SCAN_WINDOW = 100
+_KEEP_MULTIPLE_MATCH_RUN = 4
+# Once a diff costs this much, good enough paths are accepted instead of the shortest one
+_MIN_MAX_COST = 256
+_HEURISTIC_MIN_COST = 256
+_SNAKE_COUNT = 20
+_HEURISTIC_FACTOR = 4
+_LINE_MAX = sys.maxsize
+# Lines that occur more often than this are only used to compare ranges with Myers' algorithm
+_MAX_CHAIN_LENGTH = 64
+NO_NEWLINE_MARKER = "\\ No newline at end of file\n"
+
+
+class DiffAlgorithm(str, Enum):
+    """The algorithms to find the lines that differ with.
+
+    Attrs:
+        MYERS: Myers' algorithm, the default of git diff.
+        HISTOGRAM: The histogram algorithm, used by git merge.
+    """
+
+    MYERS = "myers"
+    HISTOGRAM = "histogram"
+
+
+class Hunk(typing.NamedTuple):
+    """A range of lines that differs between two sequences of lines.
+
+    Attrs:
+        start_a: The index of the first line in the first sequence.
+        count_a: The number of lines in the first sequence.
+        start_b: The index of the first line in the second sequence.
+        count_b: The number of lines in the second sequence.
+    """
+
+    start_a: int
+    count_a: int
+    start_b: int
+    count_b: int
+
+
+class _Common(typing.NamedTuple):
+    """A run of lines that is the same in two sequences.
+
+    Attrs:
+        start_a: The index of the first line of the run in the first sequence.
+        end_a: The index after the last line of the run in the first sequence.
+        start_b: The index of the first line of the run in the second sequence.
+        end_b: The index after the last line of the run in the second sequence.
+    """
+
+    start_a: int
+    end_a: int
+    start_b: int
+    end_b: int
+
+
+_NO_COMMON = _Common(0, 0, 0, 0)
+
+
+class _Split(typing.NamedTuple):
+    """The point where the search for the shortest edit script is divided.
+
+    Attrs:
+        index_a: The index of the line in the first sequence.
+        index_b: The index of the line in the second sequence.
+        minimal_low: Whether the edit script before the point has to be the shortest.
+        minimal_high: Whether the edit script after the point has to be the shortest.
+    """
+
+    index_a: int
+    index_b: int
+    minimal_low: bool
+    minimal_high: bool
+
+
+def split_lines(text: str) -> list[str]:
+    """Split text into lines the way git does, only on new lines.
+
+    Args:
+        text: The text to split.
+
+    Returns:
+        The lines including the line endings, the last line has no line ending if the text does
+        not end with a new line.
+    """
+    *lines, last = text.split("\n")
+    lines = [f"{line}\n" for line in lines]
+    if last:
+        lines.append(last)
+    return lines
+
+
+def _bogo_sqrt(value: int) -> int:
+    """Approximate the square root of a number like xdiff does.
+
+    Args:
+        value: The number.
+
+    Returns:
+        A power of two close to the square root of the number.
+    """
+    root = 1
+    while value > 0:
+        value >>= 2
+        root <<= 1
+    return root
+
+
+def _is_discardable(matches: list[int], index: int) -> bool:
+    """Check whether a line that occurs often is surrounded by lines that do not occur at all.
+
+    Args:
+        matches: For each line, 0 if it does not occur in the other sequence, 1 if it occurs a few
+            times and 2 if it occurs often.
+        index: The index of the line that occurs often.
+
+    Returns:
+        Whether the line can be ignored by the diff.
+    """
+    start = max(0, index - _SIMILAR_SCAN_WINDOW)
+    end = min(len(matches) - 1, index + _SIMILAR_SCAN_WINDOW)
+
+    no_match_count, multiple_match_count = 0, 1
+    for offset in range(index - 1, start - 1, -1):
+        if matches[offset] == 1:
+            break
+        no_match_count += matches[offset] == 0
+        multiple_match_count += matches[offset] == 2
+    if not no_match_count:
+        return False
+
+    following_no_match_count = 0
+    multiple_match_count += 1
+    for offset in range(index + 1, end + 1):
+        if matches[offset] == 1:
+            break
+        following_no_match_count += matches[offset] == 0
+        multiple_match_count += matches[offset] == 2
+    if not following_no_match_count:
+        return False
+
+    total_count = no_match_count + following_no_match_count + multiple_match_count
+    return multiple_match_count * _KEEP_MULTIPLE_MATCH_RUN < total_count
+
+
+def _kept_lines(
+    ids: list[int], start: int, end: int, other_counts: Counter[int], changed: list[bool]
+) -> list[int]:
+    """Select the lines the diff has to consider, the other lines are marked as changed.
+
+    Lines that do not occur in the other sequence are always changed and lines that occur often
+    in the other sequence between such lines are treated as changed too.
+
+    Args:
+        ids: The identifiers of the lines.
+        start: The index of the first line that differs from the other sequence.
+        end: The index after the last line that differs from the other sequence.
+        other_counts: The number of times each identifier occurs in the other sequence.
+        changed: Whether each line is changed, updated in place.
+
+    Returns:
+        The indexes of the lines to consider.
+    """
+    limit = min(_bogo_sqrt(len(ids)), _MAX_EQUAL_LIMIT)
+    matches = []
+    for index in range(start, end):
+        count = other_counts[ids[index]]
+        matches.append(0 if not count else 2 if count >= limit else 1)
+
+    kept = []
+    for offset, match in enumerate(matches):
+        if match == 1 or (match == 2 and not _is_discardable(matches, offset)):
+            kept.append(start + offset)
+        else:
+            changed[start + offset] = True
+    return kept
+
+
+class _SnakeSearch:  # pylint: disable=R0902
+    """Search for the middle of the shortest edit script from both ends at the same time.
+
+    This is the divide step of Myers' algorithm with the heuristics of xdiff that avoid spending a
+    lot of time on very different sequences.
+
+    Attrs:
+        got_snake: Whether a long run of common lines was found for the current cost.
+    """
+
+    def __init__(
+        self,
+        ids: tuple[list[int], list[int]],
+        box: tuple[int, int, int, int],
+        furthest: tuple[list[int], list[int]],
+        offset: int,
+    ) -> None:
+        """Construct.
+
+        Args:
+            ids: The identifiers of the lines of the first and the second sequence.
+            box: The start and end of the range in the first and the second sequence.
+            furthest: The furthest reaching index in the first sequence by diagonal from the
+                start and from the end.
+            offset: The index of the 0 diagonal in the furthest reaching indexes.
+        """
+        self._ids_a, self._ids_b = ids
+        self._start_a, self._end_a, self._start_b, self._end_b = box
+        self._forward, self._backward = furthest
+        self._offset = offset
+        self._min_diagonal = self._start_a - self._end_b
+        self._max_diagonal = self._end_a - self._start_b
+        self._forward_mid = self._start_a - self._start_b
+        self._backward_mid = self._end_a - self._end_b
+        self._odd = (self._forward_mid - self._backward_mid) & 1
+        self._forward_min = self._forward_max = self._forward_mid
+        self._backward_min = self._backward_max = self._backward_mid
+        self._forward[offset + self._forward_mid] = self._start_a
+        self._backward[offset + self._backward_mid] = self._end_a
+        self.got_snake = False
+
+    def step_forward(self) -> _Split | None:
+        """Extend the paths from the start by one edit.
+
+        Returns:
+            The split if a path from the start met a path from the end.
+        """
+        forward, offset = self._forward, self._offset
+        if self._forward_min > self._min_diagonal:
+            self._forward_min -= 1
+            forward[offset + self._forward_min - 1] = -1
+        else:
+            self._forward_min += 1
+        if self._forward_max < self._max_diagonal:
+            self._forward_max += 1
+            forward[offset + self._forward_max + 1] = -1
+        else:
+            self._forward_max -= 1
+
+        for diagonal in range(self._forward_max, self._forward_min - 1, -2):
+            if forward[offset + diagonal - 1] >= forward[offset + diagonal + 1]:
+                index_a = forward[offset + diagonal - 1] + 1
+            else:
+                index_a = forward[offset + diagonal + 1]
+            previous_a = index_a
+            index_b = index_a - diagonal
+            while (
+                index_a < self._end_a
+                and index_b < self._end_b
+                and self._ids_a[index_a] == self._ids_b[index_b]
+            ):
+                index_a += 1
+                index_b += 1
+            self.got_snake = self.got_snake or index_a - previous_a > _SNAKE_COUNT
+            forward[offset + diagonal] = index_a
+            if (
+                self._odd
+                and self._backward_min <= diagonal <= self._backward_max
+                and self._backward[offset + diagonal] <= index_a
+            ):
+                return _Split(index_a, index_b, True, True)
+        return None
+
+    def step_backward(self) -> _Split | None:
+        """Extend the paths from the end by one edit.
+
+        Returns:
+            The split if a path from the end met a path from the start.
+        """
+        backward, offset = self._backward, self._offset
+        if self._backward_min > self._min_diagonal:
+            self._backward_min -= 1
+            backward[offset + self._backward_min - 1] = _LINE_MAX
+        else:
+            self._backward_min += 1
+        if self._backward_max < self._max_diagonal:
+            self._backward_max += 1
+            backward[offset + self._backward_max + 1] = _LINE_MAX
+        else:
+            self._backward_max -= 1
+
+        for diagonal in range(self._backward_max, self._backward_min - 1, -2):
+            if backward[offset + diagonal - 1] < backward[offset + diagonal + 1]:
+                index_a = backward[offset + diagonal - 1]
+            else:
+                index_a = backward[offset + diagonal + 1] - 1
+            previous_a = index_a
+            index_b = index_a - diagonal
+            while (
+                index_a > self._start_a
+                and index_b > self._start_b
+                and self._ids_a[index_a - 1] == self._ids_b[index_b - 1]
+            ):
+                index_a -= 1
+                index_b -= 1
+            self.got_snake = self.got_snake or previous_a - index_a > _SNAKE_COUNT
+            backward[offset + diagonal] = index_a
+            if (
+                not self._odd
+                and self._forward_min <= diagonal <= self._forward_max
+                and index_a <= self._forward[offset + diagonal]
+            ):
+                return _Split(index_a, index_b, True, True)
+        return None
+
+    def forward_snake_split(self, cost: int) -> _Split | None:
+        """Find a path from the start that has made good progress and ends in a long snake.
+
+        Args:
+            cost: The number of edits of the paths.
+
+        Returns:
+            The end of the best such path or None if there is none.
+        """
+        best, split = 0, None
+        for diagonal in range(self._forward_max, self._forward_min - 1, -2):
+            index_a = self._forward[self._offset + diagonal]
+            index_b = index_a - diagonal
+            value = (
+                (index_a - self._start_a)
+                + (index_b - self._start_b)
+                - abs(diagonal - self._forward_mid)
+            )
+            if (
+                value > _HEURISTIC_FACTOR * cost
+                and value > best
+                and self._start_a + _SNAKE_COUNT <= index_a < self._end_a
+                and self._start_b + _SNAKE_COUNT <= index_b < self._end_b
+                and all(
+                    self._ids_a[index_a - back] == self._ids_b[index_b - back]
+                    for back in range(1, _SNAKE_COUNT + 1)
+                )
+            ):
+                best, split = value, _Split(index_a, index_b, True, False)
+        return split
+
+    def backward_snake_split(self, cost: int) -> _Split | None:
+        """Find a path from the end that has made good progress and ends in a long snake.
+
+        Args:
+            cost: The number of edits of the paths.
+
+        Returns:
+            The end of the best such path or None if there is none.
+        """
+        best, split = 0, None
+        for diagonal in range(self._backward_max, self._backward_min - 1, -2):
+            index_a = self._backward[self._offset + diagonal]
+            index_b = index_a - diagonal
+            value = (
+                (self._end_a - index_a)
+                + (self._end_b - index_b)
+                - abs(diagonal - self._backward_mid)
+            )
+            if (
+                value > _HEURISTIC_FACTOR * cost
+                and value > best
+                and self._start_a < index_a <= self._end_a - _SNAKE_COUNT
+                and self._start_b < index_b <= self._end_b - _SNAKE_COUNT
+                and all(
+                    self._ids_a[index_a + ahead] == self._ids_b[index_b + ahead]
+                    for ahead in range(_SNAKE_COUNT)
+                )
+            ):
+                best, split = value, _Split(index_a, index_b, False, True)
+        return split
+
+    def furthest_split(self) -> _Split:
+        """Get the end of the path that has made the most progress from either end.
+
+        Returns:
+            The end of the path.
+        """
+        forward_best, forward_best_a = -1, -1
+        for diagonal in range(self._forward_max, self._forward_min - 1, -2):
+            index_a = min(self._forward[self._offset + diagonal], self._end_a)
+            index_b = index_a - diagonal
+            if self._end_b < index_b:
+                index_a, index_b = self._end_b + diagonal, self._end_b
+            if forward_best < index_a + index_b:
+                forward_best, forward_best_a = index_a + index_b, index_a
+
+        backward_best, backward_best_a = _LINE_MAX, _LINE_MAX
+        for diagonal in range(self._backward_max, self._backward_min - 1, -2):
+            index_a = max(self._start_a, self._backward[self._offset + diagonal])
+            index_b = index_a - diagonal
+            if index_b < self._start_b:
+                index_a, index_b = self._start_b + diagonal, self._start_b
+            if index_a + index_b < backward_best:
+                backward_best, backward_best_a = index_a + index_b, index_a
+
+        if (self._end_a + self._end_b) - backward_best < forward_best - (
+            self._start_a + self._start_b
+        ):
+            return _Split(forward_best_a, forward_best - forward_best_a, True, False)
+        return _Split(backward_best_a, backward_best - backward_best_a, False, True)
+
+
+def _split(search: _SnakeSearch, minimal: bool, max_cost: int) -> _Split:
+    """Find the middle of the shortest edit script between two ranges of lines.
+
+    Args:
+        search: The search from both ends of the ranges.
+        minimal: Whether the shortest edit script is required.
+        max_cost: The cost after which the furthest reaching path is accepted.
+
+    Returns:
+        The point to divide the ranges at.
+    """
+    cost = 0
+    while True:
+        cost += 1
+        search.got_snake = False
+        if (split := search.step_forward() or search.step_backward()) is not None:
+            return split
+        if minimal:
+            continue
+        if (
+            search.got_snake
+            and cost > _HEURISTIC_MIN_COST
+            and (split := search.forward_snake_split(cost) or search.backward_snake_split(cost))
+        ):
+            return split
+        if cost >= max_cost:
+            return search.furthest_split()
+
+
+def _mark_changes(
+    ids_a: list[int], ids_b: list[int], changed_a: list[bool], changed_b: list[bool]
+) -> None:
+    """Mark the lines that are not part of the edit script found by Myers' algorithm.
+
+    Args:
+        ids_a: The identifiers of the lines of the first sequence.
+        ids_b: The identifiers of the lines of the second sequence.
+        changed_a: Whether each line of the first sequence is changed, updated in place.
+        changed_b: Whether each line of the second sequence is changed, updated in place.
+    """
+    forward = [0] * (len(ids_a) + len(ids_b) + 3)
+    backward = [0] * (len(ids_a) + len(ids_b) + 3)
+    max_cost = max(_bogo_sqrt(len(ids_a) + len(ids_b) + 3), _MIN_MAX_COST)
+
+    boxes = [(0, len(ids_a), 0, len(ids_b), False)]
+    while boxes:
+        start_a, end_a, start_b, end_b, minimal = boxes.pop()
+        while start_a < end_a and start_b < end_b and ids_a[start_a] == ids_b[start_b]:
+            start_a += 1
+            start_b += 1
+        while start_a < end_a and start_b < end_b and ids_a[end_a - 1] == ids_b[end_b - 1]:
+            end_a -= 1
+            end_b -= 1
+
+        if start_a == end_a:
+            changed_b[start_b:end_b] = [True] * (end_b - start_b)
+        elif start_b == end_b:
+            changed_a[start_a:end_a] = [True] * (end_a - start_a)
+        else:
+            split = _split(
+                search=_SnakeSearch(
+                    ids=(ids_a, ids_b),
+                    box=(start_a, end_a, start_b, end_b),
+                    furthest=(forward, backward),
+                    offset=len(ids_b) + 1,
+                ),
+                minimal=minimal,
+                max_cost=max_cost,
+            )
+            boxes.append((split.index_a, end_a, split.index_b, end_b, split.minimal_high))
+            boxes.append((start_a, split.index_a, start_b, split.index_b, split.minimal_low))
+
+
+class _Group:
+    """A group of consecutive changed lines that can be moved through a sequence.
+
+    The changes have an extra unchanged entry at the end which is also read as the entry before
+    the first line.
+
+    Attrs:
+        start: The index of the first line of the group.
+        end: The index after the last line of the group.
+        is_empty: Whether the group has no lines.
+    """
+
+    def __init__(self, ids: list[int], changed: list[bool]) -> None:
+        """Construct the group at the start of the sequence.
+
+        Args:
+            ids: The identifiers of the lines.
+            changed: Whether each line is changed.
+        """
+        self._ids = ids
+        self._changed = changed
+        self.start = 0
+        self.end = 0
+        while changed[self.end]:
+            self.end += 1
+
+    def next(self) -> bool:
+        """Move to the next group.
+
+        Returns:
+            Whether there was a next group.
+        """
+        if self.end == len(self._ids):
+            return False
+        self.start = self.end = self.end + 1
+        while self._changed[self.end]:
+            self.end += 1
+        return True
+
+    def previous(self) -> bool:
+        """Move to the previous group.
+
+        Returns:
+            Whether there was a previous group.
+        """
+        if self.start == 0:
+            return False
+        self.start = self.end = self.start - 1
+        while self._changed[self.start - 1]:
+            self.start -= 1
+        return True
+
+    def slide_down(self) -> bool:
+        """Move the group down by a line, combining it with the next group if they touch.
+
+        Returns:
+            Whether the group could be moved.
+        """
+        if self.end >= len(self._ids) or self._ids[self.start] != self._ids[self.end]:
+            return False
+        self._changed[self.start] = False
+        self._changed[self.end] = True
+        self.start += 1
+        self.end += 1
+        while self._changed[self.end]:
+            self.end += 1
+        return True
+
+    def slide_up(self) -> bool:
+        """Move the group up by a line, combining it with the previous group if they touch.
+
+        Returns:
+            Whether the group could be moved.
+        """
+        if self.start <= 0 or self._ids[self.start - 1] != self._ids[self.end - 1]:
+            return False
+        self.start -= 1
+        self.end -= 1
+        self._changed[self.start] = True
+        self._changed[self.end] = False
+        while self._changed[self.start - 1]:
+            self.start -= 1
+        return True
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether the group has no lines."""
+        return self.start == self.end
+
+
+def _slide_group(group: _Group, other_group: _Group) -> None:
+    """Move a group of changes down as far as possible, then up to line up with the other sequence.
+
+    Args:
+        group: The group of changes, moved in place.
+        other_group: The group at the same position in the other sequence, moved along.
+    """
+    while True:
+        size = group.end - group.start
+        end_matching_other = -1
+        while group.slide_up():
+            other_group.previous()
+        earliest_end = group.end
+        if not other_group.is_empty:
+            end_matching_other = group.end
+        while group.slide_down():
+            other_group.next()
+            if not other_group.is_empty:
+                end_matching_other = group.end
+        if size == group.end - group.start:
+            break
+
+    if group.end != earliest_end and end_matching_other != -1:
+        while other_group.is_empty:
+            group.slide_up()
+            other_group.previous()
+
+
+def _compact(
+    ids: list[int], changed: list[bool], other_ids: list[int], other_changed: list[bool]
+) -> None:
+    """Move the groups of changes of a sequence so that the diff is easier to read.
+
+    Groups are moved down as far as possible and then back up to line up with changes in the other
+    sequence, like git does.
+
+    Args:
+        ids: The identifiers of the lines of the sequence.
+        changed: Whether each line of the sequence is changed, updated in place.
+        other_ids: The identifiers of the lines of the other sequence.
+        other_changed: Whether each line of the other sequence is changed.
+    """
+    group = _Group(ids=ids, changed=changed)
+    other_group = _Group(ids=other_ids, changed=other_changed)
+    while True:
+        if not group.is_empty:
+            _slide_group(group=group, other_group=other_group)
+        if not group.next():
+            return
+        other_group.next()
+
+
+def _myers_changes(ids_a: list[int], ids_b: list[int]) -> tuple[list[bool], list[bool]]:
+    """Find the changed lines with Myers' algorithm and the heuristics of xdiff.
+
+    Args:
+        ids_a: The identifiers of the lines of the first sequence.
+        ids_b: The identifiers of the lines of the second sequence.
+
+    Returns:
+        Whether each line of the first and the second sequence is changed.
+    """
+    changed_a = [False] * len(ids_a)
+    changed_b = [False] * len(ids_b)
+
+    prefix = 0
+    while prefix < min(len(ids_a), len(ids_b)) and ids_a[prefix] == ids_b[prefix]:
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < min(len(ids_a), len(ids_b)) - prefix
+        and ids_a[len(ids_a) - suffix - 1] == ids_b[len(ids_b) - suffix - 1]
+    ):
+        suffix += 1
+
+    kept_a = _kept_lines(ids_a, prefix, len(ids_a) - suffix, Counter(ids_b), changed_a)
+    kept_b = _kept_lines(ids_b, prefix, len(ids_b) - suffix, Counter(ids_a), changed_b)
+    kept_changed_a = [False] * len(kept_a)
+    kept_changed_b = [False] * len(kept_b)
+    _mark_changes(
+        ids_a=[ids_a[index] for index in kept_a],
+        ids_b=[ids_b[index] for index in kept_b],
+        changed_a=kept_changed_a,
+        changed_b=kept_changed_b,
+    )
+    for index, is_changed in zip(kept_a, kept_changed_a):
+        changed_a[index] = is_changed
+    for index, is_changed in zip(kept_b, kept_changed_b):
+        changed_b[index] = is_changed
+    return changed_a, changed_b
+
+
+def _common_run(
+    ids: tuple[list[int], list[int]],
+    box: tuple[int, int, int, int],
+    start: tuple[int, int],
+    counts: dict[int, int],
+) -> tuple[_Common, int]:
+    """Extend a common line to the run of common lines around it.
+
+    Args:
+        ids: The identifiers of the lines of the first and the second sequence.
+        box: The start and end of the range in the first and the second sequence.
+        start: The index of the common line in the first and the second sequence.
+        counts: The number of times each line occurs in the range of the first sequence.
+
+    Returns:
+        The run and the least number of times a line of the run occurs in the first sequence.
+    """
+    ids_a, ids_b = ids
+    box_start_a, box_end_a, box_start_b, box_end_b = box
+    start_a, start_b = start
+    end_a, end_b = start_a + 1, start_b + 1
+    count = counts[ids_a[start_a]]
+    while (
+        box_start_a < start_a
+        and box_start_b < start_b
+        and ids_a[start_a - 1] == ids_b[start_b - 1]
+    ):
+        start_a -= 1
+        start_b -= 1
+        if count > 1:
+            count = min(count, counts[ids_a[start_a]])
+    while end_a < box_end_a and end_b < box_end_b and ids_a[end_a] == ids_b[end_b]:
+        if count > 1:
+            count = min(count, counts[ids_a[end_a]])
+        end_a += 1
+        end_b += 1
+    return _Common(start_a=start_a, end_a=end_a, start_b=start_b, end_b=end_b), count
+
+
+# Mirrors the state of the search in xdiff
+def _find_common(  # pylint: disable=too-many-locals
+    ids_a: list[int], ids_b: list[int], box: tuple[int, int, int, int]
+) -> _Common | None:
+    """Find the longest common run of lines that occur the least often in the first sequence.
+
+    Args:
+        ids_a: The identifiers of the lines of the first sequence.
+        ids_b: The identifiers of the lines of the second sequence.
+        box: The start and end of the range in the first and the second sequence.
+
+    Returns:
+        The common run, _NO_COMMON if the ranges have no line in common or None if all the common
+        lines occur too often.
+    """
+    start_a, end_a, start_b, end_b = box
+    first_index: dict[int, int] = {}
+    next_index = [-1] * (end_a - start_a)
+    for index in range(end_a - 1, start_a - 1, -1):
+        if (first := first_index.get(ids_a[index])) is not None:
+            next_index[index - start_a] = first
+        first_index[ids_a[index]] = index
+    counts = Counter(ids_a[start_a:end_a])
+
+    has_common = False
+    common = _NO_COMMON
+    min_count = _MAX_CHAIN_LENGTH + 1
+    index_b = start_b
+    while index_b < end_b:
+        next_b = index_b + 1
+        index_a = first_index.get(ids_b[index_b], -1)
+        has_common = has_common or index_a != -1
+        if counts[ids_b[index_b]] > min_count:
+            index_a = -1
+        while index_a != -1:
+            run, count = _common_run(
+                ids=(ids_a, ids_b), box=box, start=(index_a, index_b), counts=counts
+            )
+            next_b = max(next_b, run.end_b)
+            if common.end_a - common.start_a < run.end_a - run.start_a or count < min_count:
+                common, min_count = run, count
+
+            # Continue with the next occurrence after the run in the first sequence
+            while index_a != -1 and index_a < run.end_a:
+                index_a = next_index[index_a - start_a]
+        index_b = next_b
+
+    if has_common and min_count > _MAX_CHAIN_LENGTH:
+        return None
+    return common
+
+
+def _histogram_changes(ids_a: list[int], ids_b: list[int]) -> tuple[list[bool], list[bool]]:
+    """Find the changed lines with the histogram algorithm of xdiff.
+
+    The sequences are split around the longest common run of lines that occur the least often and
+    each side is compared the same way, ranges with only lines that occur often are compared with
+    Myers' algorithm.
+
+    Args:
+        ids_a: The identifiers of the lines of the first sequence.
+        ids_b: The identifiers of the lines of the second sequence.
+
+    Returns:
+        Whether each line of the first and the second sequence is changed.
+    """
+    changed_a = [False] * len(ids_a)
+    changed_b = [False] * len(ids_b)
+    boxes = [(0, len(ids_a), 0, len(ids_b))]
+    while boxes:
+        start_a, end_a, start_b, end_b = box = boxes.pop()
+        if start_a == end_a or start_b == end_b:
+            changed_a[start_a:end_a] = [True] * (end_a - start_a)
+            changed_b[start_b:end_b] = [True] * (end_b - start_b)
+            continue
+
+        common = _find_common(ids_a=ids_a, ids_b=ids_b, box=box)
+        if common is None:
+            changed_a[start_a:end_a], changed_b[start_b:end_b] = _myers_changes(
+                ids_a[start_a:end_a], ids_b[start_b:end_b]
+            )
+        elif common == _NO_COMMON:
+            changed_a[start_a:end_a] = [True] * (end_a - start_a)
+            changed_b[start_b:end_b] = [True] * (end_b - start_b)
+        else:
+            boxes.append((common.end_a, end_a, common.end_b, end_b))
+            boxes.append((start_a, common.start_a, start_b, common.start_b))
+    return changed_a, changed_b
+
+
+def diff_lines(
+    a: typing.Sequence[str],
+    b: typing.Sequence[str],
+    algorithm: DiffAlgorithm = DiffAlgorithm.HISTOGRAM,
+) -> list[Hunk]:
+    """Calculate the ranges of lines that differ between two sequences of lines like git does.
+
+    Args:
+        a: The first sequence of lines.
+        b: The second sequence of lines.
+        algorithm: The algorithm to compare the lines with.
+
+    Returns:
+        The differences in order.
+    """
+    identifiers: dict[str, int] = {}
+    ids_a = [identifiers.setdefault(line, len(identifiers)) for line in a]
+    ids_b = [identifiers.setdefault(line, len(identifiers)) for line in b]
+    if algorithm == DiffAlgorithm.MYERS:
+        changed_a, changed_b = _myers_changes(ids_a, ids_b)
+    else:
+        changed_a, changed_b = _histogram_changes(ids_a, ids_b)
+    # The extra entry is never changed and is also read as the entry before the first line
+    changed_a.append(False)
+    changed_b.append(False)
+
+    _compact(ids=ids_a, changed=changed_a, other_ids=ids_b, other_changed=changed_b)
+    _compact(ids=ids_b, changed=changed_b, other_ids=ids_a, other_changed=changed_a)
+
+    hunks = []
+    index_a, index_b = 0, 0
+    while index_a < len(a) or index_b < len(b):
+        if not changed_a[index_a] and not changed_b[index_b]:
+            index_a += 1
+            index_b += 1
+            continue
+        start_a, start_b = index_a, index_b
+        while changed_a[index_a]:
+            index_a += 1
+        while changed_b[index_b]:
+            index_b += 1
+        hunks.append(
+            Hunk(
+                start_a=start_a,
+                count_a=index_a - start_a,
+                start_b=start_b,
+                count_b=index_b - start_b,
+            )
+        )
+    return hunks
+
+
+def _hunk_range(start: int, count: int) -> str:
+    """Format the range of lines of a hunk of a unified diff.
+
+    Args:
+        start: The index of the first line.
+        count: The number of lines.
+
+    Returns:
+        The line number and the number of lines, the line before the range if it is empty.
+    """
+    if count == 1:
+        return f"{start + 1}"
+    if count == 0:
+        return f"{start},0"
+    return f"{start + 1},{count}"
+
+
+def _prefixed(prefix: str, lines: typing.Sequence[str]) -> typing.Iterator[str]:
+    """Format lines of a unified diff.
+
+    Args:
+        prefix: The character that shows whether the lines are unchanged, removed or added.
+        lines: The lines.
+
+    Yields:
+        The lines with the prefix, marking a missing new line at the end like git does.
+    """
+    for line in lines:
+        yield f"{prefix}{line}"
+        if not line.endswith("\n"):
+            yield f"\n{NO_NEWLINE_MARKER}"
+
+
+def unified_diff(
+    a: typing.Sequence[str],
+    b: typing.Sequence[str],
+    context: int = 3,
+    algorithm: DiffAlgorithm = DiffAlgorithm.MYERS,
+) -> typing.Iterator[str]:
+    """Show the lines that differ between two sequences of lines in the unified format.
+
+    Differences that are close enough to share context lines are shown in the same hunk.
+
+    Args:
+        a: The first sequence of lines.
+        b: The second sequence of lines.
+        context: The number of unchanged lines to show around the differences.
+        algorithm: The algorithm to compare the lines with.
+
+    Yields:
+        The lines of the diff, without the file names.
+    """
+    hunks = diff_lines(a, b, algorithm=algorithm)
+    index = 0
+    while index < len(hunks):
+        last = index
+        while (
+            last + 1 < len(hunks)
+            and hunks[last + 1].start_a - (hunks[last].start_a + hunks[last].count_a)
+            <= 2 * context
+        ):
+            last += 1
+
+        start_a = max(hunks[index].start_a - context, 0)
+        start_b = hunks[index].start_b - (hunks[index].start_a - start_a)
+        end_a = min(hunks[last].start_a + hunks[last].count_a + context, len(a))
+        end_b = hunks[last].start_b + hunks[last].count_b + end_a
+        end_b -= hunks[last].start_a + hunks[last].count_a
+        yield (
+            f"@@ -{_hunk_range(start_a, end_a - start_a)} "
+            f"+{_hunk_range(start_b, end_b - start_b)} @@\n"
+        )
+
+        position = start_a
+        for hunk in hunks[index : last + 1]:
+            yield from _prefixed(" ", a[position : hunk.start_a])
+            yield from _prefixed("-", a[hunk.start_a : hunk.start_a + hunk.count_a])
+            yield from _prefixed("+", b[hunk.start_b : hunk.start_b + hunk.count_b])
+            position = hunk.start_a + hunk.count_a
+        yield from _prefixed(" ", a[position:end_a])
+        index = last + 1
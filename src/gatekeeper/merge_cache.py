@@ -0,0 +1,213 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Cache of the results of merging changes of content, keyed by the digests of the contents."""
+
+import json
+import logging
+import typing
+from pathlib import Path
+
+from . import content, types_
+from .cache import LRUCache, write_atomic
+from .content_store import digest
+from .exceptions import ContentError
+
+_DEFAULT_MAXSIZE = 1024
+_RESULTS_DIR = "merge"
+# The modules that calculate the outcomes, a change to any of them invalidates the persisted
+# outcomes
+_SOURCE_MODULES = ("content.py", "diff3.py", "line_diff.py", "merge_cache.py")
+
+
+class MergeResult(typing.NamedTuple):
+    """The outcome of merging a change of content.
+
+    Attrs:
+        merged: The merged content or None if the changes could not be merged automatically.
+        merge_error: Why the changes could not be merged automatically, including the content
+            with the conflict markers, or None if they were merged.
+        conflicts: The description of the conflicts that prevent the change from being executed
+            or None if there are no conflicts.
+    """
+
+    merged: str | None
+    merge_error: str | None
+    conflicts: str | None
+
+
+def _tool_version() -> str:
+    """Get the version of the code that calculates the outcomes.
+
+    Returns:
+        The digest of the source of the modules that calculate the outcomes.
+    """
+    module_dir = Path(__file__).parent
+    return digest(
+        "\n".join((module_dir / module).read_text(encoding="utf-8") for module in _SOURCE_MODULES)
+    )
+
+
+def _evaluate(base: str, theirs: str, ours: str) -> MergeResult:
+    """Check a change of content for conflicts and merge it.
+
+    Args:
+        base: The starting point for both changes.
+        theirs: The other change.
+        ours: The local change.
+
+    Returns:
+        The outcome of the merge.
+    """
+    merged: str | None = None
+    merge_error: str | None = None
+    try:
+        merged = content.merge(base=base, theirs=theirs, ours=ours)
+    except ContentError as exc:
+        merge_error = str(exc)
+    return MergeResult(
+        merged=merged,
+        merge_error=merge_error,
+        conflicts=content.conflicts(base=base, theirs=theirs, ours=ours),
+    )
+
+
+class MergeCache:
+    """Keep the outcome of merging each change of content so that it is only merged once.
+
+    The changes are identified by the digests of their base, server and local content and the
+    version of the code that merges them. If a cache directory is configured the outcomes are
+    persisted so that, for example, a dry run followed by a run that executes the actions merges
+    each change only once.
+
+    Attrs:
+        merges: The number of changes merged, excluding outcomes that were cached.
+    """
+
+    def __init__(self, cache_dir: Path | None = None, maxsize: int = _DEFAULT_MAXSIZE) -> None:
+        """Construct.
+
+        Args:
+            cache_dir: The directory to persist the outcomes in.
+            maxsize: The maximum number of outcomes to keep in memory.
+        """
+        self._results: LRUCache[str, MergeResult] = LRUCache(maxsize=maxsize)
+        self._results_dir = cache_dir / _RESULTS_DIR if cache_dir is not None else None
+        self._version = ""
+        if self._results_dir is not None:
+            try:
+                self._version = _tool_version()
+            except OSError:
+                logging.warning("not persisting merge results, the version is not known")
+                self._results_dir = None
+        self.merges = 0
+
+    def key(self, content_change: types_.ContentChange) -> str:
+        """Get the key the outcome of merging a change is cached under.
+
+        Args:
+            content_change: The change of content with a base.
+
+        Returns:
+            The key for the outcome.
+        """
+        return digest(
+            "\n".join(
+                (
+                    self._version,
+                    typing.cast(str, content_change.base_digest),
+                    content_change.server_digest,
+                    content_change.local_digest,
+                )
+            )
+        )
+
+    def _path(self, key: str) -> Path | None:
+        """Get the path of the file an outcome is persisted in.
+
+        Args:
+            key: The key of the outcome.
+
+        Returns:
+            The path to the file or None if outcomes are not persisted.
+        """
+        if self._results_dir is None:
+            return None
+        return self._results_dir / key[:2] / f"{key}.json"
+
+    def _load(self, key: str) -> MergeResult | None:
+        """Load a persisted outcome.
+
+        Args:
+            key: The key of the outcome.
+
+        Returns:
+            The outcome or None if it has not been persisted.
+        """
+        if (path := self._path(key)) is None or not path.is_file():
+            return None
+
+        try:
+            return MergeResult(**json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            logging.warning("ignoring invalid cached merge result %s", path)
+            return None
+
+    def _save(self, key: str, result: MergeResult) -> None:
+        """Persist an outcome, the outcome is only kept in memory if it cannot be written.
+
+        Args:
+            key: The key of the outcome.
+            result: The outcome.
+        """
+        if (path := self._path(key)) is None:
+            return
+
+        try:
+            write_atomic(path=path, data=json.dumps(result._asdict()).encode("utf-8"))
+        except OSError as exc:
+            logging.warning("could not persist merge result %s, %s", path, exc)
+
+    def result(self, content_change: types_.ContentChange) -> MergeResult:
+        """Get the outcome of merging a change, merging it if it hasn't been merged before.
+
+        Args:
+            content_change: The change of content, must have a base.
+
+        Returns:
+            The outcome of the merge.
+
+        Raises:
+            ContentError: if the change does not have a base.
+        """
+        if content_change.base is None or content_change.base_digest is None:
+            raise ContentError("cannot merge a change of content without a base")
+
+        key = self.key(content_change)
+        if (result := self._results.get(key)) is not None:
+            return result
+        if (result := self._load(key)) is None:
+            result = _evaluate(
+                base=content_change.base, theirs=content_change.server, ours=content_change.local
+            )
+            self.merges += 1
+            self._save(key, result)
+        self._results.put(key, result)
+        return result
+
+    def merge(self, content_change: types_.ContentChange) -> str:
+        """Get the merged content of a change, merging it if it hasn't been merged before.
+
+        Args:
+            content_change: The change of content, must have a base.
+
+        Returns:
+            The merged content.
+
+        Raises:
+            ContentError: if the change does not have a base or there are merge conflicts.
+        """
+        result = self.result(content_change)
+        if result.merged is None:
+            raise ContentError(typing.cast(str, result.merge_error))
+        return result.merged
@@ -0,0 +1,209 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Collect metrics about the network calls made to Discourse and GitHub."""
+
+import bisect
+import json
+import re
+import threading
+import typing
+from pathlib import Path
+from urllib import parse
+
+import requests
+
+from .types_ import EndpointMetrics, NetworkMetrics
+
+DISCOURSE_SERVICE = "discourse"
+GITHUB_SERVICE = "github"
+
+_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_LATENCY_BUCKET_LABELS = tuple(str(bucket) for bucket in _LATENCY_BUCKETS) + ("+Inf",)
+# Replace the parts of paths that identify a resource so that calls are grouped by endpoint
+_PATH_TEMPLATES = (
+    (re.compile(r"^/repos/[^/]+/[^/]+"), "/repos/{owner}/{repo}"),
+    (re.compile(r"^/t/[^/]+/\d+"), "/t/{slug}/{id}"),
+    (re.compile(r"/git/(refs|ref|matching-refs)/.+$"), r"/git/\1/{ref}"),
+    (re.compile(r"/contents/.+$"), "/contents/{path}"),
+    (re.compile(r"/[0-9a-f]{40}(?=/|$)"), "/{sha}"),
+    (re.compile(r"/\d+(?=/|\.json$|$)"), "/{id}"),
+)
+
+
+def body_size(body: typing.Any) -> int:
+    """Get the size of the body of a request.
+
+    Args:
+        body: The body of the request.
+
+    Returns:
+        The number of bytes in the body, 0 if the body is streamed from a file.
+    """
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    return 0
+
+
+def urllib3_retries(response: requests.Response) -> int:
+    """Get the number of times urllib3 retried a request.
+
+    Args:
+        response: The response to the request.
+
+    Returns:
+        The number of retries.
+    """
+    retries = getattr(response.raw, "retries", None)
+    return len(retries.history) if retries is not None else 0
+
+
+def endpoint_name(service: str, method: str, url: str) -> str:
+    """Get the name of the endpoint a call was made to.
+
+    Args:
+        service: The service the call was made to.
+        method: The HTTP method of the call.
+        url: The absolute or relative URL of the call.
+
+    Returns:
+        The service, HTTP method and path template of the endpoint.
+    """
+    path = parse.urlparse(url).path or "/"
+    for pattern, template in _PATH_TEMPLATES:
+        path = pattern.sub(template, path)
+    return f"{service} {method.upper()} {path}"
+
+
+class _EndpointAccumulator:  # pylint: disable=R0902,R0903
+    """The running totals for the calls made to an endpoint."""
+
+    def __init__(self) -> None:
+        """Construct."""
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.total_seconds = 0.0
+        self.latency_counts = [0] * len(_LATENCY_BUCKET_LABELS)
+
+    def to_metrics(self) -> EndpointMetrics:
+        """Convert the running totals to metrics.
+
+        Returns:
+            The metrics of the endpoint.
+        """
+        return EndpointMetrics(
+            calls=self.calls,
+            errors=self.errors,
+            retries=self.retries,
+            bytes_sent=self.bytes_sent,
+            bytes_received=self.bytes_received,
+            total_seconds=round(self.total_seconds, 3),
+            latency_histogram=dict(zip(_LATENCY_BUCKET_LABELS, self.latency_counts)),
+        )
+
+
+class MetricsCollector:
+    """Thread safe collector of the network calls made by the clients."""
+
+    def __init__(self) -> None:
+        """Construct."""
+        self._endpoints: dict[str, _EndpointAccumulator] = {}
+        self._counters: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    # The arguments describe a single call
+    def record(  # pylint: disable=too-many-arguments
+        self,
+        *,
+        service: str,
+        method: str,
+        url: str,
+        status: int | None,
+        elapsed_seconds: float,
+        bytes_sent: int = 0,
+        bytes_received: int = 0,
+        retries: int = 0,
+    ) -> None:
+        """Record a network call.
+
+        Args:
+            service: The service the call was made to.
+            method: The HTTP method of the call.
+            url: The absolute or relative URL of the call.
+            status: The HTTP status of the response or None if no response was received.
+            elapsed_seconds: How long the call took.
+            bytes_sent: The number of body bytes sent.
+            bytes_received: The number of body bytes received.
+            retries: The number of times the call was retried.
+        """
+        name = endpoint_name(service=service, method=method, url=url)
+        bucket = bisect.bisect_left(_LATENCY_BUCKETS, elapsed_seconds)
+        with self._lock:
+            endpoint = self._endpoints.setdefault(name, _EndpointAccumulator())
+            endpoint.calls += 1
+            endpoint.errors += int(status is None or status >= 400)
+            endpoint.retries += retries
+            endpoint.bytes_sent += bytes_sent
+            endpoint.bytes_received += bytes_received
+            endpoint.total_seconds += elapsed_seconds
+            endpoint.latency_counts[bucket] += 1
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        """Add to a counter.
+
+        Args:
+            name: The name of the counter.
+            amount: The amount to add.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def set(self, name: str, value: float) -> None:
+        """Set a counter to the latest value of a measurement.
+
+        Args:
+            name: The name of the counter.
+            value: The value of the measurement.
+        """
+        with self._lock:
+            self._counters[name] = value
+
+    def summary(self, counters: typing.Mapping[str, float] | None = None) -> NetworkMetrics:
+        """Summarise the calls and counters recorded so far.
+
+        Args:
+            counters: Additional measurements to include in the summary.
+
+        Returns:
+            The metrics of the calls by endpoint.
+        """
+        with self._lock:
+            endpoints = {
+                name: endpoint.to_metrics() for name, endpoint in sorted(self._endpoints.items())
+            }
+            recorded_counters = dict(self._counters)
+        return NetworkMetrics(
+            endpoints=endpoints,
+            counters=dict(sorted({**recorded_counters, **(counters or {})}.items())),
+        )
+
+
+def write_json(metrics: NetworkMetrics, path: Path) -> None:
+    """Write the metrics to a JSON file.
+
+    Args:
+        metrics: The metrics to write.
+        path: The file to write to.
+    """
+    data = {
+        "total_calls": metrics.total_calls,
+        "counters": metrics.counters,
+        "endpoints": {name: endpoint._asdict() for name, endpoint in metrics.endpoints.items()},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
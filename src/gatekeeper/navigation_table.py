@@ -3,6 +3,7 @@
 
 """Module for parsing and rendering a navigation table."""
 
+import logging
 import re
 import string
 import typing
@@ -27,6 +28,9 @@ _PATH_REGEX = rf"{_WHITESPACE}([\w-]+){_WHITESPACE}"
 _PUNCTUATION = string.punctuation.replace("/", "\\/")
 _NAVLINK_TITLE_REGEX = rf"[\w\- {_PUNCTUATION}]+?"
 _NAVLINK_LINK_REGEX = r"[\w\/-]*"
+# Each page of the category listing can save the resolution of many linked topics, listing is
+# limited so that it takes at most half the requests it could save
+_LINKS_PER_LISTING_PAGE = 2
 _NAVLINK_REGEX = (
     rf"{_WHITESPACE}\[{_WHITESPACE}({_NAVLINK_TITLE_REGEX}){_WHITESPACE}\]{_WHITESPACE}"
     rf"\({_WHITESPACE}({_NAVLINK_LINK_REGEX}){_WHITESPACE}\){_WHITESPACE}"
@@ -86,13 +90,16 @@ def _line_to_row(line: str, default_level: int) -> types_.TableRow:
 
 
 def _check_table_row_write_permission(
-    table_row: types_.TableRow, discourse: Discourse
+    table_row: types_.TableRow,
+    discourse: Discourse,
+    prefetched: typing.Mapping[str, str | DiscourseError],
 ) -> types_.TableRow:
     """Check that the user has write permissions to the topic linked in the table row.
 
     Args:
         table_row: The table row to check.
         discourse: API to the Discourse server.
+        prefetched: The content of the linked topics or the error raised retrieving them.
 
     Returns:
         The table row.
@@ -105,6 +112,9 @@ def _check_table_row_write_permission(
         return table_row
 
     url = table_row.navlink.link
+    # The topic is not retrieved again if it already failed
+    if isinstance(error := prefetched.get(url), DiscourseError):
+        raise ServerError(f"failed to retrieve {url}") from error
     try:
         if discourse.check_topic_write_permission(url=url):
             return table_row
@@ -124,6 +134,12 @@ def from_page(page: str, discourse: Discourse) -> typing.Iterator[types_.TableRo
         2.  Process the rows line by line:
             2.1. If the row matches the header or filler pattern, skip it.
             2.2. Extract the level, path and navlink values.
+        3.  List the topics in the category so that the linked topics can be resolved without a
+            request per topic. The number of pages listed is limited by the number of links so
+            that listing a large category doesn't take more requests than it saves.
+        4.  Retrieve all the linked topics concurrently so that checking the rows and later
+            reading the topics does not require further interactions with the server. Topics
+            that could not be retrieved are reported when their row is checked.
 
     Args:
         page: The page to extract the rows from.
@@ -138,9 +154,18 @@ def from_page(page: str, discourse: Discourse) -> typing.Iterator[types_.TableRo
         return iter([])
 
     table = match.group(0)
+    table_rows = list(generate_table_row(table.splitlines()))
+    links = [row.navlink.link for row in table_rows if row.navlink.link is not None]
+    if max_pages := len(links) // _LINKS_PER_LISTING_PAGE:
+        try:
+            discourse.list_category_topics(max_pages=max_pages)
+        except DiscourseError as exc:
+            # The topics are resolved individually instead
+            logging.warning("failed to list the topics of the category, %s", exc)
+    prefetched = dict(zip(links, discourse.prefetch(links)))
     return (
-        _check_table_row_write_permission(row, discourse=discourse)
-        for row in generate_table_row(table.splitlines())
+        _check_table_row_write_permission(row, discourse=discourse, prefetched=prefetched)
+        for row in table_rows
     )
 
 
@@ -0,0 +1,112 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Support for running in blobless partial clones, e.g., created by the checkout action."""
+
+import logging
+import typing
+
+from git.repo import Repo
+
+BLOB_FILTER = "blob:none"
+# Mirrors the options git uses when it fetches missing objects of a partial clone itself
+_BLOB_FETCH_CONFIG = "fetch.negotiationAlgorithm=noop"
+_BLOB_FETCH_OPTIONS = (
+    "--no-tags",
+    "--no-write-fetch-head",
+    "--recurse-submodules=no",
+    f"--filter={BLOB_FILTER}",
+)
+_BLOB_FETCH_BATCH_SIZE = 1000
+_MISSING_OBJECT_PREFIX = "?"
+_SEPARATOR = "\0"
+
+
+def promisor_remote(repository: Repo) -> str | None:
+    """Get the remote that missing objects of a partial clone are fetched from.
+
+    Args:
+        repository: The local git repository.
+
+    Returns:
+        The name of the remote or None if the repository is not a partial clone.
+    """
+    config_reader = repository.config_reader(config_level="repository")
+    return next(
+        (
+            remote.name
+            for remote in repository.remotes
+            if config_reader.get_value(f'remote "{remote.name}"', "promisor", default=False)
+        ),
+        None,
+    )
+
+
+def _blob_shas(repository: Repo, commit_sha: str, paths: typing.Sequence[str]) -> set[str]:
+    """Get the SHAs of the blobs of files in a commit.
+
+    Only the trees of the commit are read, which are always available in a blobless clone.
+
+    Args:
+        repository: The local git repository.
+        commit_sha: The SHA of the commit.
+        paths: The paths to the files.
+
+    Returns:
+        The SHAs of the blobs of the paths that are files in the commit.
+    """
+    output = repository.git.ls_tree("-r", "-z", commit_sha, "--", *paths)
+    return {
+        info.split()[2]
+        for info, _, _ in (record.partition("\t") for record in output.split(_SEPARATOR) if record)
+    }
+
+
+def _missing_objects(repository: Repo, commit_sha: str) -> set[str]:
+    """Get the objects of the tree of a commit that are not in the local object database.
+
+    Args:
+        repository: The local git repository.
+        commit_sha: The SHA of the commit.
+
+    Returns:
+        The SHAs of the missing objects.
+    """
+    # A pathspec would skip the commit itself unless it changed the paths
+    output = repository.git.rev_list("--objects", "--missing=print", f"{commit_sha}^{{tree}}")
+    return {
+        line.removeprefix(_MISSING_OBJECT_PREFIX)
+        for line in output.splitlines()
+        if line.startswith(_MISSING_OBJECT_PREFIX)
+    }
+
+
+def fetch_missing_blobs(repository: Repo, commit_sha: str, paths: typing.Sequence[str]) -> int:
+    """Fetch the contents of files of a commit that are missing from a partial clone in bulk.
+
+    git would otherwise fetch the missing contents one file at a time as they are read.
+
+    Args:
+        repository: The local git repository.
+        commit_sha: The SHA of the commit.
+        paths: The paths to the files.
+
+    Returns:
+        The number of file contents that were fetched.
+    """
+    if not paths or (remote := promisor_remote(repository)) is None:
+        return 0
+
+    missing = sorted(
+        _blob_shas(repository=repository, commit_sha=commit_sha, paths=paths)
+        & _missing_objects(repository=repository, commit_sha=commit_sha)
+    )
+    if not missing:
+        return 0
+
+    logging.info("fetching %s missing file contents of commit %s", len(missing), commit_sha)
+    for start in range(0, len(missing), _BLOB_FETCH_BATCH_SIZE):
+        repository.git(c=_BLOB_FETCH_CONFIG).fetch(
+            *_BLOB_FETCH_OPTIONS, remote, *missing[start : start + _BLOB_FETCH_BATCH_SIZE]
+        )
+    return len(missing)
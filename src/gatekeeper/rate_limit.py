@@ -0,0 +1,199 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Client side rate limiting of the requests to the discourse server."""
+
+import asyncio
+import collections
+import logging
+import threading
+import time
+import typing
+from email.utils import parsedate_to_datetime
+
+_DEFAULT_BURST = 60
+_MIN_RATE_FRACTION = 0.05
+_RECOVERY_FRACTION = 0.05
+# The request rate when the server first rate limits requests is measured over this window
+_RATE_WINDOW_SECONDS = 10.0
+
+RETRY_AFTER_HEADER = "Retry-After"
+ERROR_CODE_HEADER = "Discourse-Rate-Limit-Error-Code"
+
+
+class RateLimiterStats(typing.NamedTuple):
+    """Statistics about the requests that have passed through the rate limiter.
+
+    Attrs:
+        requests: The number of requests that have been let through.
+        throttled: The number of rate limited responses reported by the server.
+        wait_seconds: The total time requests spent waiting for the rate limiter.
+    """
+
+    requests: int
+    throttled: int
+    wait_seconds: float
+
+
+class RateLimiter:  # pylint: disable=R0902
+    """Token bucket shared by all the requests sent to the server.
+
+    Without a configured rate, requests are not limited until the server responds that requests
+    are being rate limited. All requests are then paused for as long as the server asked for and
+    the request rate is limited to half the rate requests were sent at. As requests succeed, the
+    rate recovers gradually until requests are no longer limited.
+
+    With a configured rate, every request takes a token from the bucket which refills at the
+    request rate up to the burst size. Rate limited responses halve the rate, which recovers
+    gradually to the configured rate.
+
+    Attrs:
+        rate: The current number of requests per second let through, None if requests are not
+            limited.
+        stats: Statistics about the requests that have passed through the rate limiter.
+    """
+
+    def __init__(self, rate: float | None = None, burst: int = _DEFAULT_BURST) -> None:
+        """Construct.
+
+        Args:
+            rate: The maximum sustained number of requests per second, None to only limit
+                requests once the server rate limits them.
+            burst: The maximum number of requests that can be sent at once after being idle.
+        """
+        self._max_rate = rate
+        self._rate = rate
+        # The rate the request rate recovers to after the server rate limited requests
+        self._recovery_rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._recent: collections.deque[float] = collections.deque()
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._throttled = 0
+        self._wait_seconds = 0.0
+
+    @property
+    def rate(self) -> float | None:
+        """The current number of requests per second let through, None if not limited."""
+        with self._lock:
+            return self._rate
+
+    @property
+    def stats(self) -> RateLimiterStats:
+        """Statistics about the requests that have passed through the rate limiter."""
+        with self._lock:
+            return RateLimiterStats(
+                requests=self._requests,
+                throttled=self._throttled,
+                wait_seconds=round(self._wait_seconds, 3),
+            )
+
+    def _reserve(self) -> float:
+        """Take a token from the bucket, going into debt if there are none left.
+
+        Returns:
+            The number of seconds to wait before the request can be sent.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._requests += 1
+            if self._rate is None:
+                self._recent.append(now)
+                while self._recent[0] < now - _RATE_WINDOW_SECONDS:
+                    self._recent.popleft()
+                wait_seconds = max(self._paused_until - now, 0.0)
+            else:
+                self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                self._tokens -= 1
+                wait_seconds = max(self._paused_until - now, -self._tokens / self._rate, 0.0)
+            self._wait_seconds += wait_seconds
+            return wait_seconds
+
+    def _recent_rate(self, now: float) -> float:
+        """Get the rate requests were sent at while they were not limited.
+
+        Args:
+            now: The current time.
+
+        Returns:
+            The number of requests per second over the recent requests.
+        """
+        if not self._recent:
+            return 1.0
+        return len(self._recent) / max(now - self._recent[0], 1.0)
+
+    def acquire(self) -> None:
+        """Block until a request can be sent."""
+        if (wait_seconds := self._reserve()) > 0:
+            time.sleep(wait_seconds)
+
+    async def acquire_async(self) -> None:
+        """Wait without blocking the event loop until a request can be sent."""
+        if (wait_seconds := self._reserve()) > 0:
+            await asyncio.sleep(wait_seconds)
+
+    def record_success(self) -> None:
+        """Record that a request was not rate limited, gradually restoring the request rate."""
+        with self._lock:
+            if self._rate is None or self._recovery_rate is None:
+                return
+            self._rate += self._recovery_rate * _RECOVERY_FRACTION
+            if self._rate >= self._recovery_rate:
+                self._rate = self._max_rate
+                if self._rate is None:
+                    logging.info("discourse rate limit recovered, no longer limiting requests")
+
+    def throttle(self, wait_seconds: float, error_code: str | None = None) -> None:
+        """Record that the server is rate limiting requests.
+
+        Args:
+            wait_seconds: The number of seconds the server asked to wait for.
+            error_code: The rate limit that was reached as reported by the server.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._throttled += 1
+            self._paused_until = max(self._paused_until, now + wait_seconds)
+            if self._rate is None:
+                self._recovery_rate = self._recent_rate(now=now)
+                self._recent.clear()
+                self._rate = self._recovery_rate
+                self._updated = now
+            recovery_rate = typing.cast(float, self._recovery_rate)
+            self._rate = max(self._rate / 2, recovery_rate * _MIN_RATE_FRACTION)
+            self._tokens = min(self._tokens, 0.0)
+            rate = self._rate
+        logging.warning(
+            "discourse rate limit reached, error code: %s, pausing requests for %ss, "
+            "reducing request rate to %.2f/s",
+            error_code,
+            wait_seconds,
+            rate,
+        )
+
+
+def retry_after_seconds(headers: typing.Mapping[str, str]) -> float | None:
+    """Get the number of seconds to wait for from the Retry-After header of a response.
+
+    Args:
+        headers: The headers of the response.
+
+    Returns:
+        The number of seconds to wait for or None if the header is missing or invalid.
+    """
+    if (value := headers.get(RETRY_AFTER_HEADER)) is None:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
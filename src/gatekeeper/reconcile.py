@@ -12,14 +12,18 @@ from . import index as index_module
 from . import types_
 from .clients import Clients
 from .constants import DOCUMENTATION_TAG, NAVIGATION_TABLE_START
+from .content_store import LocalContentStore, StoredContent
 from .discourse import Discourse
 
 
-def _local_only(path_info: types_.PathInfo) -> types_.CreateAction:
+def _local_only(
+    path_info: types_.PathInfo, local_contents: LocalContentStore
+) -> types_.CreateAction:
     """Return a create action based on information about a local documentation file.
 
     Args:
         path_info: Information about the local documentation file.
+        local_contents: The bytes read from the local documentation files.
 
     Returns:
         A page create action.
@@ -28,7 +32,11 @@ def _local_only(path_info: types_.PathInfo) -> types_.CreateAction:
         level=path_info.level,
         path=path_info.table_path,
         navlink_title=path_info.navlink_title,
-        content=path_info.local_path.read_text() if path_info.local_path.is_file() else None,
+        content=(
+            local_contents.read_text(path_info.local_path)
+            if path_info.local_path.is_file()
+            else None
+        ),
         navlink_hidden=path_info.navlink_hidden,
     )
 
@@ -164,54 +172,62 @@ def _local_and_server_dir_local_page_server(
     )
 
 
-def _local_and_server_file_local_page_server(
+def _unchanged_since_tag(path_info: types_.PathInfo, clients: Clients, base_path: Path) -> bool:
+    """Check whether a file is the same as on the documentation tag using the git blob SHAs.
+
+    Args:
+        path_info: Information about the local documentation file.
+        clients: The clients to interact with things like discourse and the repository.
+        base_path: The base path of the repository.
+
+    Returns:
+        Whether the file has the same blob as on the tag, False if it is not known.
+    """
+    if path_info.blob_sha is None:
+        return False
+    try:
+        tag_blob_shas = clients.repository.get_blob_shas_from_tag(tag_name=DOCUMENTATION_TAG)
+    except (exceptions.RepositoryTagNotFoundError, exceptions.RepositoryClientError):
+        return False
+    return (
+        tag_blob_shas is not None
+        and tag_blob_shas.get(path_info.local_path.relative_to(base_path).as_posix())
+        == path_info.blob_sha
+    )
+
+
+def _get_base_content(
     path_info: types_.PathInfo,
-    table_row: types_.TableRow,
+    local: StoredContent,
     clients: Clients,
     base_path: Path,
-) -> tuple[
-    types_.UpdateAction | types_.NoopAction | types_.CreateAction | types_.DeleteAction, ...
-]:
-    """Handle the case where the item is a file locally and a page on the server.
+) -> str | None:
+    """Get the content of a file on the documentation tag.
+
+    The content isn't read from the tag if the file has the same blob as on the tag.
 
     Args:
         path_info: Information about the local documentation file.
-        table_row: A row from the navigation table.
+        local: The content of the local file.
         clients: The clients to interact with things like discourse and the repository.
         base_path: The base path of the repository.
 
     Returns:
-        The action to execute against the server.
+        The content on the tag or None if the file is not on the tag.
 
     Raises:
         ReconcilliationError:
             - If there was a problem retrieving content from GitHub.
             - If the expected tag does not exist on the server.
     """
-    local_content = path_info.local_path.read_text(encoding="utf-8").strip()
-    server_content = _get_server_content(table_row=table_row, discourse=clients.discourse)
-
-    if (
-        server_content == local_content
-        and table_row.navlink.title == path_info.navlink_title
-        and table_row.navlink.hidden == path_info.navlink_hidden
-    ):
-        return (
-            types_.NoopAction(
-                level=path_info.level,
-                path=path_info.table_path,
-                navlink=table_row.navlink,
-                content=local_content,
-            ),
-        )
+    if _unchanged_since_tag(path_info=path_info, clients=clients, base_path=base_path):
+        return local.content
 
     try:
         path = str(path_info.local_path.relative_to(base_path))
-        base_content = clients.repository.get_file_content_from_tag(
-            path=path, tag_name=DOCUMENTATION_TAG
-        )
+        return clients.repository.get_file_content_from_tag(path=path, tag_name=DOCUMENTATION_TAG)
     except exceptions.RepositoryFileNotFoundError:
-        base_content = None
+        return None
     except exceptions.RepositoryTagNotFoundError as exc:
         raise exceptions.ReconcilliationError(
             f"Tag {DOCUMENTATION_TAG} not defined on the repository, please tag the "
@@ -223,6 +239,57 @@ def _local_and_server_file_local_page_server(
             f"Unable to retrieve content for path from tag, {path}, "
             f"tag_name={DOCUMENTATION_TAG}"
         ) from exc
+
+
+def _local_and_server_file_local_page_server(
+    path_info: types_.PathInfo,
+    table_row: types_.TableRow,
+    clients: Clients,
+    base_path: Path,
+) -> tuple[
+    types_.UpdateAction | types_.NoopAction | types_.CreateAction | types_.DeleteAction, ...
+]:
+    """Handle the case where the item is a file locally and a page on the server.
+
+    Args:
+        path_info: Information about the local documentation file.
+        table_row: A row from the navigation table.
+        clients: The clients to interact with things like discourse and the repository.
+        base_path: The base path of the repository.
+
+    Returns:
+        The action to execute against the server.
+    """
+    server = clients.content_store.add(
+        _get_server_content(table_row=table_row, discourse=clients.discourse)
+    )
+    navlink_unchanged = (
+        table_row.navlink.title == path_info.navlink_title
+        and table_row.navlink.hidden == path_info.navlink_hidden
+    )
+    # The digest from a previous scan avoids reading the file if it matches the server content
+    if navlink_unchanged and path_info.content_digest == server.digest:
+        return (
+            types_.NoopAction(
+                level=path_info.level,
+                path=path_info.table_path,
+                navlink=table_row.navlink,
+                content=server.content,
+            ),
+        )
+
+    local = clients.content_store.add(clients.local_contents.read_text(path_info.local_path))
+    clients.scan_manifest.set_content_digest(path_info.local_path, local.digest)
+    if navlink_unchanged and server.digest == local.digest:
+        return (
+            types_.NoopAction(
+                level=path_info.level,
+                path=path_info.table_path,
+                navlink=table_row.navlink,
+                content=local.content,
+            ),
+        )
+
     return (
         types_.UpdateAction(
             level=path_info.level,
@@ -235,8 +302,12 @@ def _local_and_server_file_local_page_server(
                     hidden=path_info.navlink_hidden,
                 ),
             ),
-            content_change=types_.ContentChange(
-                base=base_content, server=server_content, local=local_content
+            content_change=clients.content_store.content_change(
+                base=_get_base_content(
+                    path_info=path_info, local=local, clients=clients, base_path=base_path
+                ),
+                server=server,
+                local=local,
             ),
         ),
     )
@@ -277,11 +348,11 @@ def _local_and_server(
     _local_and_server_validation(path_info=path_info, table_row=table_row)
 
     # Is a directory locally and a grouping on the server
-    if path_info.local_path.is_dir() and table_row.is_group:
+    if path_info.is_dir and table_row.is_group:
         return _local_and_server_dir_local_group_server(path_info=path_info, table_row=table_row)
 
     # Is a directory locally and a page on the server
-    if path_info.local_path.is_dir():
+    if path_info.is_dir:
         return _local_and_server_dir_local_page_server(
             path_info=path_info, table_row=table_row, clients=clients
         )
@@ -295,7 +366,7 @@ def _local_and_server(
                 level=path_info.level,
                 path=path_info.table_path,
                 navlink_title=path_info.navlink_title,
-                content=path_info.local_path.read_text(),
+                content=clients.local_contents.read_text(path_info.local_path),
                 navlink_hidden=path_info.navlink_hidden,
             ),
         )
@@ -349,6 +420,83 @@ def _server_only(table_row: types_.TableRow, discourse: Discourse) -> types_.Del
     )
 
 
+def _needs_base_content(
+    path_info: types_.PathInfo,
+    table_row: types_.TableRow | None,
+    clients: Clients,
+    base_path: Path,
+) -> bool:
+    """Check whether the content on the documentation tag is needed to update a page.
+
+    The content is only needed if the local content of the page differs from the content on the
+    server and the file has changed since the tag.
+
+    Args:
+        path_info: Information about the local documentation file.
+        table_row: The row from the navigation table for the file.
+        clients: The clients to interact with things like discourse and the repository.
+        base_path: The base path of the repository.
+
+    Returns:
+        Whether the content on the tag is needed, False if the contents could not be retrieved
+        since the failure is reported when the action for the page is calculated.
+    """
+    if table_row is None or table_row.is_group or path_info.is_dir:
+        return False
+    if _unchanged_since_tag(path_info=path_info, clients=clients, base_path=base_path):
+        return False
+    try:
+        server = clients.content_store.add(
+            _get_server_content(table_row=table_row, discourse=clients.discourse)
+        )
+        if path_info.content_digest == server.digest:
+            return False
+        local = clients.content_store.add(clients.local_contents.read_text(path_info.local_path))
+    except (exceptions.BaseError, OSError, ValueError):
+        return False
+    return local.digest != server.digest
+
+
+def _prefetch_base_contents(
+    path_info_lookup: types_.PathInfoLookup,
+    table_row_lookup: types_.TableRowLookup,
+    clients: Clients,
+    base_path: Path,
+) -> None:
+    """Read the content on the documentation tag of the pages that have changed in one go.
+
+    The repository client keeps the content so that the pages that have changed don't each need
+    to be read separately from the tag. Pages whose local content matches the server and files
+    with the same git blob as on the tag are skipped since their content on the tag is not
+    needed. Nothing is read if the tag is not in the local repository, the content is then only
+    retrieved for the pages that need it. Failures are ignored since they are reported when the
+    content of a page is needed.
+
+    Args:
+        path_info_lookup: Information about the local documentation files by table path.
+        table_row_lookup: The rows from the navigation table by table path.
+        clients: The clients to interact with things like discourse and the repository.
+        base_path: The base path of the repository.
+    """
+    paths = [
+        str(path_info.local_path.relative_to(base_path))
+        for table_path, path_info in path_info_lookup.items()
+        if _needs_base_content(
+            path_info=path_info,
+            table_row=table_row_lookup.get(table_path),
+            clients=clients,
+            base_path=base_path,
+        )
+    ]
+    if not paths:
+        return
+
+    try:
+        clients.repository.get_files_content_from_tag(paths=paths, tag_name=DOCUMENTATION_TAG)
+    except (exceptions.RepositoryTagNotFoundError, exceptions.RepositoryClientError):
+        pass
+
+
 def _calculate_action(
     path_info: types_.PathInfo | None,
     table_row: types_.TableRow | None,
@@ -374,7 +522,7 @@ def _calculate_action(
             "internal error, both path info and table row are None"
         )
     if path_info is not None and table_row is None:
-        return (_local_only(path_info=path_info),)
+        return (_local_only(path_info=path_info, local_contents=clients.local_contents),)
     if path_info is None and table_row is not None:
         return (_server_only(table_row=table_row, discourse=clients.discourse),)
     if path_info is not None and table_row is not None:
@@ -424,6 +572,13 @@ def run(
         table_row.path: table_row for table_row in table_rows
     }
 
+    _prefetch_base_contents(
+        path_info_lookup=path_info_lookup,
+        table_row_lookup=table_row_lookup,
+        clients=clients,
+        base_path=base_path,
+    )
+
     sorted_path_info_keys = path_info_lookup.keys()
     sorted_remaining_table_row_keys = sorted(table_row_lookup.keys() - sorted_path_info_keys)
     keys = itertools.chain(sorted_path_info_keys, sorted_remaining_table_row_keys)
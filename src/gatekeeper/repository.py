@@ -6,24 +6,27 @@
 import base64
 import logging
 import re
-from collections.abc import Iterable, Iterator, Sequence
+from collections.abc import Iterable, Iterator, Mapping, Sequence
 from contextlib import contextmanager
 from functools import cached_property
 from itertools import chain
 from pathlib import Path
 from typing import Any, NamedTuple, cast
 
+import requests
 from git import GitCommandError
 from git.diff import Diff
 from git.repo import Repo
-from github import Github
 from github.GithubException import GithubException, UnknownObjectException
 from github.InputGitTreeElement import InputGitTreeElement
 from github.PullRequest import PullRequest
 from github.Repository import Repository
 
 from . import commit as commit_module
+from . import git_index
+from .blob_reader import BlobReader
 from .constants import DOCUMENTATION_FOLDER_NAME
+from .content_store import LocalContentStore
 from .docs_directory import has_docs_directory
 from .exceptions import (
     InputError,
@@ -31,7 +34,13 @@ from .exceptions import (
     RepositoryFileNotFoundError,
     RepositoryTagNotFoundError,
 )
+from .fetch import FetchCoordinator
+from .github_blobs import create_blobs, existing_blob_shas
+from .github_cache import GithubResponseCache
+from .github_session import create_github, create_session
 from .metadata import get as get_metadata
+from .metrics import MetricsCollector
+from .partial_clone import fetch_missing_blobs, promisor_remote
 from .types_ import Metadata
 
 GITHUB_HOSTNAME = "github.com"
@@ -134,11 +143,14 @@ class DiffSummary(NamedTuple):
         return " // ".join(chain(modified_str, new_str, removed_str))
 
 
-def _commit_file_to_tree_element(commit_file: commit_module.FileAction) -> InputGitTreeElement:
+def _commit_file_to_tree_element(
+    commit_file: commit_module.FileAction, blob_shas: Mapping[Path, str]
+) -> InputGitTreeElement:
     """Convert a file with an action to a tree element.
 
     Args:
         commit_file: The file action to convert.
+        blob_shas: The SHA of the blob on GitHub by path for the added and modified files.
 
     Returns:
         The git tree element.
@@ -150,7 +162,10 @@ def _commit_file_to_tree_element(commit_file: commit_module.FileAction) -> Input
         case commit_module.FileAddedOrModified:
             commit_file = cast(commit_module.FileAddedOrModified, commit_file)
             return InputGitTreeElement(
-                path=str(commit_file.path), mode="100644", type="blob", content=commit_file.content
+                path=str(commit_file.path),
+                mode="100644",
+                type="blob",
+                sha=blob_shas[commit_file.path],
             )
         case commit_module.FileDeleted:
             commit_file = cast(commit_module.FileDeleted, commit_file)
@@ -162,7 +177,7 @@ def _commit_file_to_tree_element(commit_file: commit_module.FileAction) -> Input
             raise NotImplementedError(f"unsupported file in commit, {commit_file}")
 
 
-class Client:  # pylint: disable=R0904
+class Client:  # pylint: disable=R0902,R0904
     """Wrapper for git/git-server related functionalities.
 
     Attrs:
@@ -174,15 +189,36 @@ class Client:  # pylint: disable=R0904
         branches: list of all branches
     """
 
-    def __init__(self, repository: Repo, github_repository: Repository) -> None:
+    def __init__(
+        self,
+        repository: Repo,
+        github_repository: Repository,
+        local_contents: LocalContentStore | None = None,
+        github_session: requests.Session | None = None,
+    ) -> None:
         """Construct.
 
         Args:
             repository: Client for interacting with local git repository.
             github_repository: Client for interacting with remote github repository.
+            local_contents: The store to read the content of local files through.
+            github_session: The session of the GitHub client, closed with the client.
         """
         self._git_repo = repository
         self._github_repo = github_repository
+        self._github_session = github_session
+        self._local_contents = (
+            local_contents if local_contents is not None else LocalContentStore()
+        )
+        self._fetcher = FetchCoordinator(repository=repository, remote=ORIGIN_NAME)
+        self._tag_commit_shas: dict[str, str] = {}
+        self._blob_reader = BlobReader(working_dir=self.base_path)
+        # The content of a path in a commit never changes so it is kept for the whole run
+        self._blob_contents: dict[tuple[str, str], str | None] = {}
+        self._tag_blob_shas: dict[str, dict[str, str] | None] = {}
+        self._is_partial_clone = promisor_remote(repository) is not None
+        if self._is_partial_clone:
+            logging.info("repository is a partial clone, file contents are fetched on demand")
         self._configure_git_user()
 
     @cached_property
@@ -289,6 +325,18 @@ class Client:  # pylint: disable=R0904
             raise RepositoryClientError(f"unknown error {exc}") from exc
         return (branch or self.current_branch) in branches_with_commit
 
+    def fetch(self, branches: Iterable[str] = (), tags: Iterable[str] = ()) -> None:
+        """Fetch the branches and tags needed for the run that have changed on the remote.
+
+        Fetching everything that is needed upfront takes a single fetch, later checks and branch
+        switches only fetch again if the refs have been changed on the remote by this client.
+
+        Args:
+            branches: The names of the branches to fetch.
+            tags: The names of the tags to fetch.
+        """
+        self._fetcher.fetch(branches=branches, tags=tags)
+
     def pull(self, branch_name: str | None = None) -> None:
         """Pull content from remote for the provided branch.
 
@@ -317,7 +365,7 @@ class Client:  # pylint: disable=R0904
             self._git_repo.git.stash()
 
         try:
-            self._git_repo.git.fetch("--all")
+            self._fetcher.fetch(branches=(branch_name,))
             self._git_repo.git.checkout(branch_name, "--")
         finally:
             if is_dirty:
@@ -385,9 +433,22 @@ class Client:  # pylint: disable=R0904
             commit_files: The files that were added, modified or deleted in a commit.
             commit_msg: The message to use for commits.
         """
+        commit_files = list(commit_files)
         branch = self._github_repo.get_branch(self.current_branch)
         current_tree = self._github_repo.get_git_tree(sha=branch.commit.sha)
-        tree_elements = [_commit_file_to_tree_element(commit_file) for commit_file in commit_files]
+        blob_shas = create_blobs(
+            github_repository=self._github_repo,
+            commit_files=commit_files,
+            existing_shas=existing_blob_shas(
+                github_repository=self._github_repo,
+                root_tree=current_tree,
+                paths=(commit_file.path for commit_file in commit_files),
+            ),
+        )
+        tree_elements = [
+            _commit_file_to_tree_element(commit_file=commit_file, blob_shas=blob_shas)
+            for commit_file in commit_files
+        ]
         tree = self._github_repo.create_git_tree(tree_elements, current_tree)
         commit = self._github_repo.create_git_commit(
             message=commit_msg, tree=tree, parents=[branch.commit.commit]
@@ -441,7 +502,9 @@ class Client:  # pylint: disable=R0904
                         )
                         show_output = self._git_repo.git.show("--name-status")
                         commit_files = commit_module.parse_git_show(
-                            output=show_output, repository_path=self.base_path
+                            output=show_output,
+                            repository_path=self.base_path,
+                            local_contents=self._local_contents,
                         )
                         self._github_client_push(commit_files=commit_files, commit_msg=commit_msg)
                     except (GitCommandError, GithubException) as nested_exc:
@@ -452,6 +515,9 @@ class Client:  # pylint: disable=R0904
             raise RepositoryClientError(
                 f"Unexpected error updating branch {self.current_branch}. {exc=!r}"
             ) from exc
+        finally:
+            if push:
+                self._fetcher.invalidate()
         return self
 
     def _configure_git_user(self) -> None:
@@ -577,7 +643,8 @@ class Client:  # pylint: disable=R0904
         Returns:
             hash of the commit the tag refers to.
         """
-        self._git_repo.git.fetch("--all", "--tags", "--force")
+        self._fetcher.fetch(tags=(tag_name,))
+        self._tag_commit_shas.pop(tag_name, None)
         tags = [tag.commit for tag in self._git_repo.tags if tag_name == tag.name]
         if not tags:
             return None
@@ -593,6 +660,7 @@ class Client:  # pylint: disable=R0904
         Raises:
             RepositoryClientError: if there is a problem with communicating with GitHub
         """
+        self._tag_commit_shas.pop(tag_name, None)
         try:
             if self.tag_exists(tag_name):
                 logging.info("Removing tag %s", tag_name)
@@ -606,35 +674,48 @@ class Client:  # pylint: disable=R0904
         except GitCommandError as exc:
             logging.error("Tagging commit failed because of %s", exc)
             raise RepositoryClientError(f"Tagging commit failed. {exc=!r}") from exc
+        finally:
+            self._fetcher.invalidate()
 
-    def get_file_content_from_tag(self, path: str, tag_name: str) -> str:
-        """Get the content of a file for a specific tag.
+    def _local_tag_commit_sha(self, tag_name: str) -> str | None:
+        """Resolve the commit a tag points to using the local repository.
 
         Args:
-            path: The path to the file.
             tag_name: The name of the tag.
 
         Returns:
-            The content of the file for the tag.
+            The SHA of the commit or None if the tag is not in the local repository.
+        """
+        try:
+            return self._git_repo.git.rev_parse(
+                "--verify", "--quiet", f"refs/tags/{tag_name}^{{commit}}"
+            )
+        except GitCommandError:
+            return None
+
+    def _remote_tag_commit_sha(self, tag_name: str) -> str:
+        """Resolve the commit a tag points to using GitHub.
+
+        Args:
+            tag_name: The name of the tag.
+
+        Returns:
+            The SHA of the commit.
 
         Raises:
             RepositoryTagNotFoundError: if the tag could not be found in the repository.
-            RepositoryFileNotFoundError: if the file could not be retrieved from GitHub, more than
-                one file is returned or a non-file is returned
             RepositoryClientError: if there is a problem with communicating with GitHub
         """
-        # Get the tag
         try:
             tag_ref = self._github_repo.get_git_ref(f"tags/{tag_name}")
             # git has 2 types of tags, lightweight and annotated tags:
             # https://git-scm.com/book/en/v2/Git-Basics-Tagging
             if tag_ref.object.type == "commit":
                 # lightweight tag, the SHA of the tag is the commit SHA
-                commit_sha = tag_ref.object.sha
-            else:
-                # annotated tag, need to retrieve the commit SHA linked to the tag
-                git_tag = self._github_repo.get_git_tag(tag_ref.object.sha)
-                commit_sha = git_tag.object.sha
+                return tag_ref.object.sha
+            # annotated tag, need to retrieve the commit SHA linked to the tag
+            git_tag = self._github_repo.get_git_tag(tag_ref.object.sha)
+            return git_tag.object.sha
         except UnknownObjectException as exc:
             raise RepositoryTagNotFoundError(
                 f"Could not retrieve the tag {tag_name=}. {exc=!r}"
@@ -642,7 +723,83 @@ class Client:  # pylint: disable=R0904
         except GithubException as exc:
             raise RepositoryClientError(f"Communication with GitHub failed. {exc=!r}") from exc
 
-        # Get the file contents
+    def _tag_commit_sha(self, tag_name: str) -> str:
+        """Resolve the commit a tag points to, preferring the local repository.
+
+        The result is kept until the tags are fetched or changed.
+
+        Args:
+            tag_name: The name of the tag.
+
+        Returns:
+            The SHA of the commit.
+        """
+        if (commit_sha := self._tag_commit_shas.get(tag_name)) is not None:
+            return commit_sha
+
+        commit_sha = self._local_tag_commit_sha(tag_name=tag_name)
+        if commit_sha is None:
+            logging.info("tag %s not found locally, resolving it using GitHub", tag_name)
+            commit_sha = self._remote_tag_commit_sha(tag_name=tag_name)
+        self._tag_commit_shas[tag_name] = commit_sha
+        return commit_sha
+
+    def _get_local_files_content(
+        self, paths: Sequence[str], commit_sha: str
+    ) -> dict[str, str | None] | None:
+        """Get the content of files for a commit from the local git object database.
+
+        Args:
+            paths: The paths to the files.
+            commit_sha: The SHA of the commit.
+
+        Returns:
+            The content of the files by path, None for paths that do not match a file in the
+            commit. None if the commit is not in the local repository.
+        """
+        missing_paths = [path for path in paths if (commit_sha, path) not in self._blob_contents]
+        if missing_paths and self._is_partial_clone:
+            try:
+                fetch_missing_blobs(
+                    repository=self._git_repo, commit_sha=commit_sha, paths=missing_paths
+                )
+            except GitCommandError as exc:
+                logging.warning("fetching file contents in bulk failed, %s", exc)
+        if missing_paths:
+            try:
+                commit, *blobs = self._blob_reader.read(
+                    [commit_sha, *(f"{commit_sha}:{path}" for path in missing_paths)]
+                )
+            except RepositoryClientError as exc:
+                logging.warning("reading from the local git object database failed, %s", exc)
+                return None
+            if commit is None:
+                return None
+            for path, blob in zip(missing_paths, blobs):
+                self._blob_contents[(commit_sha, path)] = (
+                    blob.content.decode("utf-8")
+                    if blob is not None and blob.type_ == "blob"
+                    else None
+                )
+
+        return {path: self._blob_contents[(commit_sha, path)] for path in paths}
+
+    def _get_remote_file_content(self, path: str, commit_sha: str, tag_name: str) -> str:
+        """Get the content of a file for a commit using GitHub.
+
+        Args:
+            path: The path to the file.
+            commit_sha: The SHA of the commit.
+            tag_name: The name of the tag the commit was resolved from.
+
+        Returns:
+            The content of the file.
+
+        Raises:
+            RepositoryFileNotFoundError: if the file could not be retrieved from GitHub, more than
+                one file is returned or a non-file is returned
+            RepositoryClientError: if there is a problem with communicating with GitHub
+        """
         try:
             content_file = self._github_repo.get_contents(path, commit_sha)
         except UnknownObjectException as exc:
@@ -664,6 +821,88 @@ class Client:  # pylint: disable=R0904
 
         return base64.b64decode(content_file.content).decode("utf-8")
 
+    def get_file_content_from_tag(self, path: str, tag_name: str) -> str:
+        """Get the content of a file for a specific tag.
+
+        The file is read from the local git object database, GitHub is only used if the tag or the
+        objects are not available locally. Failures to find the tag or to communicate with GitHub
+        are raised as RepositoryTagNotFoundError and RepositoryClientError respectively.
+
+        Args:
+            path: The path to the file.
+            tag_name: The name of the tag.
+
+        Returns:
+            The content of the file for the tag.
+
+        Raises:
+            RepositoryFileNotFoundError: if the path does not match a file for the tag.
+        """
+        commit_sha = self._tag_commit_sha(tag_name=tag_name)
+
+        contents = self._get_local_files_content(paths=(path,), commit_sha=commit_sha)
+        if contents is not None:
+            if (content := contents[path]) is None:
+                raise RepositoryFileNotFoundError(
+                    f"Path did not match a file {path=} for tag {tag_name}."
+                )
+            return content
+
+        logging.info(
+            "file %s for tag %s not found locally, retrieving it from GitHub", path, tag_name
+        )
+        return self._get_remote_file_content(path=path, commit_sha=commit_sha, tag_name=tag_name)
+
+    def get_files_content_from_tag(
+        self, paths: Sequence[str], tag_name: str
+    ) -> dict[str, str | None] | None:
+        """Get the content of many files for a tag from the local repository in one go.
+
+        Args:
+            paths: The paths to the files.
+            tag_name: The name of the tag.
+
+        Returns:
+            The content of the files by path, None for paths that do not match a file for the tag.
+            None if the tag or the objects are not available locally.
+        """
+        commit_sha = self._tag_commit_sha(tag_name=tag_name)
+        return self._get_local_files_content(paths=paths, commit_sha=commit_sha)
+
+    def get_docs_blob_shas(self) -> dict[Path, str | None] | None:
+        """Get the documentation files of the working tree and their blob SHA from the git index.
+
+        Returns:
+            The SHAs by path to the file, see git_index.worktree_blob_shas.
+        """
+        blob_shas = git_index.worktree_blob_shas(self._git_repo, DOCUMENTATION_FOLDER_NAME)
+        if blob_shas is None:
+            return None
+        return {self.base_path / path: blob_sha for path, blob_sha in blob_shas.items()}
+
+    def get_blob_shas_from_tag(self, tag_name: str) -> dict[str, str] | None:
+        """Get the SHA of the blob of each documentation file for a specific tag.
+
+        Args:
+            tag_name: The name of the tag.
+
+        Returns:
+            The SHAs by path relative to the repository or None if the commit is not available in
+            the local repository.
+        """
+        commit_sha = self._tag_commit_sha(tag_name=tag_name)
+        if commit_sha not in self._tag_blob_shas:
+            self._tag_blob_shas[commit_sha] = git_index.tree_blob_shas(
+                self._git_repo, commit_sha=commit_sha, directory=DOCUMENTATION_FOLDER_NAME
+            )
+        return self._tag_blob_shas[commit_sha]
+
+    def close(self) -> None:
+        """Release the resources held for reading from the local repository and for GitHub."""
+        self._blob_reader.close()
+        if self._github_session is not None:
+            self._github_session.close()
+
 
 def _create_github_pull_request(
     github_repo: Repository, branch_name: str, base: str
@@ -713,12 +952,22 @@ def _get_repository_name_from_git_url(remote_url: str) -> str:
     return matched_repository.group(1)
 
 
-def create_repository_client(access_token: str | None, base_path: Path) -> Client:
+def create_repository_client(
+    access_token: str | None,
+    base_path: Path,
+    metrics: MetricsCollector | None = None,
+    cache_dir: Path | None = None,
+    local_contents: LocalContentStore | None = None,
+) -> Client:
     """Create a Github instance to handle communication with Github server.
 
     Args:
         access_token: Access token that has permissions to open a pull request.
         base_path: Path where local .git resides in.
+        metrics: The collector to record the requests to the GitHub API in.
+        cache_dir: The directory to persist GitHub API responses in between runs, unchanged
+            responses are then retrieved with conditional requests.
+        local_contents: The store to read the content of local files through.
 
     Raises:
         InputError: if invalid access token or invalid git remote URL is provided.
@@ -733,8 +982,19 @@ def create_repository_client(access_token: str | None, base_path: Path) -> Clien
 
     local_repo = Repo(base_path)
     logging.info("executing in git repository in the directory: %s", local_repo.working_dir)
-    github_client = Github(login_or_token=access_token)
+    github_session = create_session()
+    github_client = create_github(
+        login_or_token=access_token,
+        session=github_session,
+        metrics=metrics,
+        cache=GithubResponseCache(cache_dir=cache_dir),
+    )
     remote_url = local_repo.remote().url
     repository_fullname = _get_repository_name_from_git_url(remote_url=remote_url)
     remote_repo = github_client.get_repo(repository_fullname)
-    return Client(repository=local_repo, github_repository=remote_repo)
+    return Client(
+        repository=local_repo,
+        github_repository=remote_repo,
+        local_contents=local_contents,
+        github_session=github_session,
+    )
@@ -0,0 +1,192 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Manifest of the files scanned in the docs directory to skip reading unchanged files."""
+
+import json
+import logging
+import typing
+from pathlib import Path
+
+from . import content_store
+from .cache import write_atomic
+from .constants import DOCUMENTATION_INDEX_FILENAME
+
+# The modules that calculate the values recorded in the manifest, a change to any of them
+# invalidates the manifest
+_SOURCE_MODULES = ("docs_directory.py", "content_store.py", "scan_manifest.py")
+
+
+class ManifestEntry(typing.NamedTuple):
+    """What is known about a file in the docs directory.
+
+    Attrs:
+        mtime_ns: The modification time of the file.
+        size: The size of the file in bytes.
+        inode: The inode number of the file.
+        title: The navlink title calculated from the file.
+        content_digest: The digest of the normalised content of the file or None if the content
+            hasn't been read.
+    """
+
+    mtime_ns: int
+    size: int
+    inode: int
+    title: str
+    content_digest: str | None
+
+
+def _tool_version() -> str:
+    """Get the version of the code that calculates the values recorded in the manifest.
+
+    Returns:
+        The digest of the source of the modules that calculate the values.
+    """
+    module_dir = Path(__file__).parent
+    return content_store.digest(
+        "\n".join((module_dir / module).read_text(encoding="utf-8") for module in _SOURCE_MODULES)
+    )
+
+
+class ScanManifest:
+    """Record the title and content digest of the files in the docs directory between runs.
+
+    The entries of files that have the same modification time, size and inode as when they were
+    recorded are reused. Like git does for its index, entries of files modified at or after the
+    time the manifest was written are not reused since the file could have been changed after it
+    was recorded without changing its modification time. The whole manifest is discarded if the
+    docs directory, the index file or the code that calculates the entries changes.
+    """
+
+    def __init__(self, path: Path | None, docs_path: Path) -> None:
+        """Construct.
+
+        Args:
+            path: The file to persist the manifest in, nothing is reused or persisted if None.
+            docs_path: The path to the docs directory.
+        """
+        self._path = path
+        self._docs_path = docs_path
+        self._previous: dict[str, ManifestEntry] | None = None
+        self._written_ns = 0
+        self._current: dict[str, ManifestEntry] = {}
+
+    def _key(self) -> dict[str, str | None]:
+        """Get the values that the manifest is only valid for.
+
+        Returns:
+            The tool version, docs directory and the digest of the index file.
+        """
+        index_path = self._docs_path / DOCUMENTATION_INDEX_FILENAME
+        return {
+            "tool": _tool_version(),
+            "docs_path": str(self._docs_path.resolve()),
+            "index": (
+                content_store.digest(index_path.read_text(encoding="utf-8"))
+                if index_path.is_file()
+                else None
+            ),
+        }
+
+    def _load(self) -> dict[str, ManifestEntry]:
+        """Load the entries of the manifest persisted by a previous run.
+
+        Returns:
+            The entries by path relative to the docs directory, empty if the manifest is invalid.
+        """
+        if self._path is None or not self._path.is_file():
+            return {}
+
+        try:
+            self._written_ns = self._path.stat().st_mtime_ns
+            manifest = json.loads(self._path.read_text(encoding="utf-8"))
+            if manifest["key"] != self._key():
+                logging.info("scan manifest %s is outdated, scanning all files", self._path)
+                return {}
+            return {
+                relative_path: ManifestEntry(*entry)
+                for relative_path, entry in manifest["entries"].items()
+            }
+        except (OSError, ValueError, TypeError, KeyError):
+            logging.warning("ignoring invalid scan manifest %s", self._path)
+            return {}
+
+    def _relative(self, path: Path) -> str:
+        """Get the key for a file.
+
+        Args:
+            path: The path to the file.
+
+        Returns:
+            The path relative to the docs directory.
+        """
+        return path.relative_to(self._docs_path).as_posix()
+
+    def get(self, path: Path, mtime_ns: int, size: int, inode: int) -> ManifestEntry | None:
+        """Get the entry of a file that hasn't changed since it was recorded.
+
+        Args:
+            path: The path to the file.
+            mtime_ns: The modification time of the file.
+            size: The size of the file in bytes.
+            inode: The inode number of the file.
+
+        Returns:
+            The entry or None if there is no entry, the file changed or the file might have changed
+            after the entry was recorded.
+        """
+        if self._path is None:
+            return None
+        if self._previous is None:
+            self._previous = self._load()
+
+        relative_path = self._relative(path)
+        entry = self._previous.get(relative_path)
+        if (
+            entry is None
+            or (entry.mtime_ns, entry.size, entry.inode) != (mtime_ns, size, inode)
+            or entry.mtime_ns >= self._written_ns
+        ):
+            return None
+        self._current[relative_path] = entry
+        return entry
+
+    def put(self, path: Path, entry: ManifestEntry) -> None:
+        """Record the entry of a file.
+
+        Args:
+            path: The path to the file.
+            entry: What is known about the file.
+        """
+        self._current[self._relative(path)] = entry
+
+    def set_content_digest(self, path: Path, content_digest: str) -> None:
+        """Record the digest of the content of a file that has an entry.
+
+        Args:
+            path: The path to the file.
+            content_digest: The digest of the normalised content of the file.
+        """
+        relative_path = self._relative(path)
+        if (entry := self._current.get(relative_path)) is not None:
+            self._current[relative_path] = entry._replace(content_digest=content_digest)
+
+    def save(self) -> None:
+        """Persist the entries recorded during the run, entries of removed files are dropped.
+
+        The manifest is only used to skip reading files, if it cannot be persisted the next run
+        reads all the files.
+        """
+        if self._path is None:
+            return
+
+        try:
+            manifest = {
+                "key": self._key(),
+                "entries": {
+                    relative_path: list(entry) for relative_path, entry in self._current.items()
+                },
+            }
+            write_atomic(path=self._path, data=json.dumps(manifest).encode("utf-8"))
+        except (OSError, ValueError) as exc:
+            logging.warning("could not save scan manifest %s, %s", self._path, exc)
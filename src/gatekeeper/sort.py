@@ -55,7 +55,7 @@ def _create_sort_data(
     directories_index = {
         path_info.local_path: idx
         for idx, path_info in enumerate(alpha_sorted_path_infos)
-        if path_info.local_path.is_dir()
+        if path_info.is_dir
     }
     directories_index[docs_path] = 0
 
@@ -100,7 +100,7 @@ def _contents_index_iter(
         sort_data.local_path_yielded[item_local_path] = True
 
         # Check for directory
-        if item_path_info.local_path.is_dir():
+        if item_path_info.is_dir:
             yield from _contents_index_iter(
                 sort_data=sort_data,
                 current_dir=item_path_info.local_path,
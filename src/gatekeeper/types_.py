@@ -21,12 +21,14 @@ class UserInputsDiscourse(typing.NamedTuple):
         category_id: The category identifier to use on discourse for all topics.
         api_username: The discourse API username to use for interactions with the server.
         api_key: The discourse API key to use for interactions with the server.
+        cache_dir: The directory to persist topic downloads in between runs.
     """
 
     hostname: str
     category_id: str
     api_username: str
     api_key: str
+    cache_dir: Path | None = None
 
 
 class UserInputs(typing.NamedTuple):
@@ -42,6 +44,11 @@ class UserInputs(typing.NamedTuple):
             Required in migration mode.
         commit_sha: The SHA of the commit the action is running on.
         base_branch: The main branch against which the syncs act on
+        metrics_path: The file to write the metrics of the network calls made during the run to.
+        github_cache_dir: The directory to persist GitHub API responses in between runs.
+        merge_cache_dir: The directory to persist the outcomes of merging the content of pages in
+            between runs.
+        scan_manifest_path: The file to record the scanned documentation files in between runs.
     """
 
     discourse: UserInputsDiscourse
@@ -50,6 +57,10 @@ class UserInputs(typing.NamedTuple):
     github_access_token: str | None
     commit_sha: str
     base_branch: str
+    metrics_path: Path | None = None
+    github_cache_dir: Path | None = None
+    merge_cache_dir: Path | None = None
+    scan_manifest_path: Path | None = None
 
 
 class Metadata(typing.NamedTuple):
@@ -122,6 +133,12 @@ class PathInfo(typing.NamedTuple):
         alphabetical_rank: The rank of the path info based on alphabetically sorting all relevant
             path infos.
         navlink_hidden: Whether the item should be displayed on the navigation table
+        is_dir: Whether the path is a directory, recorded when the docs directory is read.
+        size: The size of the file in bytes, 0 for directories.
+        content_digest: The digest of the normalised content of the file recorded by a previous
+            scan or None if it is not known.
+        blob_sha: The SHA of the git blob of the file if the content of the file matches the git
+            index or None if it is not known.
     """
 
     local_path: Path
@@ -130,6 +147,10 @@ class PathInfo(typing.NamedTuple):
     navlink_title: NavlinkTitle
     alphabetical_rank: int
     navlink_hidden: bool
+    is_dir: bool
+    size: int
+    content_digest: str | None
+    blob_sha: str | None
 
 
 PathInfoLookup = dict[TablePath, PathInfo]
@@ -261,15 +282,23 @@ class NavlinkChange(typing.NamedTuple):
 class ContentChange(typing.NamedTuple):
     """Represents a change to the content.
 
+    The contents are normalised and compared using their digests.
+
     Attrs:
         base: The content which is the base for comparison.
         server: The content on the server.
         local: The content on the local disk.
+        base_digest: The digest of the base content.
+        server_digest: The digest of the content on the server.
+        local_digest: The digest of the content on the local disk.
     """
 
     base: Content | None
     server: Content
     local: Content
+    base_digest: str | None
+    server_digest: str
+    local_digest: str
 
 
 class IndexContentChange(typing.NamedTuple):
@@ -445,6 +474,46 @@ class IndexContentsListItem(typing.NamedTuple):
     hidden: bool
 
 
+class EndpointMetrics(typing.NamedTuple):
+    """Metrics of the network calls made to an endpoint.
+
+    Attrs:
+        calls: The number of calls made.
+        errors: The number of calls that failed or returned an error status.
+        retries: The number of times calls were retried.
+        bytes_sent: The number of body bytes sent.
+        bytes_received: The number of body bytes received.
+        total_seconds: The total time spent on the calls.
+        latency_histogram: The number of calls by the upper bound of their latency in seconds.
+    """
+
+    calls: int
+    errors: int
+    retries: int
+    bytes_sent: int
+    bytes_received: int
+    total_seconds: float
+    latency_histogram: dict[str, int]
+
+
+class NetworkMetrics(typing.NamedTuple):
+    """Metrics of the network calls made during a run.
+
+    Attrs:
+        endpoints: The metrics by service, HTTP method and path template of the endpoint.
+        counters: Additional measurements such as the number of connections opened.
+        total_calls: The total number of calls made.
+    """
+
+    endpoints: dict[str, EndpointMetrics]
+    counters: dict[str, float]
+
+    @property
+    def total_calls(self) -> int:
+        """The total number of calls made."""
+        return sum(endpoint.calls for endpoint in self.endpoints.values())
+
+
 class ReconcileOutputs(typing.NamedTuple):
     """Output provided by the reconcile workflow.
 
@@ -452,11 +521,13 @@ class ReconcileOutputs(typing.NamedTuple):
         index_url: url with the root documentation topic on Discourse
         topics: List of urls with actions
         documentation_tag: commit sha to which the tag was created
+        network_metrics: Metrics of the network calls made during the run
     """
 
     index_url: Url
     topics: dict[Url, ActionResult]
     documentation_tag: str | None
+    network_metrics: NetworkMetrics | None = None
 
 
 class MigrateOutputs(typing.NamedTuple):
@@ -465,7 +536,9 @@ class MigrateOutputs(typing.NamedTuple):
     Attrs:
         action: Action taken on the PR
         pull_request_url: url of the pull-request when relevant
+        network_metrics: Metrics of the network calls made during the run
     """
 
     action: PullRequestAction
     pull_request_url: Url
+    network_metrics: NetworkMetrics | None = None
@@ -0,0 +1,122 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Compare the speed and output of the content engines with the previous implementations.
+
+Run from the root of the repository with python -m tests.benchmark.benchmark_content, the
+contents are generated from a fixed seed so that the results are reproducible.
+"""
+
+import argparse
+import random
+import time
+import typing
+
+from src.gatekeeper import content
+from src.gatekeeper.exceptions import ContentError
+from tests import content_reference
+
+
+def _timed(function: typing.Callable[[], list[str]]) -> tuple[float, list[str]]:
+    """Time a function.
+
+    Args:
+        function: The function to time.
+
+    Returns:
+        The number of seconds the function took and what it returned.
+    """
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def _merge_all(merge: typing.Callable[..., str], cases: list[tuple[str, str, str]]) -> list[str]:
+    """Merge the changes of every case.
+
+    Args:
+        merge: The merge function.
+        cases: The base, their and our contents of every case.
+
+    Returns:
+        The merged content or the error message of every case.
+    """
+    results = []
+    for base, theirs, ours in cases:
+        try:
+            results.append(merge(base=base, theirs=theirs, ours=ours))
+        except ContentError as exc:
+            results.append(f"ContentError: {exc}")
+    return results
+
+
+def _benchmark_merge(rng: random.Random, pages: int, lines: int) -> None:
+    """Compare the in memory merge with git merge in a temporary repository.
+
+    Args:
+        rng: The source of randomness.
+        pages: The number of pages to merge.
+        lines: The number of lines of every page.
+    """
+    cases = []
+    for _ in range(pages):
+        base = content_reference.generate_content(rng, lines)
+        cases.append(
+            (
+                base,
+                content_reference.edit_content(rng, base, rng.randint(1, 5)),
+                content_reference.edit_content(rng, base, rng.randint(1, 5)),
+            )
+        )
+
+    previous_seconds, previous = _timed(lambda: _merge_all(content_reference.merge, cases))
+    seconds, merged = _timed(lambda: _merge_all(content.merge, cases))
+    conflicts = sum(result.startswith("ContentError") for result in merged)
+    print(
+        f"merge of {pages} pages of {lines} lines, {conflicts} with conflicts: "
+        f"git merge {previous_seconds:.3f}s, in memory {seconds:.3f}s, "
+        f"same results: {merged == previous}"
+    )
+
+
+def _benchmark_diff(rng: random.Random, pages: int, lines: int) -> None:
+    """Compare the unified diff engines with the previous ndiff.
+
+    Args:
+        rng: The source of randomness.
+        pages: The number of pages to compare.
+        lines: The number of lines of every page.
+    """
+    cases = []
+    for _ in range(pages):
+        first = content_reference.generate_content(rng, lines)
+        cases.append((first, content_reference.edit_content(rng, first, rng.randint(1, 50))))
+
+    previous_seconds, _ = _timed(
+        lambda: [content_reference.diff(first, second) for first, second in cases]
+    )
+    print(f"diff of {pages} pages of {lines} lines: previous ndiff {previous_seconds:.3f}s")
+    for engine in content.DiffEngine:
+        seconds, _ = _timed(
+            lambda engine=engine: [  # type: ignore[misc]
+                content.diff(first, second, engine=engine) for first, second in cases
+            ]
+        )
+        print(f"    {engine.value} {seconds:.3f}s")
+
+
+def main() -> None:
+    """Run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated contents")
+    parser.add_argument("--pages", type=int, default=100, help="number of pages")
+    parser.add_argument("--lines", type=int, default=2000, help="number of lines per page")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    _benchmark_merge(rng, pages=args.pages, lines=args.lines)
+    _benchmark_diff(rng, pages=args.pages, lines=args.lines)
+
+
+if __name__ == "__main__":
+    main()
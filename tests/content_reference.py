@@ -0,0 +1,133 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""The previous merge and diff of contents and generated contents to compare the engines with."""
+
+import difflib
+import random
+import tempfile
+from pathlib import Path
+
+from git.exc import GitCommandError
+from git.repo import Repo
+
+from src.gatekeeper.exceptions import ContentError
+
+_BASE_BRANCH = "base"
+_THEIR_BRANCH = "theirs"
+_OUR_BRANCH = "ours"
+# Few distinct lines so that the generated contents repeat lines like real documentation does
+_WORDS = ("install", "the", "charm", "juju", "deploy", "relation", "config", "docs", "")
+
+
+def merge(base: str, theirs: str, ours: str) -> str:
+    """Create the merged content with git merge in a temporary repository.
+
+    Args:
+        base: The starting point for both changes.
+        theirs: The other change.
+        ours: The local change.
+
+    Returns:
+        The merged content.
+
+    Raises:
+        ContentError: if there are merge conflicts.
+    """
+    # Handle cases that are guaranteed not to have conflicts, git cannot commit unchanged content
+    if base in (theirs, ours) or theirs == ours:
+        return ours if theirs == base else theirs
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Initialise repository
+        tmp_path = Path(tmp_dir)
+        repo = Repo.init(tmp_path)
+        writer = repo.config_writer()
+        writer.set_value("user", "name", "temp_user")
+        writer.set_value("user", "email", "temp_email")
+        writer.set_value("commit", "gpgsign", "false")
+        writer.release()
+
+        # Create base
+        repo.git.checkout("-b", _BASE_BRANCH)
+        (content_path := tmp_path / "content.txt").write_text(base, encoding="utf-8")
+        repo.git.add(".")
+        repo.git.commit("-m", "initial commit")
+
+        # Create their branch
+        repo.git.checkout("-b", _THEIR_BRANCH)
+        content_path.write_text(theirs, encoding="utf-8")
+        repo.git.add(".")
+        repo.git.commit("-m", "their change")
+
+        # Create our branch
+        repo.git.checkout(_BASE_BRANCH)
+        repo.git.checkout("-b", _OUR_BRANCH)
+        content_path.write_text(ours, encoding="utf-8")
+        repo.git.add(".")
+        repo.git.commit("-m", "our change")
+
+        try:
+            repo.git.merge(_THEIR_BRANCH)
+        except GitCommandError as exc:
+            content_conflicts = content_path.read_text(encoding="utf-8")
+            raise ContentError(
+                f"could not automatically merge, conflicts:\n{content_conflicts}"
+            ) from exc
+
+        return content_path.read_text(encoding="utf-8")
+
+
+def diff(first: str, second: str) -> str:
+    """Show the difference between two strings with difflib.Differ.
+
+    Args:
+        first: One of the strings to compare.
+        second: One of the strings to compare.
+
+    Returns:
+        The diff between the two strings.
+    """
+    return "".join(
+        difflib.Differ().compare(first.splitlines(keepends=True), second.splitlines(keepends=True))
+    )
+
+
+def generate_content(rng: random.Random, line_count: int) -> str:
+    """Generate markdown-like content.
+
+    Args:
+        rng: The source of randomness.
+        line_count: The number of lines of the content.
+
+    Returns:
+        The content.
+    """
+    lines = (
+        " ".join(rng.choice(_WORDS) for _ in range(rng.randint(0, 6))) for _ in range(line_count)
+    )
+    return "".join(f"{line}\n" for line in lines)
+
+
+def edit_content(rng: random.Random, content: str, edit_count: int) -> str:
+    """Change, add and remove random lines of content.
+
+    Args:
+        rng: The source of randomness.
+        content: The content to change.
+        edit_count: The number of lines to change.
+
+    Returns:
+        The changed content.
+    """
+    lines = content.splitlines(keepends=True)
+    for _ in range(edit_count):
+        index = rng.randint(0, len(lines))
+        operation = rng.choice(("change", "add", "remove"))
+        if operation == "add" or index == len(lines):
+            lines.insert(index, generate_content(rng, 1))
+        elif operation == "change":
+            lines[index] = generate_content(rng, 1)
+        else:
+            del lines[index]
+    return "".join(lines)
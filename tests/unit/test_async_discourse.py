@@ -0,0 +1,470 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for the asyncio discourse client."""
+
+import asyncio
+import hashlib
+import typing
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.gatekeeper.async_discourse import AsyncDiscourse
+from src.gatekeeper.exceptions import DiscourseError
+from src.gatekeeper.metrics import MetricsCollector
+from src.gatekeeper.rate_limit import RateLimiter
+
+Handler = typing.Callable[[web.Request], typing.Awaitable[web.StreamResponse]]
+
+
+class _Server:  # pylint: disable=R0903
+    """A discourse server with one topic per identifier.
+
+    Attrs:
+        contents: The content of the first post of each topic by identifier.
+        versions: The version of the first post of each topic by identifier.
+        requests: The method and path of every request received.
+        if_none_match: The If-None-Match header of every request for the raw content.
+        max_in_flight: The largest number of requests handled at the same time.
+        raw_statuses: Statuses to answer requests for the raw content with before the content.
+    """
+
+    def __init__(self, topic_ids: typing.Iterable[int]) -> None:
+        """Construct.
+
+        Args:
+            topic_ids: The identifiers of the topics on the server.
+        """
+        self.contents = {topic_id: f"content {topic_id}" for topic_id in topic_ids}
+        self.versions = {topic_id: 1 for topic_id in self.contents}
+        self.requests: list[tuple[str, str]] = []
+        self.if_none_match: list[str | None] = []
+        self.max_in_flight = 0
+        self.raw_statuses: list[int] = []
+        self._in_flight = 0
+
+    @web.middleware
+    async def _track(self, request: web.Request, handler: Handler) -> web.StreamResponse:
+        """Record a request and how many requests are being handled at the same time.
+
+        Args:
+            request: The request.
+            handler: The handler of the request.
+
+        Returns:
+            The response of the handler.
+        """
+        self.requests.append((request.method, request.path))
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            # Give other requests the chance to be sent
+            await asyncio.sleep(0.01)
+            return await handler(request)
+        finally:
+            self._in_flight -= 1
+
+    def _topic_id(self, request: web.Request) -> int:
+        """Get the topic a request is for.
+
+        Args:
+            request: The request.
+
+        Returns:
+            The identifier of the topic.
+
+        Raises:
+            HTTPNotFound: if the topic does not exist.
+        """
+        topic_id = int(request.match_info["topic_id"])
+        if topic_id not in self.contents:
+            raise web.HTTPNotFound()
+        return topic_id
+
+    async def _topic_head(self, request: web.Request) -> web.Response:
+        """Resolve the URL to a topic.
+
+        Args:
+            request: The request.
+
+        Returns:
+            An empty response.
+        """
+        self._topic_id(request)
+        return web.Response()
+
+    async def _topic(self, request: web.Request) -> web.Response:
+        """Get a topic.
+
+        Args:
+            request: The request.
+
+        Returns:
+            The topic with its first post.
+        """
+        topic_id = self._topic_id(request)
+        first_post = {
+            "post_number": 1,
+            "id": topic_id * 10,
+            "can_edit": True,
+            "user_deleted": False,
+            "version": self.versions.get(topic_id, 1),
+            "updated_at": f"2023-01-0{self.versions.get(topic_id, 1)}T00:00:00Z",
+        }
+        return web.json_response({"post_stream": {"posts": [first_post]}})
+
+    async def _raw(self, request: web.Request) -> web.Response:
+        """Get the raw content of a topic, only if it has changed if the request is conditional.
+
+        Args:
+            request: The request.
+
+        Returns:
+            The content of the first post.
+        """
+        self.if_none_match.append(request.headers.get("If-None-Match"))
+        if self.raw_statuses:
+            status = self.raw_statuses.pop(0)
+            return web.Response(
+                status=status, headers={"Retry-After": "0"} if status == 429 else {}
+            )
+        content = self.contents[self._topic_id(request)]
+        etag = f'"{hashlib.sha256(content.encode("utf-8")).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(text=content, headers={"ETag": etag})
+
+    async def _create(self, request: web.Request) -> web.Response:
+        """Create a topic.
+
+        Args:
+            request: The request.
+
+        Returns:
+            The first post of the topic.
+        """
+        topic_id = max(self.contents, default=0) + 1
+        self.contents[topic_id] = str((await request.post())["raw"])
+        return web.json_response({"topic_slug": "slug", "topic_id": topic_id})
+
+    async def _update(self, request: web.Request) -> web.Response:
+        """Update the first post of a topic.
+
+        Args:
+            request: The request.
+
+        Returns:
+            The updated post.
+        """
+        form = await request.post()
+        topic_id = int(request.match_info["post_id"]) // 10
+        self.contents[topic_id] = str(form["post[raw]"])
+        self.versions[topic_id] = self.versions.get(topic_id, 1) + 1
+        return web.json_response({"post": {}})
+
+    async def _delete(self, request: web.Request) -> web.Response:
+        """Delete a topic.
+
+        Args:
+            request: The request.
+
+        Returns:
+            An empty response.
+        """
+        del self.contents[self._topic_id(request)]
+        return web.Response(text="")
+
+    def application(self) -> web.Application:
+        """Create the application serving the requests.
+
+        Returns:
+            The application.
+        """
+        app = web.Application(middlewares=[self._track])
+        app.router.add_get(r"/t/slug/{topic_id:\d+}", self._topic_head)
+        app.router.add_get(r"/t/slug/{topic_id:\d+}.json", self._topic)
+        app.router.add_get("/raw/{topic_id}", self._raw)
+        app.router.add_post("/posts", self._create)
+        app.router.add_put("/posts/{post_id}", self._update)
+        app.router.add_delete("/t/{topic_id}", self._delete)
+        return app
+
+
+ResultT = typing.TypeVar("ResultT")
+
+
+def _run(
+    server: _Server,
+    interact: typing.Callable[[AsyncDiscourse], typing.Awaitable[ResultT]],
+    **kwargs: typing.Any,
+) -> ResultT:
+    """Run a client against the server.
+
+    Args:
+        server: The server.
+        interact: What to do with the client.
+        kwargs: Additional arguments for the client.
+
+    Returns:
+        What the interaction returned.
+    """
+
+    async def _main() -> ResultT:
+        """Start the server and interact with it.
+
+        Returns:
+            What the interaction returned.
+        """
+        async with TestServer(server.application()) as test_server:
+            async with AsyncDiscourse(
+                base_path=str(test_server.make_url("")).rstrip("/"),
+                api_username="user",
+                api_key="key",
+                category_id=1,
+                **kwargs,
+            ) as discourse:
+                return await interact(discourse)
+
+    return asyncio.run(_main())
+
+
+def test_retrieve_topic():
+    """
+    arrange: given a server with a topic and a client recording metrics.
+    act: when the topic is retrieved twice.
+    assert: then the content is returned, the server is only asked once and the requests are
+        recorded in the metrics.
+    """
+    server = _Server(topic_ids=(1,))
+    metrics = MetricsCollector()
+
+    async def _interact(discourse: AsyncDiscourse) -> tuple[str, str]:
+        """Retrieve the topic twice.
+
+        Args:
+            discourse: The client.
+
+        Returns:
+            The contents.
+        """
+        return (
+            await discourse.retrieve_topic("/t/slug/1"),
+            await discourse.retrieve_topic("/t/slug/1"),
+        )
+
+    contents = _run(server, _interact, metrics=metrics)
+
+    assert contents == ("content 1", "content 1")
+    assert server.requests == [
+        ("HEAD", "/t/slug/1"),
+        ("GET", "/t/slug/1.json"),
+        ("GET", "/raw/1"),
+    ]
+    endpoints = metrics.summary().endpoints
+    assert endpoints["discourse HEAD /t/{slug}/{id}"].calls == 1
+    assert endpoints["discourse GET /t/{slug}/{id}.json"].calls == 1
+    assert endpoints["discourse GET /raw/{id}"].calls == 1
+
+
+def test_retrieve_topic_missing():
+    """
+    arrange: given a server without the topic.
+    act: when the topic is retrieved.
+    assert: then DiscourseError is raised.
+    """
+    server = _Server(topic_ids=())
+
+    async def _interact(discourse: AsyncDiscourse) -> str:
+        """Retrieve the topic.
+
+        Args:
+            discourse: The client.
+
+        Returns:
+            The content.
+        """
+        return await discourse.retrieve_topic("/t/slug/1")
+
+    with pytest.raises(DiscourseError):
+        _run(server, _interact)
+
+
+def test_check_topic_write_permission_absolute_url():
+    """
+    arrange: given a server with a topic.
+    act: when the write permission and the absolute URL of the topic are checked.
+    assert: then the permission and the URL with the base path are returned.
+    """
+    server = _Server(topic_ids=(1,))
+
+    async def _interact(discourse: AsyncDiscourse) -> tuple[bool, str]:
+        """Check the write permission and get the absolute URL.
+
+        Args:
+            discourse: The client.
+
+        Returns:
+            The permission and the URL.
+        """
+        return (
+            await discourse.check_topic_write_permission("/t/slug/1"),
+            await discourse.absolute_url("/t/slug/1"),
+        )
+
+    can_edit, url = _run(server, _interact)
+
+    assert can_edit
+    assert url.startswith("http://") and url.endswith("/t/slug/1")
+
+
+def test_create_update_delete_topic():
+    """
+    arrange: given a server without topics.
+    act: when a topic is created, retrieved, updated, retrieved again and deleted.
+    assert: then the server has the updated content before the delete, the updated content is
+        retrieved and the topic is gone after the delete.
+    """
+    server = _Server(topic_ids=())
+
+    async def _interact(discourse: AsyncDiscourse) -> list[str]:
+        """Create, update and delete a topic.
+
+        Args:
+            discourse: The client.
+
+        Returns:
+            The contents retrieved after the create and the update.
+        """
+        url = await discourse.create_topic(title="title", content="created")
+        retrieved = [await discourse.retrieve_topic(url)]
+        await discourse.update_topic(url, content="updated")
+        retrieved.append(await discourse.retrieve_topic(url))
+        assert server.contents == {1: "updated"}
+        await discourse.delete_topic(url)
+        return retrieved
+
+    retrieved = _run(server, _interact)
+
+    assert retrieved == ["created", "updated"]
+    assert not server.contents
+
+
+def test_prefetch_concurrency_limit():
+    """
+    arrange: given a server with many topics and a client with a concurrency limit.
+    act: when the topics and one missing topic are prefetched.
+    assert: then the contents are returned in order with an error for the missing topic and the
+        server never handles more requests at the same time than the limit.
+    """
+    server = _Server(topic_ids=range(1, 11))
+    urls = [f"/t/slug/{topic_id}" for topic_id in range(1, 12)]
+
+    async def _interact(discourse: AsyncDiscourse) -> list[str | DiscourseError]:
+        """Prefetch the topics.
+
+        Args:
+            discourse: The client.
+
+        Returns:
+            The contents.
+        """
+        return await discourse.prefetch(urls)
+
+    results = _run(server, _interact, max_concurrency=3)
+
+    assert results[:10] == [f"content {topic_id}" for topic_id in range(1, 11)]
+    assert isinstance(results[10], DiscourseError)
+    assert 1 < server.max_in_flight <= 3
+
+
+def test_retrieve_topic_rate_limited():
+    """
+    arrange: given a server that rate limits the first request for the raw content.
+    act: when the topic is retrieved.
+    assert: then the request is retried and the rate limit is recorded by the rate limiter.
+    """
+    server = _Server(topic_ids=(1,))
+    server.raw_statuses = [429]
+    rate_limiter = RateLimiter()
+
+    async def _interact(discourse: AsyncDiscourse) -> str:
+        """Retrieve the topic.
+
+        Args:
+            discourse: The client.
+
+        Returns:
+            The content.
+        """
+        return await discourse.retrieve_topic("/t/slug/1")
+
+    content = _run(server, _interact, rate_limiter=rate_limiter)
+
+    assert content == "content 1"
+    assert server.requests.count(("GET", "/raw/1")) == 2
+    assert rate_limiter.stats.throttled == 1
+
+
+async def _retrieve_topic(discourse: AsyncDiscourse) -> str:
+    """Retrieve the topic with identifier 1.
+
+    Args:
+        discourse: The client.
+
+    Returns:
+        The content.
+    """
+    return await discourse.retrieve_topic("/t/slug/1")
+
+
+def test_retrieve_topic_not_modified(tmp_path: Path):
+    """
+    arrange: given a topic that has been downloaded by a client that persists downloads and a new
+        version of the first post with the same content.
+    act: when the topic is retrieved by another client with the same cache directory.
+    assert: then the download is revalidated with a conditional request and the cached content
+        is returned.
+    """
+    server = _Server(topic_ids=(1,))
+    _run(server, _retrieve_topic, cache_dir=tmp_path)
+    server.versions[1] += 1
+
+    content = _run(server, _retrieve_topic, cache_dir=tmp_path)
+
+    assert content == "content 1"
+    assert len(server.if_none_match) == 2
+    assert server.if_none_match[0] is None
+    assert server.if_none_match[1] is not None
+
+
+def test_retrieve_topic_not_modified_without_download():
+    """
+    arrange: given a server that answers the first request for the raw content with not modified.
+    act: when the topic is retrieved by a client without a cached download.
+    assert: then the content is requested again without conditional headers and returned.
+    """
+    server = _Server(topic_ids=(1,))
+    server.raw_statuses = [304]
+
+    content = _run(server, _retrieve_topic)
+
+    assert content == "content 1"
+    assert server.if_none_match == [None, None]
+
+
+def test_retrieve_topic_not_modified_repeated():
+    """
+    arrange: given a server that always answers requests for the raw content with not modified.
+    act: when the topic is retrieved by a client without a cached download.
+    assert: then DiscourseError is raised after one retry rather than returning empty content.
+    """
+    server = _Server(topic_ids=(1,))
+    server.raw_statuses = [304, 304]
+
+    with pytest.raises(DiscourseError):
+        _run(server, _retrieve_topic)
+
+    assert server.if_none_match == [None, None]
@@ -0,0 +1,81 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for reading objects through a long lived git process."""
+
+import typing
+from pathlib import Path
+
+import pytest
+from git.repo import Repo
+
+from src.gatekeeper.blob_reader import BlobReader
+from src.gatekeeper.exceptions import RepositoryClientError
+
+
+@pytest.fixture(name="repository")
+def fixture_repository(tmp_path: Path) -> Repo:
+    """Create a repository with a commit of many files larger than the pipe buffers."""
+    repository = Repo.init(tmp_path / "repository")
+    with repository.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    for index in range(20):
+        (tmp_path / "repository" / f"file-{index}.md").write_text(
+            f"{index}\n" * 10000, encoding="utf-8"
+        )
+    repository.git.add(".")
+    repository.git.commit("-m", "add files")
+    return repository
+
+
+@pytest.fixture(name="reader")
+def fixture_reader(repository: Repo) -> typing.Iterator[BlobReader]:
+    """Create a reader for the repository."""
+    reader = BlobReader(working_dir=Path(repository.working_tree_dir or ""))
+    yield reader
+    reader.close()
+
+
+def test_read(reader: BlobReader, repository: Repo):
+    """
+    arrange: given a repository with many large files.
+    act: when the files and a missing file are read at once.
+    assert: then the content of each file is returned in order with None for the missing file.
+    """
+    names = [f"HEAD:file-{index}.md" for index in range(20)]
+
+    objects = reader.read([*names[:10], "HEAD:missing.md", *names[10:]])
+
+    assert objects[10] is None
+    returned_objects = [*objects[:10], *objects[11:]]
+    assert [git_object.content if git_object else None for git_object in returned_objects] == [
+        (f"{index}\n" * 10000).encode("utf-8") for index in range(20)
+    ]
+    assert all(git_object and git_object.type_ == "blob" for git_object in returned_objects)
+    assert objects[0] and objects[0].sha == repository.git.rev_parse(names[0])
+
+
+def test_read_after_close(reader: BlobReader):
+    """
+    arrange: given a reader that has read a file and has been closed.
+    act: when the file is read again.
+    assert: then the process is started again and the content is returned.
+    """
+    reader.read(["HEAD:file-0.md"])
+    reader.close()
+
+    (git_object,) = reader.read(["HEAD:file-0.md"])
+
+    assert git_object is not None
+    assert git_object.content == ("0\n" * 10000).encode("utf-8")
+
+
+def test_read_new_line(reader: BlobReader):
+    """
+    arrange: given a reader.
+    act: when an object with a new line in its name is read.
+    assert: then RepositoryClientError is raised.
+    """
+    with pytest.raises(RepositoryClientError):
+        reader.read(["HEAD:file-0.md\nHEAD:file-1.md"])
@@ -0,0 +1,185 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for the merge and diff of contents."""
+
+import random
+import re
+import subprocess  # nosec
+import typing
+from pathlib import Path
+
+import pytest
+
+from src.gatekeeper import content
+from src.gatekeeper.exceptions import ContentError
+from tests import content_reference
+
+_HUNK_HEADER = re.compile(r"^(@@ .* @@).*$", flags=re.MULTILINE)
+
+
+def _merge_result(base: str, theirs: str, ours: str, engine: typing.Callable[..., str]) -> str:
+    """Merge contents, returning the error message if there are conflicts.
+
+    Args:
+        base: The starting point for both changes.
+        theirs: The other change.
+        ours: The local change.
+        engine: The merge function.
+
+    Returns:
+        The merged content or the error message.
+    """
+    try:
+        return engine(base=base, theirs=theirs, ours=ours)
+    except ContentError as exc:
+        return f"ContentError: {exc}"
+
+
+def _git_diff(first: str, second: str, algorithm: str, tmp_path: Path) -> str:
+    """Show the difference between two strings with git diff.
+
+    Args:
+        first: One of the strings to compare.
+        second: One of the strings to compare.
+        algorithm: The diff algorithm git uses.
+        tmp_path: The directory to write the strings to.
+
+    Returns:
+        The hunks of the diff without the file headers and the function context.
+    """
+    (tmp_path / "first").write_text(first, encoding="utf-8")
+    (tmp_path / "second").write_text(second, encoding="utf-8")
+    output = subprocess.run(  # nosec
+        [
+            "git",
+            "diff",
+            "--no-index",
+            "--no-color",
+            "--no-indent-heuristic",
+            f"--diff-algorithm={algorithm}",
+            "first",
+            "second",
+        ],
+        cwd=tmp_path,
+        capture_output=True,
+        check=False,
+        encoding="utf-8",
+    ).stdout
+    hunks = output[output.index("@@") :] if "@@" in output else ""
+    return _HUNK_HEADER.sub(r"\1", hunks)
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_merge_same_as_git_merge(seed: int):
+    """
+    arrange: given generated base content and two sets of changes to it.
+    act: when the changes are merged in memory and with git merge in a temporary repository.
+    assert: then the merged contents or the conflicts reported are the same.
+    """
+    rng = random.Random(seed)
+    base = content_reference.generate_content(rng, rng.randint(0, 40))
+    theirs = content_reference.edit_content(rng, base, rng.randint(0, 4))
+    ours = content_reference.edit_content(rng, base, rng.randint(0, 4))
+
+    merged = _merge_result(base=base, theirs=theirs, ours=ours, engine=content.merge)
+
+    assert merged == _merge_result(
+        base=base, theirs=theirs, ours=ours, engine=content_reference.merge
+    )
+
+
+def test_merge_conflict_markers():
+    """
+    arrange: given base content and two different changes to the same line.
+    act: when the changes are merged.
+    assert: then ContentError is raised with the git conflict markers in the message.
+    """
+    with pytest.raises(ContentError) as exc_info:
+        content.merge(base="a\nb\nc\n", theirs="a\ntheirs\nc\n", ours="a\nours\nc\n")
+
+    assert str(exc_info.value) == (
+        "could not automatically merge, conflicts:\n"
+        "a\n<<<<<<< HEAD\nours\n=======\ntheirs\n>>>>>>> theirs\nc\n"
+    )
+
+
+@pytest.mark.parametrize("engine", [content.DiffEngine.MYERS, content.DiffEngine.HISTOGRAM])
+@pytest.mark.parametrize("seed", range(30))
+def test_diff_same_as_git_diff(seed: int, engine: content.DiffEngine, tmp_path: Path):
+    """
+    arrange: given generated content and a changed copy of it.
+    act: when the difference is shown with a unified diff engine.
+    assert: then the hunks are the same as those of git diff with the same algorithm.
+    """
+    rng = random.Random(seed)
+    first = content_reference.generate_content(rng, rng.randint(0, 60))
+    second = content_reference.edit_content(rng, first, rng.randint(0, 10))
+
+    returned_diff = content.diff(first, second, engine=engine, max_size=None)
+
+    assert returned_diff == _git_diff(first, second, algorithm=engine.value, tmp_path=tmp_path)
+
+
+def test_diff_ndiff_same_as_previous_diff():
+    """
+    arrange: given generated content and a changed copy of it.
+    act: when the difference is shown with the ndiff engine without a size limit.
+    assert: then the diff is the same as the one shown before the unified diff engines.
+    """
+    rng = random.Random(0)
+    first = content_reference.generate_content(rng, 60)
+    second = content_reference.edit_content(rng, first, 10)
+
+    returned_diff = content.diff(first, second, engine=content.DiffEngine.NDIFF, max_size=None)
+
+    assert returned_diff == content_reference.diff(first, second)
+
+
+def test_diff_default_unified():
+    """
+    arrange: given two contents that differ in one line.
+    act: when the difference is shown with the default arguments.
+    assert: then it is a unified diff with 3 lines of context rather than the previous ndiff of
+        every line.
+    """
+    first = "".join(f"line {number}\n" for number in range(10))
+    second = first.replace("line 5\n", "line five\n")
+
+    returned_diff = content.diff(first, second)
+
+    assert returned_diff == (
+        "@@ -3,7 +3,7 @@\n line 2\n line 3\n line 4\n-line 5\n+line five\n line 6\n line 7\n"
+        " line 8\n"
+    )
+    assert returned_diff != content_reference.diff(first, second)
+
+
+def test_conflicts_default_unified():
+    """
+    arrange: given base content and two different changes to the same line.
+    act: when the conflicts are checked.
+    assert: then the conflicts are described by a unified diff between the changes.
+    """
+    returned_conflicts = content.conflicts(
+        base="a\nb\nc\n", theirs="a\ntheirs\nc\n", ours="a\nours\nc\n"
+    )
+
+    assert returned_conflicts == "diff: @@ -1,3 +1,3 @@\n a\n-theirs\n+ours\n c\n"
+
+
+def test_diff_default_truncated():
+    """
+    arrange: given two contents whose diff is longer than the default maximum size.
+    act: when the difference is shown with the default arguments.
+    assert: then the diff is cut off at the maximum size with a note.
+    """
+    first = "".join(f"first {number}\n" for number in range(10000))
+    second = "".join(f"second {number}\n" for number in range(10000))
+
+    returned_diff = content.diff(first, second)
+
+    note = f"[diff truncated, it is longer than {content.DEFAULT_MAX_DIFF_SIZE} characters]\n"
+    assert returned_diff.endswith(note)
+    assert len(returned_diff) <= content.DEFAULT_MAX_DIFF_SIZE + len(note)
+    assert content.diff(first, second, max_size=None).startswith(returned_diff[: -len(note)])
@@ -0,0 +1,339 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for the discourse client."""
+
+import hashlib
+import io
+import json
+import re
+import typing
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.gatekeeper.discourse import Discourse
+from src.gatekeeper.exceptions import DiscourseError
+
+BASE_PATH = "https://discourse.example.com"
+
+
+class _Server:  # pylint: disable=R0903
+    """A discourse server with one topic per identifier.
+
+    Attrs:
+        contents: The content of the first post of each topic by identifier.
+        versions: The version of the first post of each topic by identifier.
+        requests: The method and path of every request received.
+        raw_statuses: Statuses to answer requests for the raw content with before the content.
+        if_none_match: The If-None-Match header of every request for the raw content.
+    """
+
+    def __init__(self, topic_ids: typing.Iterable[int]) -> None:
+        """Construct.
+
+        Args:
+            topic_ids: The identifiers of the topics on the server.
+        """
+        self.contents = {topic_id: f"content {topic_id}" for topic_id in topic_ids}
+        self.versions = dict.fromkeys(self.contents, 1)
+        self.requests: list[tuple[str, str]] = []
+        self.raw_statuses: list[int] = []
+        self.if_none_match: list[str | None] = []
+
+    @staticmethod
+    def _response(
+        request: requests.PreparedRequest,
+        status_code: int = 200,
+        body: bytes = b"",
+        headers: dict[str, str] | None = None,
+    ) -> requests.Response:
+        """Create a response.
+
+        Args:
+            request: The request the response is for.
+            status_code: The HTTP status of the response.
+            body: The body of the response.
+            headers: The headers of the response.
+
+        Returns:
+            The response.
+        """
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers or {})
+        response.raw = io.BytesIO(body)
+        response.url = request.url or ""
+        response.request = request
+        return response
+
+    def _json(self, request: requests.PreparedRequest, body: typing.Any) -> requests.Response:
+        """Create a response with a JSON body.
+
+        Args:
+            request: The request the response is for.
+            body: The body of the response.
+
+        Returns:
+            The response.
+        """
+        return self._response(
+            request,
+            body=json.dumps(body).encode("utf-8"),
+            headers={"content-type": "application/json; charset=utf-8"},
+        )
+
+    def _topic(self, request: requests.PreparedRequest, topic_id: int) -> requests.Response:
+        """Get a topic.
+
+        Args:
+            request: The request.
+            topic_id: The identifier of the topic.
+
+        Returns:
+            The topic with its first post.
+        """
+        first_post = {
+            "id": topic_id * 10,
+            "post_number": 1,
+            "version": self.versions[topic_id],
+            "can_edit": True,
+            "user_deleted": False,
+            "updated_at": f"2023-01-0{self.versions[topic_id]}T00:00:00Z",
+        }
+        return self._json(request, {"post_stream": {"posts": [first_post]}})
+
+    def _raw(self, request: requests.PreparedRequest, topic_id: int) -> requests.Response:
+        """Get the raw content of a topic, only if it has changed if the request is conditional.
+
+        Args:
+            request: The request.
+            topic_id: The identifier of the topic.
+
+        Returns:
+            The content of the first post.
+        """
+        self.if_none_match.append(request.headers.get("If-None-Match"))
+        if self.raw_statuses:
+            return self._response(request, status_code=self.raw_statuses.pop(0))
+        content = self.contents[topic_id].encode("utf-8")
+        etag = f'"{hashlib.sha256(content).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            return self._response(request, status_code=304, headers={"ETag": etag})
+        return self._response(request, body=content, headers={"ETag": etag})
+
+    def _update(self, request: requests.PreparedRequest, post_id: int) -> requests.Response:
+        """Update the first post of a topic.
+
+        Args:
+            request: The request.
+            post_id: The identifier of the post.
+
+        Returns:
+            The updated post.
+        """
+        form = parse_qs(typing.cast(str, request.body))
+        self.contents[post_id // 10] = form["post[raw]"][0]
+        self.versions[post_id // 10] += 1
+        return self._json(request, {"post": {}})
+
+    def _delete(self, request: requests.PreparedRequest, topic_id: int) -> requests.Response:
+        """Delete a topic.
+
+        Args:
+            request: The request.
+            topic_id: The identifier of the topic.
+
+        Returns:
+            An empty response.
+        """
+        del self.contents[topic_id]
+        return self._response(request)
+
+    def send(self, request: requests.PreparedRequest) -> requests.Response:
+        """Answer a request.
+
+        Args:
+            request: The request.
+
+        Returns:
+            The response.
+        """
+        path = urlsplit(typing.cast(str, request.url)).path
+        self.requests.append((typing.cast(str, request.method), path))
+        routes: tuple[tuple[str, str, typing.Callable[..., requests.Response]], ...] = (
+            ("HEAD", r"/t/slug/(\d+)", lambda request, _: self._response(request)),
+            ("GET", r"/t/slug/(\d+)\.json", self._topic),
+            ("GET", r"/raw/(\d+)", self._raw),
+            ("PUT", r"/posts/(\d+)", self._update),
+            ("DELETE", r"/t/(\d+)", self._delete),
+        )
+        for method, pattern, handler in routes:
+            if request.method == method and (match := re.fullmatch(pattern, path)):
+                identifier = int(match.group(1))
+                if method != "PUT" and identifier not in self.contents:
+                    break
+                return handler(request, identifier)
+        return self._response(request, status_code=404)
+
+
+@pytest.fixture(name="server")
+def fixture_server(monkeypatch: pytest.MonkeyPatch) -> _Server:
+    """Answer the requests sent to the discourse server with a fake server with one topic."""
+    server = _Server(topic_ids=(1,))
+
+    def _send(
+        _: HTTPAdapter, request: requests.PreparedRequest, *__: typing.Any, **___: typing.Any
+    ) -> requests.Response:
+        """Answer a request with the server.
+
+        Args:
+            request: The request.
+
+        Returns:
+            The response of the server.
+        """
+        return server.send(request)
+
+    monkeypatch.setattr(HTTPAdapter, "send", _send)
+    return server
+
+
+def _discourse(**kwargs: typing.Any) -> Discourse:
+    """Create a client for the discourse server.
+
+    Args:
+        kwargs: Additional arguments for the client.
+
+    Returns:
+        The client.
+    """
+    return Discourse(
+        base_path=BASE_PATH, api_username="user", api_key="key", category_id=1, **kwargs
+    )
+
+
+def test_retrieve_topic_not_modified(server: _Server, tmp_path: Path):
+    """
+    arrange: given a topic that has been downloaded by a client that persists downloads and a new
+        version of the first post with the same content.
+    act: when the topic is retrieved by another client with the same cache directory.
+    assert: then the download is revalidated with a conditional request and the cached content
+        is returned.
+    """
+    _discourse(cache_dir=tmp_path).retrieve_topic(url="/t/slug/1")
+    server.versions[1] += 1
+
+    content = _discourse(cache_dir=tmp_path).retrieve_topic(url="/t/slug/1")
+
+    assert content == "content 1"
+    assert len(server.if_none_match) == 2
+    assert server.if_none_match[0] is None
+    assert server.if_none_match[1] is not None
+
+
+def test_retrieve_topic_not_modified_without_download(server: _Server):
+    """
+    arrange: given a server that answers the first request for the raw content with not modified.
+    act: when the topic is retrieved by a client without a cached download.
+    assert: then the content is requested again without conditional headers and returned.
+    """
+    server.raw_statuses = [304]
+
+    content = _discourse().retrieve_topic(url="/t/slug/1")
+
+    assert content == "content 1"
+    assert server.if_none_match == [None, None]
+
+
+def test_retrieve_topic_not_modified_repeated(server: _Server):
+    """
+    arrange: given a server that always answers requests for the raw content with not modified.
+    act: when the topic is retrieved by a client without a cached download.
+    assert: then DiscourseError is raised after one retry rather than returning empty content.
+    """
+    server.raw_statuses = [304, 304]
+    discourse = _discourse()
+
+    with pytest.raises(DiscourseError):
+        discourse.retrieve_topic(url="/t/slug/1")
+
+    assert server.if_none_match == [None, None]
+
+
+def test_first_post_snapshot_shared(server: _Server):
+    """
+    arrange: given a client and a topic on the server.
+    act: when the write permission of the topic is checked, the topic is retrieved and updated
+        and the write permission is checked again.
+    assert: then the topic is downloaded once before the update and once more after it.
+    """
+    discourse = _discourse()
+
+    discourse.check_topic_write_permission(url="/t/slug/1")
+    discourse.retrieve_topic(url="/t/slug/1")
+    discourse.update_topic(url="/t/slug/1", content="updated")
+    topic_downloads = server.requests.count(("GET", "/t/slug/1.json"))
+    discourse.check_topic_write_permission(url="/t/slug/1")
+
+    assert topic_downloads == 1
+    assert server.requests.count(("GET", "/t/slug/1.json")) == 2
+
+
+def test_prefetch(server: _Server):
+    """
+    arrange: given a client and a server with two topics.
+    act: when the topics and a missing topic are prefetched and the topics are read afterwards.
+    assert: then the contents are returned in the order of the URLs with an error for the missing
+        topic and reading the topics afterwards does not interact with the server.
+    """
+    server.contents[2] = "content 2"
+    server.versions[2] = 1
+    discourse = _discourse()
+
+    results = discourse.prefetch(["/t/slug/2", "/t/slug/3", "/t/slug/1"])
+    requests_count = len(server.requests)
+    contents = [discourse.retrieve_topic(url=url) for url in ("/t/slug/1", "/t/slug/2")]
+    can_edit = discourse.check_topic_write_permission(url="/t/slug/1")
+
+    assert results[0] == "content 2"
+    assert isinstance(results[1], DiscourseError)
+    assert results[2] == "content 1"
+    assert contents == ["content 1", "content 2"]
+    assert can_edit
+    assert len(server.requests) == requests_count
+
+
+def test_update_topic_invalidates(server: _Server):
+    """
+    arrange: given a client that has retrieved a topic.
+    act: when the topic is updated and retrieved again.
+    assert: then the updated content is downloaded and returned.
+    """
+    discourse = _discourse()
+    discourse.retrieve_topic(url="/t/slug/1")
+
+    discourse.update_topic(url="/t/slug/1", content="updated")
+    content = discourse.retrieve_topic(url="/t/slug/1")
+
+    assert content == "updated"
+    assert server.requests.count(("GET", "/raw/1")) == 2
+
+
+def test_delete_topic_invalidates(server: _Server):
+    """
+    arrange: given a client that has retrieved a topic.
+    act: when the topic is deleted and retrieved again.
+    assert: then DiscourseError is raised rather than returning the content of the deleted topic.
+    """
+    discourse = _discourse()
+    discourse.retrieve_topic(url="/t/slug/1")
+
+    discourse.delete_topic(url="/t/slug/1")
+
+    assert not server.contents
+    with pytest.raises(DiscourseError):
+        discourse.retrieve_topic(url="/t/slug/1")
@@ -0,0 +1,98 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for the cache of topic downloads."""
+
+import gzip
+import os
+import secrets
+from pathlib import Path
+
+from src.gatekeeper.discourse_cache import CachedDownload, TopicDownloadCache
+
+
+def _download(content: str) -> CachedDownload:
+    """Create a download of a topic.
+
+    Args:
+        content: The downloaded content.
+
+    Returns:
+        The download.
+    """
+    return CachedDownload(
+        etag='"etag"',
+        last_modified="Sun, 01 Jan 2023 00:00:00 GMT",
+        content=content,
+        version=1,
+        updated_at="2023-01-01T00:00:00Z",
+    )
+
+
+def _age_objects(cache_dir: Path) -> None:
+    """Make all the stored objects look less recently used than any object stored later.
+
+    Args:
+        cache_dir: The directory the downloads are persisted in.
+    """
+    for path in cache_dir.rglob("*.gz"):
+        mtime_ns = path.stat().st_mtime_ns - 10 * 10**9
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_put_persisted(tmp_path: Path):
+    """
+    arrange: given two topics with the same content cached by a cache that persists downloads.
+    act: when the downloads are retrieved by another cache with the same directory.
+    assert: then the persisted downloads are returned and the content is stored once compressed.
+    """
+    download = _download(content="content\n" * 100)
+    cache = TopicDownloadCache(maxsize=10, cache_dir=tmp_path)
+    cache.put(topic_id=1, download=download)
+    cache.put(topic_id=2, download=download)
+
+    other_cache = TopicDownloadCache(maxsize=10, cache_dir=tmp_path)
+
+    assert other_cache.get(topic_id=1) == download
+    assert other_cache.get(topic_id=2) == download
+    (object_path,) = tmp_path.rglob("*.gz")
+    assert gzip.decompress(object_path.read_bytes()).decode("utf-8") == download.content
+    assert object_path.stat().st_size < len(download.content)
+
+
+def test_put_size_cap(tmp_path: Path):
+    """
+    arrange: given a cache that persists downloads with a size cap of about two topics.
+    act: when three topics are cached one after the other.
+    assert: then the least recently used content is removed and the other topics are still
+        persisted.
+    """
+    downloads = {topic_id: _download(content=secrets.token_hex(1000)) for topic_id in (1, 2, 3)}
+    cache = TopicDownloadCache(maxsize=10, cache_dir=tmp_path, max_size_bytes=2600)
+
+    for topic_id, download in downloads.items():
+        cache.put(topic_id=topic_id, download=download)
+        _age_objects(tmp_path)
+
+    other_cache = TopicDownloadCache(maxsize=10, cache_dir=tmp_path)
+    assert other_cache.get(topic_id=1) is None
+    assert other_cache.get(topic_id=2) == downloads[2]
+    assert other_cache.get(topic_id=3) == downloads[3]
+    assert len(list(tmp_path.rglob("*.gz"))) == 2
+
+
+def test_put_write_error(tmp_path: Path):
+    """
+    arrange: given a cache whose directory is a file.
+    act: when a download is cached and then discarded.
+    assert: then no error is raised and the download is kept in memory until it is discarded.
+    """
+    (cache_dir := tmp_path / "cache").write_text("not a directory", encoding="utf-8")
+    cache = TopicDownloadCache(maxsize=10, cache_dir=cache_dir)
+    download = _download(content="content")
+
+    cache.put(topic_id=1, download=download)
+
+    assert cache.get(topic_id=1) == download
+    cache.discard(topic_id=1)
+    assert cache.get(topic_id=1) is None
@@ -0,0 +1,140 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for the requests session used to interact with the discourse server."""
+
+import io
+import time
+import typing
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.gatekeeper.discourse_session import RateLimitedAdapter
+from src.gatekeeper.metrics import MetricsCollector
+from src.gatekeeper.rate_limit import RateLimiter
+
+URL = "https://discourse.example.com/raw/1"
+
+
+def _response(status_code: int, headers: dict[str, str] | None = None) -> requests.Response:
+    """Create a response.
+
+    Args:
+        status_code: The HTTP status of the response.
+        headers: The headers of the response.
+
+    Returns:
+        The response.
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response.raw = io.BytesIO(b"{}")
+    response.url = URL
+    return response
+
+
+@pytest.fixture(name="sent")
+def fixture_sent(monkeypatch: pytest.MonkeyPatch) -> list[requests.Response]:
+    """Answer the requests sent by the adapter with the responses added to the list."""
+    responses: list[requests.Response] = []
+
+    def _send(_: HTTPAdapter, *__: typing.Any, **___: typing.Any) -> requests.Response:
+        """Answer a request with the next response.
+
+        Returns:
+            The next response.
+        """
+        return responses.pop(0)
+
+    monkeypatch.setattr(HTTPAdapter, "send", _send)
+    monkeypatch.setattr(time, "sleep", lambda _: None)
+    return responses
+
+
+def _send(adapter: RateLimitedAdapter) -> requests.Response:
+    """Send a request through the adapter.
+
+    Args:
+        adapter: The adapter.
+
+    Returns:
+        The response.
+    """
+    return adapter.send(requests.Request("GET", URL).prepare())
+
+
+def test_send_rate_limited_retried(sent: list[requests.Response]):
+    """
+    arrange: given a server that rate limits the first request.
+    act: when a request is sent.
+    assert: then the request is retried, the rate limiter is slowed down and both requests are
+        recorded in the metrics.
+    """
+    sent.extend((_response(429, {"Retry-After": "2"}), _response(200)))
+    rate_limiter = RateLimiter()
+    metrics = MetricsCollector()
+    adapter = RateLimitedAdapter(rate_limiter=rate_limiter, metrics=metrics)
+
+    response = _send(adapter)
+
+    assert response.status_code == 200
+    assert not sent
+    assert rate_limiter.stats.throttled == 1
+    assert rate_limiter.stats.requests == 2
+    assert rate_limiter.stats.wait_seconds >= 1.9
+    endpoint = metrics.summary().endpoints["discourse GET /raw/{id}"]
+    assert (endpoint.calls, endpoint.errors, endpoint.retries) == (2, 1, 1)
+
+
+def test_send_rate_limited_retries_exhausted(sent: list[requests.Response]):
+    """
+    arrange: given a server that rate limits every request.
+    act: when a request is sent.
+    assert: then the request is sent 4 times and the last rate limited response is returned.
+    """
+    sent.extend(_response(429, {"Retry-After": "0"}) for _ in range(4))
+    rate_limiter = RateLimiter()
+    adapter = RateLimitedAdapter(rate_limiter=rate_limiter, metrics=None)
+
+    response = _send(adapter)
+
+    assert response.status_code == 429
+    assert not sent
+    assert rate_limiter.stats.throttled == 4
+
+
+def test_send_retry_after_slows_down(sent: list[requests.Response]):
+    """
+    arrange: given a server that asks to retry later without rate limiting the request.
+    act: when a request is sent.
+    assert: then the response is returned without a retry and the rate limiter is slowed down.
+    """
+    sent.append(_response(503, {"Retry-After": "1"}))
+    rate_limiter = RateLimiter()
+    adapter = RateLimitedAdapter(rate_limiter=rate_limiter, metrics=None)
+
+    response = _send(adapter)
+
+    assert response.status_code == 503
+    assert rate_limiter.stats.throttled == 1
+    assert rate_limiter.rate is not None
+
+
+def test_send_not_limited(sent: list[requests.Response]):
+    """
+    arrange: given a server that never rate limits requests.
+    act: when many requests are sent.
+    assert: then no request waits for the rate limiter.
+    """
+    sent.extend(_response(200) for _ in range(200))
+    rate_limiter = RateLimiter()
+    adapter = RateLimitedAdapter(rate_limiter=rate_limiter, metrics=None)
+
+    responses = [_send(adapter) for _ in range(200)]
+
+    assert all(response.status_code == 200 for response in responses)
+    assert rate_limiter.stats.wait_seconds == 0
+    assert rate_limiter.rate is None
@@ -0,0 +1,105 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for reading the docs directory."""
+
+from pathlib import Path
+
+import pytest
+from git.repo import Repo
+
+from src.gatekeeper import docs_directory, git_index
+from src.gatekeeper.content_store import LocalContentStore
+
+CHUNK_SIZE = 4 * 1024
+
+
+def test_read_with_blob_shas_ignored_and_empty_directory(tmp_path: Path):
+    """
+    arrange: given a repository with a committed docs file, a docs file git ignores and an empty
+        directory in the docs directory.
+    act: when the docs directory is read with the blob SHAs from the git index.
+    assert: then all the files and directories are read, only the committed file has a SHA.
+    """
+    repository = Repo.init(tmp_path)
+    with repository.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    docs_path = tmp_path / "docs"
+    docs_path.mkdir()
+    (docs_path / "page.md").write_text("# Page\n", encoding="utf-8")
+    (tmp_path / ".gitignore").write_text("docs/ignored.md\n", encoding="utf-8")
+    repository.git.add(".")
+    repository.git.commit("-m", "add docs")
+    (docs_path / "ignored.md").write_text("# Ignored\n", encoding="utf-8")
+    (docs_path / "empty").mkdir()
+    index_blob_shas = git_index.worktree_blob_shas(repository, "docs") or {}
+
+    path_infos = list(
+        docs_directory.read(
+            docs_path=docs_path,
+            blob_shas={tmp_path / path: blob_sha for path, blob_sha in index_blob_shas.items()},
+        )
+    )
+
+    assert [(path_info.local_path, path_info.is_dir) for path_info in path_infos] == [
+        (docs_path / "empty", True),
+        (docs_path / "ignored.md", False),
+        (docs_path / "page.md", False),
+    ]
+    assert [path_info.blob_sha for path_info in path_infos] == [
+        None,
+        None,
+        repository.git.rev_parse("HEAD:docs/page.md"),
+    ]
+    assert path_infos[1].navlink_title == "Ignored"
+
+
+@pytest.mark.parametrize(
+    "content, expected_title, expected_bytes_read",
+    [
+        pytest.param(
+            "# Title\n" + "line\n" * CHUNK_SIZE, "Title", CHUNK_SIZE, id="heading first chunk"
+        ),
+        pytest.param(
+            "intro\n" + "x" * CHUNK_SIZE + "\n# Title\r\n" + "line\n" * CHUNK_SIZE,
+            "Title",
+            2 * CHUNK_SIZE,
+            id="heading second chunk",
+        ),
+        pytest.param(
+            "x" * (CHUNK_SIZE - 5) + "\n# T\u00eftle\n",
+            "T\u00eftle",
+            CHUNK_SIZE + 5,
+            id="character split between chunks",
+        ),
+        pytest.param(
+            "first line\n" + "line\n" * CHUNK_SIZE,
+            "first line",
+            len("first line\n" + "line\n" * CHUNK_SIZE),
+            id="no heading",
+        ),
+    ],
+)
+def test_read_title(tmp_path: Path, content: str, expected_title: str, expected_bytes_read: int):
+    """
+    arrange: given a documentation file.
+    act: when the title of the file is read and then the content of the file.
+    assert: then the title is returned after reading the file in chunks up to the heading and
+        reading the content only reads the bytes after those.
+    """
+    (path := tmp_path / "page.md").write_bytes(content.encode("utf-8"))
+    local_contents = LocalContentStore()
+    entry = docs_directory._DirectoryEntry(  # pylint: disable=protected-access
+        path=path, is_dir=False, size=path.stat().st_size
+    )
+
+    title = docs_directory._read_title(  # pylint: disable=protected-access
+        entry=entry, local_contents=local_contents
+    )
+    bytes_read = local_contents.stats.bytes_read
+
+    assert title == expected_title
+    assert bytes_read == expected_bytes_read
+    assert local_contents.read_bytes(path) == content.encode("utf-8")
+    assert local_contents.stats.bytes_read == len(content.encode("utf-8"))
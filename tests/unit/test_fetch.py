@@ -0,0 +1,148 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for fetching only the stale refs from the remote."""
+
+import typing
+from pathlib import Path
+
+import pytest
+from git.cmd import Git
+from git.repo import Repo
+
+from src.gatekeeper.fetch import FetchCoordinator
+
+
+def _configure(repository: Repo) -> Repo:
+    """Set the identity used to commit in a repository.
+
+    Args:
+        repository: The repository.
+
+    Returns:
+        The repository.
+    """
+    with repository.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    return repository
+
+
+def _push_commit(repository: Repo, message: str) -> str:
+    """Commit a change and push it to the main branch of the remote.
+
+    Args:
+        repository: The repository to commit in.
+        message: The commit message, also used as the content of the changed file.
+
+    Returns:
+        The SHA of the commit.
+    """
+    (Path(repository.working_tree_dir or "") / "file.md").write_text(message, encoding="utf-8")
+    repository.git.add(".")
+    repository.git.commit("-m", message)
+    repository.git.push("origin", "main")
+    return repository.head.commit.hexsha
+
+
+class _Calls(typing.NamedTuple):
+    """The git commands run against the remote.
+
+    Attrs:
+        ls_remote: The arguments of every listing of the refs on the remote.
+        fetch: The arguments of every fetch.
+    """
+
+    ls_remote: list[tuple[str, ...]]
+    fetch: list[tuple[str, ...]]
+
+
+@pytest.fixture(name="repositories")
+def fixture_repositories(tmp_path: Path) -> tuple[Repo, Repo]:
+    """Create a repository that pushes to a remote with a tag and a clone of the remote."""
+    Repo.init(tmp_path / "remote.git", bare=True, initial_branch="main")
+    upstream = _configure(Repo.clone_from(tmp_path / "remote.git", tmp_path / "upstream"))
+    upstream.git.checkout("-b", "main")
+    _push_commit(upstream, "first")
+    upstream.git.tag("-a", "v1", "-m", "v1")
+    upstream.git.push("origin", "v1")
+    return upstream, Repo.clone_from(tmp_path / "remote.git", tmp_path / "local")
+
+
+@pytest.fixture(name="calls")
+def fixture_calls(repositories: tuple[Repo, Repo], monkeypatch: pytest.MonkeyPatch) -> _Calls:
+    """Record the git commands the local repository runs against the remote."""
+    local_git = repositories[1].git
+    calls = _Calls(ls_remote=[], fetch=[])
+    call_process = Git._call_process  # pylint: disable=protected-access
+
+    def _call_process(
+        git: Git, method: str, *args: typing.Any, **kwargs: typing.Any
+    ) -> typing.Any:
+        """Record the command and run it.
+
+        Args:
+            git: The git command wrapper.
+            method: The name of the command.
+            args: The arguments of the command.
+            kwargs: The options of the command.
+
+        Returns:
+            The output of the command.
+        """
+        if git is local_git and method in _Calls._fields:
+            getattr(calls, method).append(args)
+        return call_process(git, method, *args, **kwargs)
+
+    monkeypatch.setattr(Git, "_call_process", _call_process)
+    return calls
+
+
+def test_fetch_up_to_date(repositories: tuple[Repo, Repo], calls: _Calls):
+    """
+    arrange: given a clone that has all the refs of the remote.
+    act: when the branch, the tag and a branch that does not exist are fetched twice.
+    assert: then the remote is listed once and nothing is fetched.
+    """
+    coordinator = FetchCoordinator(repository=repositories[1], remote="origin")
+
+    for _ in range(2):
+        coordinator.fetch(branches=("main", "missing"), tags=("v1",))
+
+    assert len(calls.ls_remote) == 1
+    assert not calls.fetch
+
+
+def test_fetch_stale(repositories: tuple[Repo, Repo], calls: _Calls):
+    """
+    arrange: given a clone whose main branch is behind the remote.
+    act: when the branch and the tag are fetched.
+    assert: then only the branch is fetched into the remote tracking branch.
+    """
+    upstream, local = repositories
+    sha = _push_commit(upstream, "second")
+    coordinator = FetchCoordinator(repository=local, remote="origin")
+
+    coordinator.fetch(branches=("main",), tags=("v1",))
+
+    assert calls.fetch == [("origin", "+refs/heads/main:refs/remotes/origin/main")]
+    assert local.git.rev_parse("refs/remotes/origin/main") == sha
+
+
+def test_fetch_invalidate(repositories: tuple[Repo, Repo], calls: _Calls):
+    """
+    arrange: given a clone that has fetched from the remote and the remote has since changed.
+    act: when the listing is invalidated and the branch is fetched again.
+    assert: then the remote is listed again and the change is fetched.
+    """
+    upstream, local = repositories
+    coordinator = FetchCoordinator(repository=local, remote="origin")
+    coordinator.fetch(branches=("main",))
+    sha = _push_commit(upstream, "second")
+
+    coordinator.invalidate()
+    coordinator.fetch(branches=("main",))
+
+    assert len(calls.ls_remote) == 2
+    assert len(calls.fetch) == 1
+    assert local.git.rev_parse("refs/remotes/origin/main") == sha
@@ -0,0 +1,133 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for listing files with the git index and trees."""
+
+from pathlib import Path
+
+import pytest
+from git.exc import GitCommandError
+from git.repo import Repo
+
+from src.gatekeeper import git_index
+
+
+def _commit(repository: Repo, files: dict[str, str | None], message: str) -> str:
+    """Write or remove files and commit them.
+
+    Args:
+        repository: The repository to commit to.
+        files: The content of the files by path, None to remove the file.
+        message: The commit message.
+
+    Returns:
+        The SHA of the commit.
+    """
+    for path, content in files.items():
+        if content is None:
+            repository.git.rm(path)
+            continue
+        file = Path(repository.working_tree_dir or "") / path
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text(content, encoding="utf-8")
+        repository.git.add(path)
+    repository.git.commit("-m", message)
+    return repository.head.commit.hexsha
+
+
+@pytest.fixture(name="repository")
+def fixture_repository(tmp_path: Path) -> Repo:
+    """Create a repository with committed docs files."""
+    repository = Repo.init(tmp_path / "repository", initial_branch="main")
+    with repository.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    _commit(
+        repository,
+        {"docs/clean.md": "clean", "docs/modified.md": "modified", "docs/deleted.md": "deleted"},
+        "add docs",
+    )
+    return repository
+
+
+def _blob_sha(repository: Repo, path: str) -> str:
+    """Get the SHA of the blob of a committed file.
+
+    Args:
+        repository: The repository.
+        path: The path to the file.
+
+    Returns:
+        The SHA of the blob.
+    """
+    return repository.git.rev_parse(f"HEAD:{path}")
+
+
+def test_worktree_blob_shas(repository: Repo):
+    """
+    arrange: given a repository with a clean, a modified, a deleted and an untracked docs file.
+    act: when the blob SHAs of the docs directory are listed.
+    assert: then only the clean file has its SHA, the deleted file is not listed and the modified
+        and untracked files have no SHA.
+    """
+    docs_path = Path(repository.working_tree_dir or "") / "docs"
+    (docs_path / "modified.md").write_text("changed", encoding="utf-8")
+    (docs_path / "deleted.md").unlink()
+    (docs_path / "untracked.md").write_text("untracked", encoding="utf-8")
+
+    blob_shas = git_index.worktree_blob_shas(repository, "docs")
+
+    assert blob_shas == {
+        "docs/clean.md": _blob_sha(repository, "docs/clean.md"),
+        "docs/modified.md": None,
+        "docs/untracked.md": None,
+    }
+
+
+@pytest.mark.parametrize(
+    "ours, theirs",
+    [
+        pytest.param("changed on main", None, id="deleted by them"),
+        pytest.param(None, "changed on branch", id="deleted by us"),
+    ],
+)
+def test_worktree_blob_shas_unmerged(repository: Repo, ours: str | None, theirs: str | None):
+    """
+    arrange: given a merge where one side changed a docs file and the other deleted it.
+    act: when the blob SHAs of the docs directory are listed.
+    assert: then the conflicting file, which is still in the working tree, is listed without a
+        SHA.
+    """
+    repository.git.checkout("-b", "branch")
+    _commit(repository, {"docs/modified.md": theirs}, "change on branch")
+    repository.git.checkout("main")
+    _commit(repository, {"docs/modified.md": ours}, "change on main")
+    with pytest.raises(GitCommandError):
+        repository.git.merge("branch")
+    assert (Path(repository.working_tree_dir or "") / "docs/modified.md").is_file()
+
+    blob_shas = git_index.worktree_blob_shas(repository, "docs")
+
+    assert blob_shas is not None
+    assert "docs/modified.md" in blob_shas
+    assert blob_shas["docs/modified.md"] is None
+    assert blob_shas["docs/clean.md"] == _blob_sha(repository, "docs/clean.md")
+
+
+def test_tree_blob_shas(repository: Repo):
+    """
+    arrange: given a repository with committed docs files.
+    act: when the blob SHAs of the docs directory of the commit and of an unknown commit are
+        listed.
+    assert: then the committed files are listed with their SHA and None is returned for the
+        unknown commit.
+    """
+    commit_sha = repository.head.commit.hexsha
+
+    blob_shas = git_index.tree_blob_shas(repository, commit_sha=commit_sha, directory="docs")
+
+    assert blob_shas == {
+        path: _blob_sha(repository, path)
+        for path in ("docs/clean.md", "docs/deleted.md", "docs/modified.md")
+    }
+    assert git_index.tree_blob_shas(repository, commit_sha="0" * 40, directory="docs") is None
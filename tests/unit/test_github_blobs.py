@@ -0,0 +1,69 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for creating blobs on GitHub."""
+
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from src.gatekeeper import github_blobs
+
+
+def _tree(elements: list[tuple[str, str, str]], truncated: bool = False) -> SimpleNamespace:
+    """Create a tree like the ones returned by PyGithub.
+
+    Args:
+        elements: The path, type and SHA of the elements in the tree.
+        truncated: Whether GitHub truncated the listing.
+
+    Returns:
+        The tree.
+    """
+    return SimpleNamespace(
+        tree=[SimpleNamespace(path=path, type=type_, sha=sha) for path, type_, sha in elements],
+        raw_data={"truncated": truncated},
+    )
+
+
+def test_existing_blob_shas_only_lists_directories_of_paths():
+    """
+    arrange: given a root tree with files and the docs and src directories.
+    act: when existing_blob_shas is called with paths in the docs directory.
+    assert: then only the docs directory is listed and its blobs and the root blobs are returned.
+    """
+    root_tree = _tree(
+        [("README.md", "blob", "readme"), ("docs", "tree", "docs"), ("src", "tree", "src")]
+    )
+    github_repository = mock.MagicMock()
+    github_repository.get_git_tree.return_value = _tree(
+        [("a.md", "blob", "a"), ("sub", "tree", "sub"), ("sub/b.md", "blob", "b")], truncated=True
+    )
+
+    shas = github_blobs.existing_blob_shas(
+        github_repository=github_repository,
+        root_tree=root_tree,  # type: ignore[arg-type]
+        paths=(Path("docs/a.md"), Path("docs/new.md")),
+    )
+
+    assert shas == {"readme", "a", "b"}
+    github_repository.get_git_tree.assert_called_once_with(sha="docs", recursive=True)
+
+
+def test_existing_blob_shas_root_files():
+    """
+    arrange: given a root tree with a file and a directory.
+    act: when existing_blob_shas is called with a path in the root of the repository.
+    assert: then no directory is listed.
+    """
+    root_tree = _tree([("README.md", "blob", "readme"), ("docs", "tree", "docs")])
+    github_repository = mock.MagicMock()
+
+    shas = github_blobs.existing_blob_shas(
+        github_repository=github_repository,
+        root_tree=root_tree,  # type: ignore[arg-type]
+        paths=(Path("README.md"),),
+    )
+
+    assert shas == {"readme"}
+    github_repository.get_git_tree.assert_not_called()
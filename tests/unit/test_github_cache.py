@@ -0,0 +1,42 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for the cache of GitHub API responses."""
+
+from pathlib import Path
+
+from src.gatekeeper.github_cache import CachedResponse, GithubResponseCache
+
+RESPONSE = CachedResponse(etag='"etag"', headers={"Content-Type": "application/json"}, body="{}")
+
+
+def test_put_persisted(tmp_path: Path):
+    """
+    arrange: given a response cached by a cache that persists the responses.
+    act: when the response is retrieved by another cache with the same directory.
+    assert: then the persisted response is returned.
+    """
+    key = GithubResponseCache.key("https://api.github.com/repos", {"Authorization": "token"})
+    GithubResponseCache(cache_dir=tmp_path).put(key, RESPONSE)
+
+    returned_response = GithubResponseCache(cache_dir=tmp_path).get(key)
+
+    assert returned_response == RESPONSE
+    assert "token" not in "".join(
+        path.read_text(encoding="utf-8") for path in tmp_path.rglob("*.json")
+    )
+
+
+def test_put_write_error(tmp_path: Path):
+    """
+    arrange: given a cache whose directory is a file.
+    act: when a response is cached.
+    assert: then no error is raised and the response is kept in memory.
+    """
+    (cache_dir := tmp_path / "cache").write_text("not a directory", encoding="utf-8")
+    cache = GithubResponseCache(cache_dir=cache_dir)
+    key = GithubResponseCache.key("https://api.github.com/repos", {})
+
+    cache.put(key, RESPONSE)
+
+    assert cache.get(key) == RESPONSE
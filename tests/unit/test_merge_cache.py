@@ -0,0 +1,107 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for the cache of merge results."""
+
+from pathlib import Path
+
+import pytest
+
+from src.gatekeeper import content, merge_cache, types_
+from src.gatekeeper.content_store import digest
+from src.gatekeeper.exceptions import ContentError
+
+
+def _content_change(base: str, server: str, local: str) -> types_.ContentChange:
+    """Create a change of content.
+
+    Args:
+        base: The content which is the base for comparison.
+        server: The content on the server.
+        local: The content on the local disk.
+
+    Returns:
+        The change of content.
+    """
+    return types_.ContentChange(
+        base=base,
+        server=server,
+        local=local,
+        base_digest=digest(base),
+        server_digest=digest(server),
+        local_digest=digest(local),
+    )
+
+
+CONFLICTING_CHANGE = _content_change(base="a\nb\nc\n", server="a\nserver\nc\n", local="a\nx\nc\n")
+
+
+def test_merge_conflicts_error():
+    """
+    arrange: given a change whose server and local contents conflict.
+    act: when the change is merged through the cache.
+    assert: then ContentError is raised with the same message as the merge of the contents, which
+        includes the conflict markers.
+    """
+    cache = merge_cache.MergeCache()
+
+    with pytest.raises(ContentError) as exc_info:
+        cache.merge(CONFLICTING_CHANGE)
+
+    with pytest.raises(ContentError) as expected_exc_info:
+        content.merge(
+            base=CONFLICTING_CHANGE.base or "",
+            theirs=CONFLICTING_CHANGE.server,
+            ours=CONFLICTING_CHANGE.local,
+        )
+    assert str(exc_info.value) == str(expected_exc_info.value)
+    assert "<<<<<<< HEAD" in str(exc_info.value)
+
+
+def test_merge_persisted(tmp_path: Path):
+    """
+    arrange: given a change that has been merged by a cache that persists the results.
+    act: when the change is merged by another cache with the same directory.
+    assert: then the persisted result, including the merge error, is used.
+    """
+    merge_cache.MergeCache(cache_dir=tmp_path).result(CONFLICTING_CHANGE)
+    cache = merge_cache.MergeCache(cache_dir=tmp_path)
+
+    with pytest.raises(ContentError) as exc_info:
+        cache.merge(CONFLICTING_CHANGE)
+
+    assert cache.merges == 0
+    assert "<<<<<<< HEAD" in str(exc_info.value)
+
+
+def test_merge_persisted_other_version(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    arrange: given a change that has been merged by a cache that persists the results.
+    act: when the merge code is modified and the change is merged by another cache with the same
+        directory.
+    assert: then the change is merged again.
+    """
+    merge_cache.MergeCache(cache_dir=tmp_path).result(CONFLICTING_CHANGE)
+    monkeypatch.setattr(merge_cache, "_tool_version", lambda: "other version")
+    cache = merge_cache.MergeCache(cache_dir=tmp_path)
+
+    cache.result(CONFLICTING_CHANGE)
+
+    assert cache.merges == 1
+
+
+def test_result_write_error(tmp_path: Path):
+    """
+    arrange: given a cache whose directory is a file.
+    act: when a change is merged twice.
+    assert: then no error is raised, the result is returned and the change is only merged once.
+    """
+    (cache_dir := tmp_path / "cache").write_text("not a directory", encoding="utf-8")
+    cache = merge_cache.MergeCache(cache_dir=cache_dir)
+
+    result = cache.result(CONFLICTING_CHANGE)
+
+    assert result.merged is None
+    assert result.merge_error is not None and "<<<<<<< HEAD" in result.merge_error
+    assert cache.result(CONFLICTING_CHANGE) == result
+    assert cache.merges == 1
@@ -0,0 +1,183 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for parsing the navigation table."""
+
+import typing
+
+import pytest
+
+from src.gatekeeper import navigation_table, types_
+from src.gatekeeper.discourse import Discourse
+from src.gatekeeper.exceptions import DiscourseError, PagePermissionError, ServerError
+
+PAGE = """# Navigation
+
+| level | path | navlink |
+| -- | -- | -- |
+| 1 | group | [Group]() |
+| 2 | page-1 | [Page 1](/t/page-1/1) |
+| 2 | page-2 | [Page 2](/t/page-2/2) |
+"""
+
+
+class _Discourse:
+    """A discourse client that records the topics it is asked about.
+
+    Attrs:
+        max_pages: The number of pages of the category listing requested.
+        prefetched: The URLs of every call to prefetch.
+        checked: The URLs of every write permission check.
+        failing: The URLs of the topics that cannot be retrieved.
+        can_edit: Whether the credentials have write permission on the topics.
+    """
+
+    def __init__(self) -> None:
+        """Construct."""
+        self.max_pages: int | None = None
+        self.prefetched: list[list[str]] = []
+        self.checked: list[str] = []
+        self.failing: set[str] = set()
+        self.can_edit = True
+
+    def list_category_topics(self, max_pages: int) -> dict:
+        """Record the listing of the category.
+
+        Args:
+            max_pages: The maximum number of pages to list.
+
+        Returns:
+            No topics.
+        """
+        self.max_pages = max_pages
+        return {}
+
+    def prefetch(self, urls: typing.Iterable[str]) -> list[str | DiscourseError]:
+        """Record the topics being prefetched.
+
+        Args:
+            urls: The URLs to the topics.
+
+        Returns:
+            The error for each topic that has one and the content for the others.
+        """
+        self.prefetched.append(list(urls))
+        return [
+            DiscourseError(f"failed to retrieve {url}") if url in self.failing else "content"
+            for url in self.prefetched[-1]
+        ]
+
+    def check_topic_write_permission(self, url: str) -> bool:
+        """Record the write permission check.
+
+        Args:
+            url: The URL to the topic.
+
+        Returns:
+            Whether the credentials have write permission.
+
+        Raises:
+            DiscourseError: if retrieving the topic fails.
+        """
+        self.checked.append(url)
+        if url in self.failing:
+            raise DiscourseError(f"failed to retrieve {url}")
+        return self.can_edit
+
+
+@pytest.fixture(name="discourse")
+def fixture_discourse() -> _Discourse:
+    """Create the discourse client."""
+    return _Discourse()
+
+
+def _from_page(discourse: _Discourse) -> list[types_.TableRow]:
+    """Parse the rows of the page and check them.
+
+    Args:
+        discourse: The discourse client.
+
+    Returns:
+        The rows.
+    """
+    return list(navigation_table.from_page(PAGE, discourse=typing.cast(Discourse, discourse)))
+
+
+def test_from_page(discourse: _Discourse):
+    """
+    arrange: given a page with a navigation table with a group and two linked topics.
+    act: when the rows are parsed from the page.
+    assert: then all the rows are returned, the category is listed, the linked topics are
+        prefetched together once and their write permission is checked.
+    """
+    rows = _from_page(discourse)
+
+    assert [row.path for row in rows] == [
+        ("group",),
+        ("group", "page-1"),
+        ("group", "page-2"),
+    ]
+    assert discourse.max_pages == 1
+    assert discourse.prefetched == [["/t/page-1/1", "/t/page-2/2"]]
+    assert discourse.checked == ["/t/page-1/1", "/t/page-2/2"]
+
+
+def test_from_page_prefetch_error(discourse: _Discourse):
+    """
+    arrange: given a page with a linked topic that could not be prefetched.
+    act: when the rows are parsed from the page.
+    assert: then ServerError caused by the prefetch error is raised without retrieving the topic
+        again.
+    """
+    discourse.failing.add("/t/page-1/1")
+
+    with pytest.raises(ServerError) as exc_info:
+        _from_page(discourse)
+
+    assert isinstance(exc_info.value.__cause__, DiscourseError)
+    assert not discourse.checked
+
+
+def _linked_row() -> types_.TableRow:
+    """Get the first row of the page that links to a topic.
+
+    Returns:
+        The row.
+    """
+    return next(
+        row
+        for row in navigation_table.generate_table_row(PAGE.splitlines())
+        if row.navlink.link is not None
+    )
+
+
+def test_check_table_row_write_permission_error(discourse: _Discourse):
+    """
+    arrange: given a linked topic that was prefetched and whose write permission check fails.
+    act: when the row is checked.
+    assert: then ServerError caused by the discourse error is raised.
+    """
+    discourse.failing.add("/t/page-1/1")
+
+    with pytest.raises(ServerError) as exc_info:
+        navigation_table._check_table_row_write_permission(  # pylint: disable=protected-access
+            _linked_row(),
+            discourse=typing.cast(Discourse, discourse),
+            prefetched={"/t/page-1/1": "content"},
+        )
+
+    assert isinstance(exc_info.value.__cause__, DiscourseError)
+
+
+def test_check_table_row_write_permission_missing(discourse: _Discourse):
+    """
+    arrange: given a linked topic the credentials do not have write permission on.
+    act: when the row is checked.
+    assert: then PagePermissionError is raised.
+    """
+    discourse.can_edit = False
+
+    with pytest.raises(PagePermissionError):
+        navigation_table._check_table_row_write_permission(  # pylint: disable=protected-access
+            _linked_row(), discourse=typing.cast(Discourse, discourse), prefetched={}
+        )
@@ -0,0 +1,139 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for partial clone support."""
+
+from pathlib import Path
+
+import pytest
+from git.repo import Repo
+
+from src.gatekeeper import partial_clone
+
+DOCS_PATHS = ("docs/a.md", "docs/b.md")
+
+
+def _commit(repository: Repo, files: dict[str, str], message: str) -> str:
+    """Write files and commit them.
+
+    Args:
+        repository: The repository to commit to.
+        files: The content of the files by path.
+        message: The commit message.
+
+    Returns:
+        The SHA of the commit.
+    """
+    for path, content in files.items():
+        file = Path(repository.working_tree_dir or "") / path
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text(content, encoding="utf-8")
+    repository.git.add(*files)
+    repository.git.commit("-m", message)
+    return repository.head.commit.hexsha
+
+
+def _is_missing(repository: Repo, commit_sha: str, path: str) -> bool:
+    """Check whether the content of a file is missing from the local object database.
+
+    Args:
+        repository: The repository to check.
+        commit_sha: The SHA of the commit.
+        path: The path to the file.
+
+    Returns:
+        Whether the content of the file has not been fetched.
+    """
+    blob_sha = repository.git.rev_parse(f"{commit_sha}:{path}")
+    missing = repository.git.rev_list("--objects", "--missing=print", f"{commit_sha}^{{tree}}")
+    return f"?{blob_sha}" in missing.splitlines()
+
+
+@pytest.fixture(name="origin")
+def fixture_origin(tmp_path: Path) -> Repo:
+    """Create a repository that serves blobless partial clones."""
+    repository = Repo.init(tmp_path / "origin")
+    with repository.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+        config.set_value("uploadpack", "allowFilter", "true")
+        config.set_value("uploadpack", "allowAnySHA1InWant", "true")
+    return repository
+
+
+def _blobless_clone(origin: Repo, path: Path) -> Repo:
+    """Create a blobless partial clone without checking out any files.
+
+    Args:
+        origin: The repository to clone.
+        path: The directory to clone into.
+
+    Returns:
+        The partial clone.
+    """
+    return Repo.clone_from(
+        f"file://{origin.working_tree_dir}",
+        path,
+        multi_options=[f"--filter={partial_clone.BLOB_FILTER}", "--no-checkout"],
+    )
+
+
+def test_fetch_missing_blobs_commit_not_changing_paths(origin: Repo, tmp_path: Path):
+    """
+    arrange: given a partial clone and a commit that did not change the docs files.
+    act: when fetch_missing_blobs is called for the docs files of the commit.
+    assert: then the contents of all the docs files are fetched.
+    """
+    _commit(origin, {path: f"# {path}" for path in DOCS_PATHS}, "add docs")
+    commit_sha = _commit(origin, {"README.md": "readme"}, "change readme only")
+    clone = _blobless_clone(origin=origin, path=tmp_path / "clone")
+    assert partial_clone.promisor_remote(clone) == "origin"
+    assert all(_is_missing(clone, commit_sha, path) for path in DOCS_PATHS)
+
+    fetched = partial_clone.fetch_missing_blobs(clone, commit_sha=commit_sha, paths=DOCS_PATHS)
+
+    assert fetched == len(DOCS_PATHS)
+    assert not any(_is_missing(clone, commit_sha, path) for path in DOCS_PATHS)
+    assert _is_missing(clone, commit_sha, "README.md")
+
+
+def test_fetch_missing_blobs_commit_changing_some_paths(origin: Repo, tmp_path: Path):
+    """
+    arrange: given a partial clone and a commit that changed one of the docs files.
+    act: when fetch_missing_blobs is called for the docs files of the commit.
+    assert: then the contents of all the docs files are fetched, including the unchanged one.
+    """
+    _commit(origin, {path: f"# {path}" for path in DOCS_PATHS}, "add docs")
+    commit_sha = _commit(origin, {DOCS_PATHS[0]: "# changed"}, "change one docs file")
+    clone = _blobless_clone(origin=origin, path=tmp_path / "clone")
+
+    fetched = partial_clone.fetch_missing_blobs(clone, commit_sha=commit_sha, paths=DOCS_PATHS)
+
+    assert fetched == len(DOCS_PATHS)
+    assert not any(_is_missing(clone, commit_sha, path) for path in DOCS_PATHS)
+
+
+def test_fetch_missing_blobs_nothing_missing(origin: Repo, tmp_path: Path):
+    """
+    arrange: given a partial clone whose docs contents have already been fetched.
+    act: when fetch_missing_blobs is called again for the docs files.
+    assert: then nothing is fetched.
+    """
+    commit_sha = _commit(origin, {path: f"# {path}" for path in DOCS_PATHS}, "add docs")
+    clone = _blobless_clone(origin=origin, path=tmp_path / "clone")
+    partial_clone.fetch_missing_blobs(clone, commit_sha=commit_sha, paths=DOCS_PATHS)
+
+    fetched = partial_clone.fetch_missing_blobs(clone, commit_sha=commit_sha, paths=DOCS_PATHS)
+
+    assert fetched == 0
+
+
+def test_fetch_missing_blobs_not_partial_clone(origin: Repo):
+    """
+    arrange: given a repository that is not a partial clone.
+    act: when fetch_missing_blobs is called.
+    assert: then nothing is fetched.
+    """
+    commit_sha = _commit(origin, {path: f"# {path}" for path in DOCS_PATHS}, "add docs")
+
+    assert partial_clone.fetch_missing_blobs(origin, commit_sha=commit_sha, paths=DOCS_PATHS) == 0
@@ -0,0 +1,80 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for the client side rate limiting."""
+
+import time
+
+import pytest
+
+from src.gatekeeper.rate_limit import RateLimiter
+
+
+@pytest.fixture(name="sleeps")
+def fixture_sleeps(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Record the sleeps instead of sleeping."""
+    sleeps: list[float] = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    return sleeps
+
+
+def test_not_limited_by_default(sleeps: list[float]):
+    """
+    arrange: given a rate limiter without a rate.
+    act: when many requests are sent.
+    assert: then no request waits.
+    """
+    rate_limiter = RateLimiter()
+
+    for _ in range(500):
+        rate_limiter.acquire()
+        rate_limiter.record_success()
+
+    assert rate_limiter.rate is None
+    assert not sleeps
+    assert rate_limiter.stats.requests == 500
+    assert rate_limiter.stats.wait_seconds == 0
+
+
+def test_throttle_halves_recent_rate_and_recovers(sleeps: list[float]):
+    """
+    arrange: given a rate limiter without a rate that let many requests through within a second.
+    act: when the server rate limits requests and then requests succeed again.
+    assert: then requests are paused, the rate is limited to half the rate requests were sent at
+        and requests are no longer limited once the rate has recovered.
+    """
+    rate_limiter = RateLimiter()
+    for _ in range(100):
+        rate_limiter.acquire()
+
+    rate_limiter.throttle(wait_seconds=5)
+
+    assert rate_limiter.rate == 50
+    rate_limiter.acquire()
+    assert sleeps and 4 < sleeps[0] <= 5
+    for _ in range(9):
+        rate_limiter.record_success()
+    assert rate_limiter.rate == pytest.approx(95)
+    rate_limiter.record_success()
+    assert rate_limiter.rate is None
+    assert rate_limiter.stats.throttled == 1
+
+
+def test_fixed_rate(sleeps: list[float]):
+    """
+    arrange: given a rate limiter with a rate and a burst of one request.
+    act: when two requests are sent, the server rate limits requests and requests succeed again.
+    assert: then the second request waits for the rate, the rate is halved and it recovers to the
+        configured rate.
+    """
+    rate_limiter = RateLimiter(rate=2, burst=1)
+
+    rate_limiter.acquire()
+    rate_limiter.acquire()
+
+    assert len(sleeps) == 1 and 0.4 < sleeps[0] <= 0.5
+    rate_limiter.throttle(wait_seconds=0)
+    assert rate_limiter.rate == 1
+    for _ in range(20):
+        rate_limiter.record_success()
+    assert rate_limiter.rate == 2
@@ -0,0 +1,63 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for calculating the required changes."""
+
+from pathlib import Path
+
+from src.gatekeeper import reconcile, types_
+from src.gatekeeper.content_store import LocalContentStore
+
+
+def _path_info(local_path: Path, is_dir: bool) -> types_.PathInfo:
+    """Create the information about a path in the docs directory.
+
+    Args:
+        local_path: The path to the file on the local disk.
+        is_dir: Whether the path is a directory.
+
+    Returns:
+        The information about the path.
+    """
+    return types_.PathInfo(
+        local_path=local_path,
+        level=1,
+        table_path=(local_path.stem,),
+        navlink_title="title",
+        alphabetical_rank=0,
+        navlink_hidden=False,
+        is_dir=is_dir,
+        size=0,
+        content_digest=None,
+        blob_sha=None,
+    )
+
+
+def test_local_only_file(tmp_path: Path):
+    """
+    arrange: given a documentation file that is not on the server.
+    act: when the action for the file is calculated.
+    assert: then a create action with the content of the file is returned.
+    """
+    (path := tmp_path / "page.md").write_text("# page\n", encoding="utf-8")
+
+    returned_action = reconcile._local_only(  # pylint: disable=protected-access
+        path_info=_path_info(path, is_dir=False), local_contents=LocalContentStore()
+    )
+
+    assert returned_action.content == "# page\n"
+
+
+def test_local_only_dangling_symlink(tmp_path: Path):
+    """
+    arrange: given a documentation file that is a symbolic link to a file that does not exist.
+    act: when the action for the file is calculated.
+    assert: then a create action without content is returned.
+    """
+    (path := tmp_path / "page.md").symlink_to(tmp_path / "missing.md")
+
+    returned_action = reconcile._local_only(  # pylint: disable=protected-access
+        path_info=_path_info(path, is_dir=False), local_contents=LocalContentStore()
+    )
+
+    assert returned_action.content is None
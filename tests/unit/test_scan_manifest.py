@@ -0,0 +1,138 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Unit tests for the manifest of the scanned docs directory."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from src.gatekeeper import scan_manifest
+from src.gatekeeper.scan_manifest import ManifestEntry, ScanManifest
+
+
+@pytest.fixture(name="docs_path")
+def fixture_docs_path(tmp_path: Path) -> Path:
+    """Create a docs directory with a file."""
+    docs_path = tmp_path / "docs"
+    docs_path.mkdir()
+    (docs_path / "page.md").write_text("# page\n", encoding="utf-8")
+    return docs_path
+
+
+def _save_entry(manifest_path: Path, file: Path, docs_path: Path) -> ManifestEntry:
+    """Record the entry of a file and persist the manifest.
+
+    Args:
+        manifest_path: The file to persist the manifest in.
+        file: The file to record.
+        docs_path: The path to the docs directory.
+
+    Returns:
+        The recorded entry.
+    """
+    stat = file.stat()
+    entry = ManifestEntry(
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        inode=stat.st_ino,
+        title="page",
+        content_digest="digest",
+    )
+    manifest = ScanManifest(path=manifest_path, docs_path=docs_path)
+    manifest.put(file, entry)
+    manifest.save()
+    return entry
+
+
+def _get_entry(manifest_path: Path, file: Path, docs_path: Path) -> ManifestEntry | None:
+    """Get the entry of a file from the persisted manifest.
+
+    Args:
+        manifest_path: The file the manifest is persisted in.
+        file: The file to get the entry of.
+        docs_path: The path to the docs directory.
+
+    Returns:
+        The entry or None if it is not reused.
+    """
+    stat = file.stat()
+    return ScanManifest(path=manifest_path, docs_path=docs_path).get(
+        file, mtime_ns=stat.st_mtime_ns, size=stat.st_size, inode=stat.st_ino
+    )
+
+
+def test_get_modified_before_save(docs_path: Path, tmp_path: Path):
+    """
+    arrange: given a persisted manifest with the entry of a file modified before it was saved.
+    act: when the entry of the unchanged file is retrieved.
+    assert: then the entry is reused.
+    """
+    manifest_path = tmp_path / "manifest.json"
+    file = docs_path / "page.md"
+    mtime_ns = file.stat().st_mtime_ns
+    os.utime(file, ns=(mtime_ns - 10**9, mtime_ns - 10**9))
+    entry = _save_entry(manifest_path=manifest_path, file=file, docs_path=docs_path)
+
+    returned_entry = _get_entry(manifest_path=manifest_path, file=file, docs_path=docs_path)
+
+    assert returned_entry == entry
+
+
+def test_get_modified_when_saved(docs_path: Path, tmp_path: Path):
+    """
+    arrange: given a persisted manifest with the entry of a file that has the same modification
+        time as the manifest.
+    act: when the entry of the file is retrieved.
+    assert: then the entry is not reused since the file could have changed after it was recorded.
+    """
+    manifest_path = tmp_path / "manifest.json"
+    file = docs_path / "page.md"
+    _save_entry(manifest_path=manifest_path, file=file, docs_path=docs_path)
+    manifest_mtime_ns = manifest_path.stat().st_mtime_ns
+    os.utime(file, ns=(manifest_mtime_ns, manifest_mtime_ns))
+    _save_entry(manifest_path=manifest_path, file=file, docs_path=docs_path)
+    os.utime(manifest_path, ns=(manifest_mtime_ns, manifest_mtime_ns))
+
+    returned_entry = _get_entry(manifest_path=manifest_path, file=file, docs_path=docs_path)
+
+    assert returned_entry is None
+
+
+def test_save_version_error(docs_path: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    arrange: given the version of the code cannot be read.
+    act: when the manifest is saved.
+    assert: then no error is raised and the manifest is not persisted.
+    """
+
+    def _raise_os_error() -> str:
+        """Fail to read the version.
+
+        Raises:
+            OSError: always.
+        """
+        raise OSError("cannot read")
+
+    monkeypatch.setattr(scan_manifest, "_tool_version", _raise_os_error)
+    manifest_path = tmp_path / "manifest.json"
+
+    _save_entry(manifest_path=manifest_path, file=docs_path / "page.md", docs_path=docs_path)
+
+    assert not manifest_path.exists()
+
+
+def test_save_write_error(docs_path: Path, tmp_path: Path):
+    """
+    arrange: given the directory of the manifest is a file.
+    act: when the manifest is saved.
+    assert: then no error is raised.
+    """
+    (tmp_path / "cache").write_text("not a directory", encoding="utf-8")
+
+    _save_entry(
+        manifest_path=tmp_path / "cache" / "manifest.json",
+        file=docs_path / "page.md",
+        docs_path=docs_path,
+    )